@@ -0,0 +1,76 @@
+"""
+SmartPay Analytics - Feature Stats Benchmark
+============================================
+
+Compares the original per-group lambda aggregation used for ``feature_metrics``
+with the vectorized ``feature_stats`` kernel on synthetic transactions.
+
+Usage: python benchmarks/bench_feature_stats.py --rows 10000000 [--categorical]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from aggregates import feature_stats
+
+FEATURES = ['Bill Payment', 'Investments', 'Money Transfer', 'QR Scan', 'Top-up']
+STATUSES = ['Success', 'Failed', 'Abandoned']
+
+
+def make_transactions(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'transaction_id': np.arange(1, rows + 1),
+        'user_id': rng.integers(1, 1001, rows),
+        'feature': np.array(FEATURES, dtype=object)[rng.integers(0, len(FEATURES), rows)],
+        'amount': rng.uniform(1, 100, rows).round(2),
+        'status': np.array(STATUSES, dtype=object)[rng.choice(3, rows, p=[0.75, 0.15, 0.10])]
+    })
+
+
+def legacy_feature_metrics(transactions_df):
+    return transactions_df.groupby('feature').agg({
+        'transaction_id': 'count',
+        'amount': lambda x: x[transactions_df.loc[x.index, 'status'] == 'Success'].sum(),
+        'status': lambda x: (x == 'Success').sum() / len(x) * 100
+    })
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--categorical', action='store_true',
+                        help='store feature/status as categoricals, as the typed ingest mode does')
+    args = parser.parse_args()
+
+    transactions_df = make_transactions(args.rows)
+    if args.categorical:
+        transactions_df = transactions_df.astype({'feature': 'category', 'status': 'category'})
+    legacy = best_of(lambda: legacy_feature_metrics(transactions_df), args.repeat)
+    vectorized = best_of(lambda: feature_stats(transactions_df), args.repeat)
+
+    print(f"rows:       {args.rows:,}")
+    print(f"legacy:     {legacy:.3f}s")
+    print(f"vectorized: {vectorized:.3f}s")
+    print(f"speedup:    {legacy / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
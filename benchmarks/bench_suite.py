@@ -0,0 +1,307 @@
+"""
+SmartPay Analytics - Benchmark Suite
+====================================
+
+Times every ``SmartPayDataProcessor`` metric/export method and every
+``SmartPayInsightsGenerator`` analysis on synthetic datasets (see
+``synthetic_data.py``) at several scales, and writes the results as JSON for
+regression tracking.
+
+Each method is run ``--repeat`` times from a cold state (cached aggregates
+are dropped first) and reports wall and CPU time. One further run under
+``tracemalloc`` records the peak bytes allocated, and a sampler thread records
+the peak resident set size. Memory runs are kept apart so that tracing does
+not distort the timings.
+
+Usage: python benchmarks/bench_suite.py --scales 10k 1m [--output results.json]
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+sys.path.append(os.path.dirname(__file__))
+
+from data_processing import SmartPayDataProcessor
+from insights_generator import SmartPayInsightsGenerator
+from synthetic_data import ensure_dataset
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+SUITE_VERSION = 1
+
+# Transaction rows per named scale; datasets get one user per 10 transactions.
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+    '100m': 100_000_000,
+}
+
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def scale_rows(scale):
+    """Transaction rows for a named scale ('1m') or a plain row count ('250000')."""
+    if scale in SCALES:
+        return SCALES[scale]
+    try:
+        return int(scale)
+    except ValueError:
+        raise ValueError(f"Unknown scale {scale!r}; expected one of {sorted(SCALES)} or a row count") from None
+
+
+def current_rss():
+    """Resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss():
+    """Process high-water RSS in bytes (ru_maxrss is KiB on Linux, bytes on macOS).
+
+    None where the ``resource`` module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    """Samples RSS on a background thread to find the peak during a block."""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start_rss = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_rss = current_rss()
+        self.peak = self.start_rss
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.peak = max(self.peak, current_rss())
+        else:
+            self.peak = max_rss()
+
+
+def measure(func, setup=None, repeat=3, trace_memory=True):
+    """Run ``func`` ``repeat`` times after ``setup`` and return timing/memory stats."""
+    wall, cpu, rss_peak, rss_growth = [], [], [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        with RssSampler() as rss:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            func()
+            wall.append(time.perf_counter() - wall_start)
+            cpu.append(time.process_time() - cpu_start)
+        if rss.peak is not None:
+            rss_peak.append(rss.peak)
+        if rss.start_rss is not None:
+            rss_growth.append(rss.peak - rss.start_rss)
+    result = {
+        'wall_s': min(wall),
+        'wall_s_mean': float(np.mean(wall)),
+        'cpu_s': min(cpu),
+        'repeat': repeat,
+        'peak_rss_bytes': max(rss_peak) if rss_peak else None,
+        'rss_growth_bytes': max(rss_growth) if rss_growth else None,
+        'peak_alloc_bytes': None,
+    }
+    if trace_memory:
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_alloc_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def quiet(func):
+    """Wrap ``func`` so the report printing does not flood the benchmark output."""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def benchmark_cases(paths, output_dir, typed=False):
+    """``(name, func, setup)`` triples for every benchmarked method.
+
+    The processor is loaded once outside the timings; each method then starts
+    from dropped aggregates, derived columns, per-user indexes and memoized
+    insights.
+    """
+    def new_processor(lazy):
+        return SmartPayDataProcessor(**paths, typed=typed, lazy=lazy, cache=False)
+
+    holder = {}
+
+    def loaded():
+        if 'processor' not in holder:
+            holder['processor'] = quiet(lambda: new_processor(lazy=False))()
+            holder['insights'] = SmartPayInsightsGenerator(holder['processor'])
+        return holder['processor']
+
+    def cold():
+        loaded().invalidate_aggregates()
+        holder['insights'].invalidate()
+
+    def call(method, *args, **kwargs):
+        return lambda: getattr(loaded(), method)(*args, **kwargs)
+
+    def insight(method, *args):
+        return lambda: getattr(holder['insights'], method)(*args)
+
+    cases = [
+        ('processor.load_data', quiet(lambda: new_processor(lazy=True).load_data()), None),
+        ('processor.get_user_metrics', call('get_user_metrics'), cold),
+        ('processor.get_transaction_metrics', call('get_transaction_metrics'), cold),
+        ('processor.get_funnel_metrics', call('get_funnel_metrics'), cold),
+        ('processor.get_feature_engagement', call('get_feature_engagement'), cold),
+        ('processor.get_user_segmentation', call('get_user_segmentation'), cold),
+        ('processor.get_daily_volume', call('get_daily_volume'), cold),
+        ('processor.get_monthly_trends', call('get_monthly_trends'), cold),
+        ('processor.user_index', call('user_index'), cold),
+        ('processor.churn_risk', call('churn_risk'), cold),
+        ('processor.compute_metrics', call('compute_metrics'), cold),
+        ('processor.export_processed_data', quiet(call('export_processed_data', output_dir)), cold),
+        ('processor.generate_insights_report', quiet(call('generate_insights_report')), cold),
+        ('insights.analyze_user_behavior_patterns', insight('analyze_user_behavior_patterns'), cold),
+        ('insights.analyze_revenue_optimization', insight('analyze_revenue_optimization'), cold),
+        ('insights.analyze_churn_risk', insight('analyze_churn_risk'), cold),
+        ('insights.analyze_feature_performance', insight('analyze_feature_performance'), cold),
+        ('insights.generate_strategic_recommendations', insight('generate_strategic_recommendations'), cold),
+        ('insights.generate_executive_summary', quiet(insight('generate_executive_summary')), cold),
+        ('insights.export_insights_report',
+         quiet(insight('export_insights_report', os.path.join(output_dir, 'insights_report.txt'))), cold),
+    ]
+    return cases
+
+
+def run_scale(scale, data_dir, generator_params, repeat=3, trace_memory=True, methods=None, typed=False,
+              log=print):
+    """Generate (or reuse) the dataset for ``scale`` and benchmark every case on it."""
+    rows = scale_rows(scale)
+    params = {'users': max(1, rows // 10), 'transactions': rows, **generator_params}
+    paths = ensure_dataset(os.path.join(data_dir, f'{scale}'), **params)
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, func, setup in benchmark_cases(paths, output_dir, typed=typed):
+            if methods and not any(fnmatch.fnmatch(name, pattern) for pattern in methods):
+                continue
+            results[name] = measure(func, setup, repeat=repeat, trace_memory=trace_memory)
+            log(f"  {name:<48} {results[name]['wall_s']:>9.3f}s")
+    return {
+        'rows': {'users': params['users'], 'transactions': rows, 'activity': params['users']},
+        'results': results,
+    }
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(scales, data_dir, generator_params=None, repeat=3, trace_memory=True, methods=None, typed=False,
+              log=print):
+    """Benchmark each scale and return the JSON-serialisable results document."""
+    generator_params = dict(generator_params or {})
+    document = {
+        'suite_version': SUITE_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': environment(),
+        'settings': {'repeat': repeat, 'trace_memory': trace_memory, 'typed': typed,
+                     'generator': generator_params},
+        'scales': {},
+    }
+    for scale in scales:
+        log(f"⏱️  {scale} ({scale_rows(scale):,} transactions)")
+        document['scales'][scale] = run_scale(scale, data_dir, generator_params, repeat=repeat,
+                                              trace_memory=trace_memory, methods=methods, typed=typed, log=log)
+    return document
+
+
+def write_results(document, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(document, handle, indent=2)
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', default=['10k'],
+                        help=f"named scales ({', '.join(SCALES)}) or transaction row counts")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--methods', nargs='+', help='glob patterns, e.g. "processor.get_*"')
+    parser.add_argument('--data-dir', default=os.path.join(here, 'data'),
+                        help='where generated datasets are kept and reused')
+    parser.add_argument('--output', help='results JSON path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--no-trace-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--typed', action='store_true', help='use the typed ingest mode')
+    parser.add_argument('--feature-skew', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.15)
+    parser.add_argument('--abandon-rate', type=float, default=0.10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    generator_params = {'feature_skew': args.feature_skew, 'failure_rate': args.failure_rate,
+                        'abandon_rate': args.abandon_rate, 'seed': args.seed}
+    document = run_suite(args.scales, args.data_dir, generator_params, repeat=args.repeat,
+                         trace_memory=not args.no_trace_memory, methods=args.methods, typed=args.typed)
+    output = args.output or os.path.join(
+        here, 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    write_results(document, output)
+    print(f"✅ Benchmark results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
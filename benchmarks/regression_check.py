@@ -0,0 +1,157 @@
+"""
+SmartPay Analytics - Performance Regression Gate
+================================================
+
+Compares a benchmark run (see ``bench_suite.py``) with a stored baseline and
+fails when any method got slower, or allocated more, than the tolerance
+allows. It can compare two existing result files or run the suite on the
+baseline's scales first.
+
+A time regression needs both a relative slowdown above ``--tolerance`` and
+an absolute one above ``--min-delta``, so millisecond-scale methods do not
+flap on timer noise.
+
+Usage:
+    python benchmarks/regression_check.py BASELINE.json [CURRENT.json] [--tolerance 0.2]
+    python benchmarks/regression_check.py BASELINE.json --update   # run and store a new baseline
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.dirname(__file__))
+
+from config import config
+
+# Result fields compared, with the tolerance setting that applies to each.
+CHECKED_METRICS = {
+    'wall_s': 'time',
+    'peak_alloc_bytes': 'memory',
+}
+
+
+def load_results(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(baseline, current, time_tolerance=None, memory_tolerance=None, min_delta=None, methods=None):
+    """Compare two results documents.
+
+    Returns ``(regressions, skipped)``. Each regression is a dict naming the
+    scale, method, metric, baseline and current values and relative change.
+    ``skipped`` lists ``(scale, method)`` pairs in the baseline that the
+    current run does not have.
+    """
+    settings = config.PERFORMANCE_CONFIG
+    tolerances = {
+        'time': settings['benchmark_time_tolerance'] if time_tolerance is None else time_tolerance,
+        'memory': settings['benchmark_memory_tolerance'] if memory_tolerance is None else memory_tolerance,
+    }
+    if min_delta is None:
+        min_delta = settings['benchmark_min_delta']
+    regressions, skipped = [], []
+    for scale, baseline_run in baseline['scales'].items():
+        current_results = current['scales'].get(scale, {}).get('results', {})
+        for method, expected in baseline_run['results'].items():
+            if methods and not any(fnmatch.fnmatch(method, pattern) for pattern in methods):
+                continue
+            if method not in current_results:
+                skipped.append((scale, method))
+                continue
+            actual = current_results[method]
+            for metric, kind in CHECKED_METRICS.items():
+                before, after = expected.get(metric), actual.get(metric)
+                if before is None or after is None or before <= 0:
+                    continue
+                change = after / before - 1
+                if change <= tolerances[kind]:
+                    continue
+                if kind == 'time' and after - before <= min_delta:
+                    continue
+                regressions.append({
+                    'scale': scale, 'method': method, 'metric': metric,
+                    'baseline': before, 'current': after, 'change': change,
+                    'tolerance': tolerances[kind],
+                })
+    return regressions, skipped
+
+
+def environment_differences(baseline, current):
+    """Environment fields (versions, platform, CPUs) that differ between the runs."""
+    before, after = baseline.get('environment', {}), current.get('environment', {})
+    return {key: (before.get(key), after.get(key)) for key in sorted(set(before) | set(after))
+            if before.get(key) != after.get(key)}
+
+
+def format_report(regressions, skipped, differences=None):
+    lines = []
+    for key, (before, after) in (differences or {}).items():
+        lines.append(f"⚠️  Environment differs: {key} {before} -> {after}")
+    for scale, method in skipped:
+        lines.append(f"⚠️  Not in current run: {scale} {method}")
+    for regression in regressions:
+        unit = 's' if regression['metric'] == 'wall_s' else ' bytes'
+        lines.append(
+            f"❌ {regression['scale']} {regression['method']} {regression['metric']}: "
+            f"{regression['baseline']:,.4g}{unit} -> {regression['current']:,.4g}{unit} "
+            f"(+{regression['change']:.0%}, tolerance {regression['tolerance']:.0%})"
+        )
+    if not regressions:
+        lines.append("✅ No performance regressions")
+    return '\n'.join(lines)
+
+
+def run_current(baseline, data_dir, repeat=None, methods=None):
+    """Run the benchmark suite with the baseline's scales and settings."""
+    from bench_suite import run_suite
+
+    settings = baseline.get('settings', {})
+    return run_suite(
+        list(baseline['scales']), data_dir, settings.get('generator'),
+        repeat=repeat or settings.get('repeat', 3), trace_memory=settings.get('trace_memory', True),
+        methods=methods, typed=settings.get('typed', False),
+    )
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline', help='stored baseline results JSON')
+    parser.add_argument('current', nargs='?', help='results JSON to check (default: run the suite now)')
+    parser.add_argument('--tolerance', type=float, help='allowed relative slowdown (default from config)')
+    parser.add_argument('--memory-tolerance', type=float, help='allowed relative allocation growth')
+    parser.add_argument('--min-delta', type=float, help='ignore slowdowns smaller than this many seconds')
+    parser.add_argument('--methods', nargs='+', help='glob patterns, e.g. "processor.get_*"')
+    parser.add_argument('--repeat', type=int, help='repeats per method when running the suite')
+    parser.add_argument('--data-dir', default=os.path.join(here, 'data'))
+    parser.add_argument('--output', help='also write the current run to this path')
+    parser.add_argument('--update', action='store_true', help='run the suite and overwrite the baseline')
+    args = parser.parse_args()
+
+    from bench_suite import write_results
+
+    baseline = load_results(args.baseline)
+    if args.update:
+        write_results(run_current(baseline, args.data_dir, args.repeat, args.methods), args.baseline)
+        print(f"✅ Baseline updated: {args.baseline}")
+        return 0
+
+    if args.current:
+        current = load_results(args.current)
+    else:
+        current = run_current(baseline, args.data_dir, args.repeat, args.methods)
+    if args.output:
+        write_results(current, args.output)
+    regressions, skipped = compare(baseline, current, args.tolerance, args.memory_tolerance,
+                                   args.min_delta, args.methods)
+    print(format_report(regressions, skipped, environment_differences(baseline, current)))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+SmartPay Analytics - Synthetic Data Generator
+=============================================
+
+Writes users, transactions and app activity CSVs with the same columns and
+formats as ``smartpay_users.csv``, ``smartpay_transactions.csv`` and
+``smartpay_app_activity.csv``, at any size. Transactions are generated and
+written in chunks, so 100M-row files need memory for one chunk only.
+
+The output is deterministic for a given seed and chunk size. A
+``manifest.json`` beside the CSVs records the parameters, and
+``ensure_dataset`` reuses a directory whose manifest matches.
+
+Usage: python benchmarks/synthetic_data.py OUTPUT_DIR --transactions 1000000 [--users 100000]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ['Investments', 'QR Scan', 'Money Transfer', 'Top-up', 'Bill Payment']
+STATUSES = ['Success', 'Failed', 'Abandoned']
+
+FIRST_NAMES = ['Ana', 'Brian', 'Christine', 'David', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Julie',
+               'Kofi', 'Laura', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq']
+LAST_NAMES = ['Brown', 'Chen', 'Diaz', 'Evans', 'Garcia', 'Hughes', 'Ito', 'Khan', 'Lopez', 'Martin',
+              'Miller', 'Nguyen', 'Okafor', 'Peck', 'Ruiz', 'Smith', 'Taylor', 'Walker', 'Young', 'Zhou']
+PLACE_STEMS = ['Amber', 'Brook', 'Charles', 'Dale', 'East', 'Fair', 'Glen', 'Hazel', 'Iron', 'Johnston',
+               'Kenneth', 'Lake', 'Maple', 'North', 'Oak', 'Pine', 'Red', 'Silver', 'West', 'York']
+PLACE_SUFFIXES = ['burgh', 'chester', 'field', 'haven', 'mouth', 'port', 'side', 'stad', 'ton', 'ville']
+
+USERS_FILE = 'smartpay_users.csv'
+TRANSACTIONS_FILE = 'smartpay_transactions.csv'
+ACTIVITY_FILE = 'smartpay_app_activity.csv'
+MANIFEST_FILE = 'manifest.json'
+
+DEFAULTS = {
+    'users': 1000,
+    'transactions': 10000,
+    # Zipf exponent over FEATURES: 0 is uniform, larger values favour the first features.
+    'feature_skew': 0.0,
+    # Share of transactions that fail or are abandoned; failure_rate may map feature -> rate.
+    'failure_rate': 0.15,
+    'abandon_rate': 0.10,
+    'mean_amount': 50.0,
+    'end_date': '2025-07-05',
+    'history_days': 365,
+    'seed': 42,
+    'chunk_size': 1_000_000,
+}
+
+
+def feature_probabilities(skew):
+    """Feature mix for a Zipf exponent ``skew`` (0 gives a uniform mix)."""
+    weights = 1.0 / np.arange(1, len(FEATURES) + 1) ** skew
+    return weights / weights.sum()
+
+
+def _failure_rates(failure_rate):
+    if isinstance(failure_rate, dict):
+        unknown = set(failure_rate) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown features in failure_rate: {sorted(unknown)}")
+        return np.array([failure_rate.get(feature, DEFAULTS['failure_rate']) for feature in FEATURES])
+    return np.full(len(FEATURES), float(failure_rate))
+
+
+def _chunk_rng(seed, table, index):
+    return np.random.default_rng([seed, ['users', 'transactions', 'activity'].index(table), index])
+
+
+def _write_chunks(path, frames, date_format):
+    for i, frame in enumerate(frames):
+        frame.to_csv(path, mode='a' if i else 'w', header=(i == 0), index=False, date_format=date_format)
+
+
+def _user_chunks(params, end):
+    users, chunk_size = params['users'], params['chunk_size']
+    for index, start in enumerate(range(0, users, chunk_size)):
+        rng = _chunk_rng(params['seed'], 'users', index)
+        size = min(chunk_size, users - start)
+        first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), size)]
+        last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), size)]
+        place = (np.array(PLACE_STEMS, dtype=object)[rng.integers(0, len(PLACE_STEMS), size)]
+                 + np.array(PLACE_SUFFIXES, dtype=object)[rng.integers(0, len(PLACE_SUFFIXES), size)])
+        yield pd.DataFrame({
+            'user_id': np.arange(start + 1, start + size + 1),
+            'name': first + ' ' + last,
+            'age': rng.integers(18, 60, size),
+            'location': place,
+            # Users signed up over the two years before the end of the history.
+            'signup_date': end - pd.to_timedelta(rng.integers(0, 730, size), unit='D'),
+        })
+
+
+def _transaction_chunks(params, end):
+    total, chunk_size = params['transactions'], params['chunk_size']
+    probabilities = feature_probabilities(params['feature_skew'])
+    failure = _failure_rates(params['failure_rate'])
+    abandon = params['abandon_rate']
+    if np.any(failure + abandon > 1):
+        raise ValueError("failure_rate + abandon_rate must not exceed 1")
+    span_seconds = params['history_days'] * 86_400
+    start_time = end + pd.Timedelta(days=1) - pd.Timedelta(seconds=span_seconds)
+    features = np.array(FEATURES, dtype=object)
+    statuses = np.array(STATUSES, dtype=object)
+    for index, start in enumerate(range(0, total, chunk_size)):
+        rng = _chunk_rng(params['seed'], 'transactions', index)
+        size = min(chunk_size, total - start)
+        feature = rng.choice(len(FEATURES), size, p=probabilities)
+        draw = rng.random(size)
+        # 0 = Success, 1 = Failed, 2 = Abandoned, with per-feature failure rates.
+        status = np.where(draw < failure[feature], 1, np.where(draw < failure[feature] + abandon, 2, 0))
+        yield pd.DataFrame({
+            'transaction_id': np.arange(start + 1, start + size + 1),
+            'user_id': rng.integers(1, params['users'] + 1, size),
+            'feature': features[feature],
+            'amount': rng.exponential(params['mean_amount'], size).round(2),
+            'timestamp': start_time + pd.to_timedelta(rng.integers(0, span_seconds, size), unit='s'),
+            'status': statuses[status],
+        })
+
+
+def _activity_chunks(params, end):
+    users, chunk_size = params['users'], params['chunk_size']
+    for index, start in enumerate(range(0, users, chunk_size)):
+        rng = _chunk_rng(params['seed'], 'activity', index)
+        size = min(chunk_size, users - start)
+        yield pd.DataFrame({
+            'user_id': np.arange(start + 1, start + size + 1),
+            'app_open_count': rng.integers(10, 300, size),
+            'days_active_per_month': rng.integers(5, 30, size),
+            'last_transaction_date': end - pd.to_timedelta(rng.integers(0, 60, size), unit='D'),
+        })
+
+
+def dataset_paths(output_dir):
+    """``SmartPayDataProcessor`` keyword arguments for a generated dataset."""
+    return {
+        'users_file': os.path.join(output_dir, USERS_FILE),
+        'transactions_file': os.path.join(output_dir, TRANSACTIONS_FILE),
+        'activity_file': os.path.join(output_dir, ACTIVITY_FILE),
+    }
+
+
+def generate(output_dir, **params):
+    """Write the three CSVs (and ``manifest.json``) under ``output_dir``.
+
+    Keyword arguments override ``DEFAULTS``. Returns the dataset paths.
+    """
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise TypeError(f"Unknown generator parameters: {sorted(unknown)}")
+    params = {**DEFAULTS, **params}
+    if params['users'] < 1 or params['transactions'] < 0:
+        raise ValueError("users must be positive and transactions non-negative")
+    end = pd.Timestamp(params['end_date'])
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest):
+        # A partially rewritten directory must not be mistaken for a complete one.
+        os.remove(manifest)
+
+    paths = dataset_paths(output_dir)
+    _write_chunks(paths['users_file'], _user_chunks(params, end), '%Y-%m-%d')
+    _write_chunks(paths['transactions_file'], _transaction_chunks(params, end), '%Y-%m-%d %H:%M:%S')
+    _write_chunks(paths['activity_file'], _activity_chunks(params, end), '%Y-%m-%d')
+    with open(manifest, 'w') as handle:
+        json.dump(params, handle, indent=2, sort_keys=True)
+    return paths
+
+
+def ensure_dataset(output_dir, **params):
+    """Reuse ``output_dir`` if it was generated with the same parameters, else generate it."""
+    params = {**DEFAULTS, **params}
+    manifest = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(manifest):
+        with open(manifest) as handle:
+            if json.load(handle) == json.loads(json.dumps(params)):
+                return dataset_paths(output_dir)
+    return generate(output_dir, **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output_dir')
+    parser.add_argument('--users', type=int, help='default: one user per 10 transactions')
+    parser.add_argument('--transactions', type=int, default=DEFAULTS['transactions'])
+    parser.add_argument('--feature-skew', type=float, default=DEFAULTS['feature_skew'])
+    parser.add_argument('--failure-rate', type=float, default=DEFAULTS['failure_rate'])
+    parser.add_argument('--abandon-rate', type=float, default=DEFAULTS['abandon_rate'])
+    parser.add_argument('--seed', type=int, default=DEFAULTS['seed'])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULTS['chunk_size'])
+    args = parser.parse_args()
+
+    paths = generate(
+        args.output_dir, users=args.users or max(1, args.transactions // 10), transactions=args.transactions,
+        feature_skew=args.feature_skew, failure_rate=args.failure_rate, abandon_rate=args.abandon_rate,
+        seed=args.seed, chunk_size=args.chunk_size,
+    )
+    for path in paths.values():
+        print(f"✅ Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
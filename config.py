@@ -18,6 +18,7 @@ class Config:
     OUTPUT_DIR = PROJECT_ROOT / "output"
     LOG_DIR = PROJECT_ROOT / "logs"
     REPORTS_DIR = PROJECT_ROOT / "reports"
+    CACHE_DIR = Path(os.getenv('CACHE_DIR', str(PROJECT_ROOT / "cache")))
     
     # File paths
     USERS_FILE = DATA_DIR / "smartpay_users.csv"
@@ -53,7 +54,16 @@ class Config:
         'session_duration_threshold': int(os.getenv('SESSION_DURATION_THRESHOLD', '300')),
         'page_views_threshold': int(os.getenv('PAGE_VIEWS_THRESHOLD', '5'))
     }
-    
+
+    # Weight of each component in the per-user churn-risk score
+    CHURN_RISK_WEIGHTS = {
+        'recency': float(os.getenv('CHURN_WEIGHT_RECENCY', '0.35')),
+        'frequency': float(os.getenv('CHURN_WEIGHT_FREQUENCY', '0.2')),
+        'days_active': float(os.getenv('CHURN_WEIGHT_DAYS_ACTIVE', '0.15')),
+        'app_opens': float(os.getenv('CHURN_WEIGHT_APP_OPENS', '0.15')),
+        'failure_ratio': float(os.getenv('CHURN_WEIGHT_FAILURE_RATIO', '0.15'))
+    }
+
     # User segmentation settings
     SEGMENTATION_CONFIG = {
         'age_groups': {
@@ -107,7 +117,18 @@ class Config:
         'max_memory_usage': int(os.getenv('MAX_MEMORY_USAGE', '2048')),  # MB
         'processing_timeout': int(os.getenv('PROCESSING_TIMEOUT', '300')),  # seconds
         'batch_size': int(os.getenv('BATCH_SIZE', '1000')),
-        'enable_parallel_processing': os.getenv('ENABLE_PARALLEL_PROCESSING', 'True').lower() == 'true'
+        'enable_parallel_processing': os.getenv('ENABLE_PARALLEL_PROCESSING', 'True').lower() == 'true',
+        'snapshot_cache_max_size': int(os.getenv('SNAPSHOT_CACHE_MAX_SIZE', '1024')),  # MB
+        'distinct_counts': os.getenv('DISTINCT_COUNTS', 'exact'),  # exact or approx
+        'distinct_count_error': float(os.getenv('DISTINCT_COUNT_ERROR', '0.02')),  # relative
+        'quantiles': os.getenv('QUANTILES', 'exact'),  # exact or approx
+        'quantile_sketch_k': int(os.getenv('QUANTILE_SKETCH_K', '200')),
+        'instrumentation': os.getenv('INSTRUMENTATION', 'False').lower() == 'true',
+        'instrumentation_memory': os.getenv('INSTRUMENTATION_MEMORY', 'False').lower() == 'true',  # tracemalloc
+        'instrumentation_summary': os.getenv('INSTRUMENTATION_SUMMARY', 'True').lower() == 'true',
+        'benchmark_time_tolerance': float(os.getenv('BENCHMARK_TIME_TOLERANCE', '0.2')),  # relative
+        'benchmark_memory_tolerance': float(os.getenv('BENCHMARK_MEMORY_TOLERANCE', '0.1')),  # relative
+        'benchmark_min_delta': float(os.getenv('BENCHMARK_MIN_DELTA', '0.01'))  # seconds
     }
     
     # Security settings
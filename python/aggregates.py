@@ -0,0 +1,497 @@
+"""
+SmartPay Analytics - Transaction Aggregates
+==========================================
+
+Shared, lazily computed aggregates over a loaded transactions frame, and
+mergeable partial aggregates that are folded chunk by chunk over the
+transactions file so metrics can be computed with bounded memory.
+"""
+
+import threading
+import weakref
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from derived import DAY_NAMES, derived_features
+from sketches import DailyHyperLogLog, KLLSketch
+
+# Sentinel for "user never seen" in the per-user last-seen arrays (ns since epoch).
+NEVER_SEEN = np.iinfo(np.int64).min
+
+
+def _grow(array, size, fill, axis=-1):
+    """Pad an array along ``axis`` to at least ``size`` entries."""
+    current = array.shape[axis]
+    if current >= size:
+        return array
+    # Grow geometrically so repeated chunks with rising IDs stay amortised O(1).
+    new_size = max(size, current * 2)
+    pad = [(0, 0)] * array.ndim
+    pad[axis] = (0, new_size - current)
+    return np.pad(array, pad, constant_values=fill)
+
+
+def _timestamp_ns(value):
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+def feature_stats(transactions_df, success_mask=None):
+    """Per-feature transaction stats in one vectorized pass.
+
+    Features are reduced to integer codes (the categorical codes when the frame
+    was loaded typed) and every statistic is a ``bincount`` over those codes.
+    Returns one row per feature with ``transaction_count``, ``success_count``,
+    ``total_revenue`` (successful amount), ``success_rate`` and
+    ``avg_transaction_value``. Revenue is accumulated in float64 even when the
+    amounts are stored as float32.
+    """
+    if success_mask is None:
+        success_mask = (transactions_df['status'] == 'Success').to_numpy(dtype=bool)
+    feature = transactions_df['feature']
+    if isinstance(feature.dtype, pd.CategoricalDtype):
+        codes = feature.cat.codes.to_numpy()
+        names = feature.cat.categories
+    else:
+        codes, names = pd.factorize(feature, sort=True)
+    n_features = len(names)
+    # Rows with a missing feature have code -1 and are dropped, as in groupby.
+    present = codes >= 0
+    succeeded = present & success_mask
+    amount = transactions_df['amount'].to_numpy(dtype=np.float64)
+
+    transaction_count = np.bincount(codes[present], minlength=n_features)
+    success_count = np.bincount(codes[succeeded], minlength=n_features)
+    total_revenue = np.bincount(codes[succeeded], weights=amount[succeeded], minlength=n_features)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats = pd.DataFrame({
+            'transaction_count': transaction_count,
+            'success_count': success_count,
+            'total_revenue': total_revenue,
+            'success_rate': success_count / transaction_count * 100,
+            'avg_transaction_value': np.where(success_count > 0, total_revenue / success_count, np.nan)
+        }, index=pd.Index(names, name='feature'))
+    # Unused categories never show up, matching groupby(observed=True).
+    return stats[transaction_count > 0].sort_index()
+
+
+def funnel_from_counts(app_opens, feature_used, transaction_completed):
+    """Funnel stage counts and conversion rates from distinct-user counts."""
+    funnel = {}
+    funnel['app_opens'] = app_opens
+    funnel['feature_used'] = feature_used
+    funnel['app_to_feature_rate'] = (feature_used / app_opens) * 100 if app_opens else 0
+    transaction_started = feature_used
+    funnel['transaction_started'] = transaction_started
+    funnel['feature_to_transaction_rate'] = (transaction_started / feature_used) * 100 if feature_used else 0
+    funnel['transaction_completed'] = transaction_completed
+    funnel['transaction_success_rate'] = (transaction_completed / transaction_started) * 100 if transaction_started else 0
+    funnel['overall_conversion_rate'] = (transaction_completed / app_opens) * 100 if app_opens else 0
+    return funnel
+
+
+class FrameAggregates:
+    """Lazily computed aggregates shared by every consumer of one transactions frame.
+
+    Each aggregate is computed on first access and reused afterwards. Instances
+    are obtained through ``frame_aggregates`` so the processor and the insights
+    generator share the same cache for the same loaded frame.
+    """
+
+    def __init__(self, transactions_df):
+        # Weak reference: the cache must not keep a replaced frame alive.
+        self._df_ref = weakref.ref(transactions_df)
+        self._sketches = {}
+        self._revenue_sketches = {}
+
+    @property
+    def df(self):
+        return self._df_ref()
+
+    @cached_property
+    def success_mask(self):
+        return (self.df['status'] == 'Success').to_numpy(dtype=bool)
+
+    @cached_property
+    def successful(self):
+        return self.df[self.success_mask]
+
+    @cached_property
+    def success_count(self):
+        return int(self.success_mask.sum())
+
+    @cached_property
+    def total_revenue(self):
+        return self.successful['amount'].sum()
+
+    @cached_property
+    def unique_users(self):
+        return self.df['user_id'].nunique()
+
+    @cached_property
+    def completed_users(self):
+        return self.successful['user_id'].nunique()
+
+    def user_sketches(self, precision):
+        """Daily HyperLogLog sketches of (active, completing) users."""
+        if precision not in self._sketches:
+            user = self.df['user_id'].to_numpy(dtype=np.int64)
+            seen_ns = self.df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+            mask = self.success_mask
+            self._sketches[precision] = (
+                DailyHyperLogLog(precision).add(user, seen_ns),
+                DailyHyperLogLog(precision).add(user[mask], seen_ns[mask]),
+            )
+        return self._sketches[precision]
+
+    def revenue_sketch(self, k):
+        """KLL quantile sketch over per-user successful revenue."""
+        if k not in self._revenue_sketches:
+            self._revenue_sketches[k] = KLLSketch(k).update(self.user_revenue.to_numpy())
+        return self._revenue_sketches[k]
+
+    @cached_property
+    def time_sorted(self):
+        """The frame in timestamp order and its sorted timestamps (ns).
+
+        A frame that is already in order is used as is, without a copy.
+        """
+        seen_ns = self.df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        if np.all(seen_ns[1:] >= seen_ns[:-1]):
+            return self.df, seen_ns
+        order = np.argsort(seen_ns, kind='stable')
+        return self.df.take(order), seen_ns[order]
+
+    def window(self, start=None, end=None):
+        """Rows with ``start <= timestamp < end``, located by binary search.
+
+        Either bound may be None. The result is a positional slice of
+        ``time_sorted``, so no rows are copied.
+        """
+        frame, seen_ns = self.time_sorted
+        lo = 0 if start is None else np.searchsorted(seen_ns, _timestamp_ns(start), side='left')
+        hi = len(seen_ns) if end is None else np.searchsorted(seen_ns, _timestamp_ns(end), side='left')
+        return frame.iloc[lo:max(lo, hi)]
+
+    @cached_property
+    def user_revenue(self):
+        successful = self.successful
+        return successful['amount'].astype(np.float64).groupby(successful['user_id']).sum()
+
+    @cached_property
+    def user_transactions(self):
+        """Successful transactions per user, aligned with ``user_revenue``."""
+        return self.successful.groupby('user_id').size()
+
+    @cached_property
+    def feature_stats(self):
+        return feature_stats(self.df, self.success_mask)
+
+    @cached_property
+    def feature_revenue(self):
+        return self.feature_stats['total_revenue']
+
+    @cached_property
+    def feature_metrics(self):
+        return self.feature_stats[['transaction_count', 'total_revenue', 'success_rate']]
+
+    @cached_property
+    def hourly_usage(self):
+        hour = derived_features(self.df).hour
+        return self.df.groupby(['feature', hour], observed=True).size().unstack(fill_value=0)
+
+    @cached_property
+    def daily_usage(self):
+        day_name = derived_features(self.df).day_name
+        usage = self.df.groupby(['feature', day_name], observed=True).size().unstack(fill_value=0)
+        # Alphabetical weekday columns, as the streaming aggregates report them.
+        usage.columns = pd.Index(usage.columns.astype(str), name='day_of_week')
+        return usage.sort_index(axis=1)
+
+
+_frame_aggregates = {}
+_frame_aggregates_lock = threading.Lock()
+
+
+def frame_aggregates(transactions_df):
+    """Return the shared ``FrameAggregates`` for a transactions frame."""
+    key = id(transactions_df)
+    with _frame_aggregates_lock:
+        aggregates = _frame_aggregates.get(key)
+        if aggregates is None or aggregates.df is not transactions_df:
+            aggregates = FrameAggregates(transactions_df)
+            _frame_aggregates[key] = aggregates
+            weakref.finalize(transactions_df, _frame_aggregates.pop, key, None)
+    return aggregates
+
+
+def invalidate_frame_aggregates(transactions_df=None):
+    """Drop cached aggregates for one frame, or for every frame."""
+    if transactions_df is None:
+        _frame_aggregates.clear()
+    else:
+        _frame_aggregates.pop(id(transactions_df), None)
+
+
+class TransactionAggregates:
+    """Mergeable partial aggregates over a stream of transaction chunks.
+
+    Per-feature tallies are small arrays indexed by feature position. Per-user
+    state is held in dense arrays indexed by ``user_id`` (non-negative integer
+    IDs), which makes distinct-user counts exact and merges element-wise.
+
+    With ``sketch_precision`` set, daily HyperLogLog sketches of active and
+    completing users are kept alongside, for approximate distinct counts.
+    """
+
+    def __init__(self, sketch_precision=None):
+        self.rows = 0
+        self.features = []
+        self._feature_index = {}
+        self.tx_count = np.zeros(0, dtype=np.int64)
+        self.success_count = np.zeros(0, dtype=np.int64)
+        self.success_revenue = np.zeros(0, dtype=np.float64)
+        self.hourly = np.zeros((0, 24), dtype=np.int64)
+        self.daily = np.zeros((0, 7), dtype=np.int64)
+        self.user_last_seen = np.full((0, 0), NEVER_SEEN, dtype=np.int64)
+        self.user_tx_count = np.zeros(0, dtype=np.int64)
+        self.user_success_count = np.zeros(0, dtype=np.int64)
+        self.user_revenue = np.zeros(0, dtype=np.float64)
+        self.sketch_precision = sketch_precision
+        self.active_sketch = None
+        self.completed_sketch = None
+        if sketch_precision is not None:
+            self.active_sketch = DailyHyperLogLog(sketch_precision)
+            self.completed_sketch = DailyHyperLogLog(sketch_precision)
+
+    @classmethod
+    def from_frame(cls, transactions_df, sketch_precision=None):
+        aggregates = cls(sketch_precision)
+        aggregates.update(transactions_df)
+        return aggregates
+
+    @classmethod
+    def from_chunks(cls, chunks, sketch_precision=None):
+        aggregates = cls(sketch_precision)
+        for chunk in chunks:
+            aggregates.update(chunk)
+        return aggregates
+
+    @property
+    def n_users(self):
+        return len(self.user_tx_count)
+
+    def _ensure_features(self, names):
+        new = [name for name in names if name not in self._feature_index]
+        if not new:
+            return
+        for name in new:
+            self._feature_index[name] = len(self.features)
+            self.features.append(name)
+        extra = len(new)
+        self.tx_count = np.concatenate([self.tx_count, np.zeros(extra, dtype=np.int64)])
+        self.success_count = np.concatenate([self.success_count, np.zeros(extra, dtype=np.int64)])
+        self.success_revenue = np.concatenate([self.success_revenue, np.zeros(extra)])
+        self.hourly = np.vstack([self.hourly, np.zeros((extra, 24), dtype=np.int64)])
+        self.daily = np.vstack([self.daily, np.zeros((extra, 7), dtype=np.int64)])
+        self.user_last_seen = np.vstack([
+            self.user_last_seen,
+            np.full((extra, self.user_last_seen.shape[1]), NEVER_SEEN, dtype=np.int64)
+        ])
+
+    def _ensure_users(self, size):
+        if size <= self.n_users:
+            return
+        self.user_tx_count = _grow(self.user_tx_count, size, 0)
+        self.user_success_count = _grow(self.user_success_count, size, 0)
+        self.user_revenue = _grow(self.user_revenue, size, 0.0)
+        self.user_last_seen = _grow(self.user_last_seen, len(self.user_tx_count), NEVER_SEEN)
+
+    def update(self, chunk):
+        """Fold one chunk of transactions into the running aggregates.
+
+        Rows without a feature count toward the per-user totals but not the
+        per-feature arrays, as ``groupby('feature')`` drops them.
+        """
+        if len(chunk) == 0:
+            return self
+        codes, names = pd.factorize(chunk['feature'])
+        self._ensure_features(list(names))
+        lookup = np.array([self._feature_index[name] for name in names], dtype=np.int64)
+        # Rows with a missing feature have code -1, which would index the last feature.
+        present = codes >= 0
+        feature = lookup[codes[present]]
+        n_features = len(self.features)
+
+        success = (chunk['status'] == 'Success').to_numpy(dtype=bool)
+        amount = chunk['amount'].to_numpy(dtype=np.float64)
+        timestamp = chunk['timestamp']
+        hour = timestamp.dt.hour.to_numpy(dtype=np.int64)
+        weekday = timestamp.dt.dayofweek.to_numpy(dtype=np.int64)
+        seen_ns = timestamp.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        user = chunk['user_id'].to_numpy(dtype=np.int64)
+
+        succeeded = success[present]
+        self.tx_count += np.bincount(feature, minlength=n_features)
+        self.success_count += np.bincount(feature[succeeded], minlength=n_features)
+        self.success_revenue += np.bincount(feature[succeeded], weights=amount[present][succeeded],
+                                            minlength=n_features)
+        self.hourly += np.bincount(feature * 24 + hour[present], minlength=n_features * 24).reshape(n_features, 24)
+        self.daily += np.bincount(feature * 7 + weekday[present], minlength=n_features * 7).reshape(n_features, 7)
+
+        # Per-user updates touch only the IDs present in the chunk.
+        self._ensure_users(int(user.max()) + 1)
+        ids, counts = np.unique(user, return_counts=True)
+        self.user_tx_count[ids] += counts
+        ids, inverse = np.unique(user[success], return_inverse=True)
+        self.user_success_count[ids] += np.bincount(inverse, minlength=len(ids))
+        self.user_revenue[ids] += np.bincount(inverse, weights=amount[success], minlength=len(ids))
+        np.maximum.at(self.user_last_seen, (feature, user[present]), seen_ns[present])
+        if self.sketch_precision is not None:
+            self.active_sketch.add(user, seen_ns)
+            self.completed_sketch.add(user[success], seen_ns[success])
+
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        """Merge another partial aggregate into this one in place."""
+        if other.sketch_precision != self.sketch_precision:
+            raise ValueError("Cannot merge aggregates with different sketch precision")
+        self._ensure_features(other.features)
+        self._ensure_users(other.n_users)
+        position = np.array([self._feature_index[name] for name in other.features], dtype=np.int64)
+        n_users = other.n_users
+
+        self.rows += other.rows
+        self.tx_count[position] += other.tx_count
+        self.success_count[position] += other.success_count
+        self.success_revenue[position] += other.success_revenue
+        self.hourly[position] += other.hourly
+        self.daily[position] += other.daily
+        self.user_tx_count[:n_users] += other.user_tx_count
+        self.user_success_count[:n_users] += other.user_success_count
+        self.user_revenue[:n_users] += other.user_revenue
+        self.user_last_seen[position, :n_users] = np.maximum(
+            self.user_last_seen[position, :n_users], other.user_last_seen
+        )
+        if self.sketch_precision is not None:
+            self.active_sketch.merge(other.active_sketch)
+            self.completed_sketch.merge(other.completed_sketch)
+        return self
+
+    _ARRAYS = ['tx_count', 'success_count', 'success_revenue', 'hourly', 'daily',
+               'user_last_seen', 'user_tx_count', 'user_success_count', 'user_revenue']
+
+    def save(self, path):
+        """Persist the aggregates as an uncompressed ``.npz`` archive."""
+        arrays = {name: getattr(self, name) for name in self._ARRAYS}
+        if self.sketch_precision is not None:
+            arrays['sketch_precision'] = self.sketch_precision
+            for name in ('active', 'completed'):
+                sketch = getattr(self, name + '_sketch')
+                arrays[name + '_origin'] = sketch.origin
+                arrays[name + '_registers'] = sketch.registers
+        with open(path, 'wb') as handle:
+            np.savez(handle, rows=self.rows, features=np.array(self.features, dtype=str), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            precision = int(archive['sketch_precision']) if 'sketch_precision' in archive else None
+            aggregates = cls(precision)
+            if precision is not None:
+                for name in ('active', 'completed'):
+                    sketch = getattr(aggregates, name + '_sketch')
+                    sketch.origin = int(archive[name + '_origin'])
+                    sketch.registers = archive[name + '_registers']
+            aggregates.rows = int(archive['rows'])
+            aggregates.features = archive['features'].tolist()
+            aggregates._feature_index = {name: i for i, name in enumerate(aggregates.features)}
+            for name in cls._ARRAYS:
+                setattr(aggregates, name, archive[name])
+        return aggregates
+
+    def last_seen(self):
+        """Most recent transaction time per user (ns), across all features."""
+        if len(self.features) == 0:
+            return np.full(self.n_users, NEVER_SEEN, dtype=np.int64)
+        return self.user_last_seen.max(axis=0)
+
+    def distinct_users(self, since=None, approximate=False):
+        """Number of distinct users with a transaction (at or after ``since``).
+
+        ``approximate`` answers from the daily sketches, at day granularity.
+        """
+        if approximate:
+            return self.active_sketch.count(None if since is None else _timestamp_ns(since))
+        if since is None:
+            return int(np.count_nonzero(self.user_tx_count))
+        return int(np.count_nonzero(self.last_seen() >= _timestamp_ns(since)))
+
+    def user_revenue_series(self):
+        """Successful revenue per user, for users with at least one success."""
+        ids = np.flatnonzero(self.user_success_count)
+        return pd.Series(self.user_revenue[ids], index=pd.Index(ids, name='user_id'), name='amount')
+
+    def revenue_sketch(self, k, block_size=1 << 16):
+        """KLL quantile sketch over per-user revenue, fed block by block.
+
+        Users without a successful transaction are left out, as in
+        ``user_revenue_series``.
+        """
+        sketch = KLLSketch(k)
+        for start in range(0, self.n_users, block_size):
+            block = slice(start, start + block_size)
+            sketch.update(self.user_revenue[block][self.user_success_count[block] > 0])
+        return sketch
+
+    def user_transactions_series(self):
+        """Successful transactions per user, aligned with ``user_revenue_series``."""
+        ids = np.flatnonzero(self.user_success_count)
+        return pd.Series(self.user_success_count[ids], index=pd.Index(ids, name='user_id'))
+
+    def transaction_metrics(self):
+        # Overall totals come from the per-user arrays, which include rows without a feature.
+        total_tx = int(self.user_tx_count.sum())
+        successful_tx = int(self.user_success_count.sum())
+        metrics = {}
+        metrics['success_rate'] = (successful_tx / total_tx) * 100
+        metrics['total_revenue'] = float(self.user_revenue.sum())
+        metrics['avg_transaction_value'] = metrics['total_revenue'] / successful_tx if successful_tx else np.nan
+        metrics['arpu'] = metrics['total_revenue'] / self.distinct_users()
+        feature_metrics = pd.DataFrame({
+            'transaction_count': self.tx_count,
+            'total_revenue': self.success_revenue,
+            'success_rate': self.success_count / self.tx_count * 100
+        }, index=pd.Index(self.features, name='feature'))
+        metrics['feature_metrics'] = feature_metrics.sort_index()
+        return metrics
+
+    def completed_users(self, approximate=False):
+        """Number of distinct users with a successful transaction."""
+        if approximate:
+            return self.completed_sketch.count()
+        return int(np.count_nonzero(self.user_success_count))
+
+    def funnel_metrics(self, app_opens, approximate=False):
+        return funnel_from_counts(app_opens, self.distinct_users(approximate=approximate),
+                                  self.completed_users(approximate))
+
+    def feature_engagement(self, retention_since):
+        engagement = {}
+        index = pd.Index(self.features, name='feature')
+        hourly_usage = pd.DataFrame(self.hourly, index=index, columns=pd.Index(range(24), name='hour'))
+        engagement['hourly_usage'] = hourly_usage.loc[:, hourly_usage.any()].sort_index()
+        daily_usage = pd.DataFrame(self.daily, index=index, columns=pd.Index(DAY_NAMES, name='day_of_week'))
+        daily_usage = daily_usage.loc[:, daily_usage.any()]
+        engagement['daily_usage'] = daily_usage.sort_index().sort_index(axis=1)
+        cutoff = _timestamp_ns(retention_since)
+        total_users = np.count_nonzero(self.user_last_seen != NEVER_SEEN, axis=1)
+        retained_users = np.count_nonzero(self.user_last_seen >= cutoff, axis=1)
+        engagement['feature_retention'] = {
+            feature: (retained_users[i] / total_users[i]) * 100 if total_users[i] > 0 else 0
+            for i, feature in enumerate(self.features)
+        }
+        return engagement
@@ -0,0 +1,149 @@
+"""
+SmartPay Analytics - Churn-Risk Scores
+======================================
+
+A churn-risk score for every user, computed in one vectorized pass over the
+transactions and app activity. Each component is scaled to ``[0, 1]``, where
+higher means riskier:
+
+- ``recency``: days since the user's last transaction or recorded activity,
+  relative to ``INSIGHT_THRESHOLDS['churn_risk_days']``
+- ``frequency``: few transactions, on a log scale against the busiest user
+- ``days_active``: few of the month's days active (``days_active_per_month``)
+- ``app_opens``: few app opens, on a log scale against the most engaged user
+- ``failure_ratio``: the share of the user's transactions that did not succeed
+
+The score is their weighted mean (``Config.CHURN_RISK_WEIGHTS``). Scores and
+components are ``float32`` arrays indexed by ``user_id``, with NaN for IDs that
+are not users, so a lookup is one array read. ``top(k)`` finds the riskiest
+users with ``argpartition`` and sorts only those ``k``.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from aggregates import NEVER_SEEN
+from config import config
+
+COMPONENTS = ('recency', 'frequency', 'days_active', 'app_opens', 'failure_ratio')
+
+_NS_PER_DAY = 86_400 * 10**9
+_DAYS_PER_MONTH = 30
+
+
+def _scarcity(values):
+    """1 for none, 0 for the population maximum, on a log scale."""
+    ceiling = np.log1p(values.max(initial=0))
+    if ceiling == 0:
+        return np.ones(len(values))
+    return 1 - np.log1p(values) / ceiling
+
+
+class ChurnRiskScores:
+    """Per-user churn-risk scores and their components.
+
+    The population is every ``user_id`` in the transactions, the activity or
+    ``user_ids`` (e.g. the users table); user IDs are non-negative integers.
+    Where a user has several activity rows the latest one is used. Scores are
+    measured as of ``now`` (default: when they are built).
+    """
+
+    def __init__(self, transactions_df, activity_df, user_ids=None, now=None, weights=None):
+        self.now = pd.Timestamp(now if now is not None else datetime.now())
+        weights = dict(config.CHURN_RISK_WEIGHTS if weights is None else weights)
+        self.weights = {component: weights.get(component, 0.0) for component in COMPONENTS}
+
+        user = transactions_df['user_id'].to_numpy(dtype=np.int64)
+        activity = activity_df.sort_values('last_transaction_date', kind='stable', na_position='first')
+        activity_user = activity['user_id'].to_numpy(dtype=np.int64)
+        extra = np.asarray([] if user_ids is None else user_ids, dtype=np.int64)
+        size = int(max(user.max(initial=-1), activity_user.max(initial=-1), extra.max(initial=-1))) + 1
+
+        present = np.zeros(size, dtype=bool)
+        present[user] = True
+        present[activity_user] = True
+        present[extra] = True
+
+        count = np.bincount(user, minlength=size)
+        failed = (transactions_df['status'] != 'Success').to_numpy(dtype=bool)
+        failures = np.bincount(user[failed], minlength=size)
+
+        # Last sign of life: the later of the last transaction and the activity record.
+        last_seen = np.full(size, NEVER_SEEN, dtype=np.int64)
+        tx_time = transactions_df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        np.maximum.at(last_seen, user, tx_time)
+        last_activity = activity['last_transaction_date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        seen = last_activity != NEVER_SEEN
+        np.maximum.at(last_seen, activity_user[seen], last_activity[seen])
+
+        # Engagement from each user's latest activity row (later rows overwrite earlier ones).
+        days_active = np.zeros(size)
+        days_active[activity_user] = activity['days_active_per_month'].fillna(0).to_numpy(dtype=np.float64)
+        app_opens = np.zeros(size)
+        app_opens[activity_user] = activity['app_open_count'].fillna(0).to_numpy(dtype=np.float64)
+
+        days_inactive = np.full(size, np.inf)
+        known = last_seen != NEVER_SEEN
+        days_inactive[known] = (self.now.as_unit('ns').value - last_seen[known]) / _NS_PER_DAY
+        churn_days = config.INSIGHT_THRESHOLDS['churn_risk_days']
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            components = {
+                'recency': np.clip(days_inactive / churn_days, 0, 1),
+                'frequency': _scarcity(np.where(present, count, 0)),
+                'days_active': 1 - np.clip(days_active / _DAYS_PER_MONTH, 0, 1),
+                'app_opens': _scarcity(np.where(present, app_opens, 0)),
+                'failure_ratio': np.where(count > 0, failures / count, 0.0),
+            }
+        total_weight = sum(self.weights.values()) or 1.0
+        score = sum(self.weights[name] * values for name, values in components.items()) / total_weight
+
+        self.components = {name: np.where(present, values, np.nan).astype(np.float32)
+                           for name, values in components.items()}
+        self.scores = np.where(present, score, np.nan).astype(np.float32)
+        self.days_inactive = np.where(present, days_inactive, np.nan).astype(np.float32)
+
+    @property
+    def size(self):
+        return len(self.scores)
+
+    @property
+    def population(self):
+        return int(np.count_nonzero(~np.isnan(self.scores)))
+
+    def __contains__(self, user_id):
+        return 0 <= user_id < self.size and not np.isnan(self.scores[user_id])
+
+    def score(self, user_id):
+        """One user's churn-risk score; raises KeyError for unknown users."""
+        if user_id not in self:
+            raise KeyError(user_id)
+        return float(self.scores[user_id])
+
+    def to_series(self):
+        """Scores as a Series indexed by ``user_id``."""
+        user_ids = np.flatnonzero(~np.isnan(self.scores))
+        return pd.Series(self.scores[user_ids], index=pd.Index(user_ids, name='user_id'), name='churn_risk_score')
+
+    def top(self, k=10):
+        """The ``k`` riskiest users, riskiest first, with their score components.
+
+        Only the ``k`` users selected by ``argpartition`` are sorted; ties go
+        to the lower ``user_id``.
+        """
+        k = min(k, self.population)
+        columns = ['user_id', 'churn_risk_score', 'days_inactive', *COMPONENTS]
+        if k <= 0:
+            return pd.DataFrame(columns=columns)
+        risk = np.nan_to_num(self.scores, nan=-np.inf)
+        # The k-th highest score by partial selection; users tied at it are taken in user_id order.
+        cut = risk[np.argpartition(risk, self.size - k)[self.size - k]]
+        above = np.flatnonzero(risk > cut)
+        candidates = np.concatenate([above, np.flatnonzero(risk == cut)[:k - len(above)]])
+        user_ids = candidates[np.lexsort((candidates, -risk[candidates]))]
+        frame = {'user_id': user_ids, 'churn_risk_score': self.scores[user_ids],
+                 'days_inactive': self.days_inactive[user_ids]}
+        frame.update({name: self.components[name][user_ids] for name in COMPONENTS})
+        return pd.DataFrame(frame, columns=columns)
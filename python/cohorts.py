@@ -0,0 +1,195 @@
+"""
+SmartPay Analytics - Cohort Retention
+=====================================
+
+Signup-month x activity-month retention for the dashboard's retention
+visuals. A cell holds the distinct users of one signup cohort who transacted
+in one activity month, either in one feature or in any feature. All cells
+come from one sort of the ``(cohort, month, feature, user)`` keys of the
+transactions.
+
+The cells are persisted like the transaction cube. ``extend`` adds later
+transactions month by month. The users of the latest month are kept, so a
+partially covered month can be completed by the next batch without counting
+anyone twice.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Feature code of the cells counting users active in any feature.
+ALL_FEATURES = -1
+ALL_FEATURES_LABEL = 'All'
+
+_NO_MONTH = np.iinfo(np.int64).min
+
+
+def _months(values):
+    """Months since 1970-01 per timestamp; missing timestamps map to ``_NO_MONTH``."""
+    return np.asarray(values, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_label(months):
+    """``'YYYY-MM'`` labels for months since 1970-01."""
+    return np.asarray(months, dtype=np.int64).astype('datetime64[M]').astype(str)
+
+
+class CohortRetention:
+    """Distinct active users per (signup cohort, activity month, feature) cell.
+
+    ``cohort`` and ``month`` are months since 1970-01; ``feature`` is a
+    position in ``features``, or ``ALL_FEATURES``. Cohort sizes come from the
+    users table; transactions before a user's signup month, or by users not
+    in the table, are left out.
+    """
+
+    _ARRAYS = ['cohort', 'month', 'feature', 'users', 'cohort_months', 'cohort_sizes',
+               'open_cohort', 'open_feature', 'open_user']
+
+    def __init__(self):
+        self.features = []
+        self.cohort = np.zeros(0, dtype=np.int64)
+        self.month = np.zeros(0, dtype=np.int64)
+        self.feature = np.zeros(0, dtype=np.int64)
+        self.users = np.zeros(0, dtype=np.int64)
+        self.cohort_months = np.zeros(0, dtype=np.int64)
+        self.cohort_sizes = np.zeros(0, dtype=np.int64)
+        self.last_month = None
+        # Distinct (cohort, feature, user) active in last_month, so that month can be extended.
+        self.open_cohort = np.zeros(0, dtype=np.int64)
+        self.open_feature = np.zeros(0, dtype=np.int64)
+        self.open_user = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_frames(cls, users_df, transactions_df):
+        return cls().extend(users_df, transactions_df)
+
+    @property
+    def cells(self):
+        return len(self.users)
+
+    def _positions(self, names):
+        for name in names:
+            if name not in self.features:
+                self.features.append(name)
+        return np.array([self.features.index(name) for name in names], dtype=np.int64)
+
+    def extend(self, users_df, transactions_df):
+        """Add transactions from the latest covered month onwards.
+
+        ``users_df`` is the whole users table so far; cohort sizes are taken
+        from it. Raises ValueError for transactions before the latest covered
+        month, which would need a rebuild.
+        """
+        user_ids = users_df['user_id'].to_numpy(dtype=np.int64)
+        signup = _months(users_df['signup_date'])
+        signed_up = signup != _NO_MONTH
+        self.cohort_months, self.cohort_sizes = np.unique(signup[signed_up], return_counts=True)
+
+        if len(transactions_df) == 0:
+            return self
+        user = transactions_df['user_id'].to_numpy(dtype=np.int64)
+        month = _months(transactions_df['timestamp'])
+        if self.last_month is not None and month[month != _NO_MONTH].min(initial=self.last_month) < self.last_month:
+            raise ValueError(f"Transactions before {month_label([self.last_month])[0]} are already covered; "
+                             "rebuild the cohorts to include them")
+        size = int(max(user_ids.max(initial=-1), user.max(initial=-1))) + 1
+        user_cohort = np.full(size, _NO_MONTH, dtype=np.int64)
+        user_cohort[user_ids[signed_up]] = signup[signed_up]
+        feature_codes, feature_names = pd.factorize(transactions_df['feature'])
+        feature = self._positions(list(feature_names))[feature_codes]
+        cohort = user_cohort[user]
+        kept = (cohort != _NO_MONTH) & (month != _NO_MONTH) & (month >= cohort) & (feature_codes >= 0)
+        cohort, month, feature, user = cohort[kept], month[kept], feature[kept], user[kept]
+        if self.last_month is not None:
+            cohort = np.concatenate([self.open_cohort, cohort])
+            month = np.concatenate([np.full(len(self.open_cohort), self.last_month, dtype=np.int64), month])
+            feature = np.concatenate([self.open_feature, feature])
+            user = np.concatenate([self.open_user, user])
+        if len(user) == 0:
+            return self
+
+        # One sort of the (cohort, month, feature, user) keys gives every distinct active user.
+        first_cohort, first_month = cohort.min(), month.min()
+        n_months, n_features = int(month.max() - first_month) + 1, len(self.features)
+        n_users = int(user.max()) + 1
+        key = ((((cohort - first_cohort) * n_months + (month - first_month)) * n_features + feature) * n_users
+               + user)
+        key = np.unique(key)
+        user, cell = key % n_users, key // n_users
+        feature, period = cell % n_features, cell // n_features
+        month, cohort = period % n_months + first_month, period // n_months + first_cohort
+
+        feature_cells, feature_users = np.unique(cell, return_counts=True)
+        # The same users without the feature, for the any-feature cells.
+        all_cells, all_users = np.unique(np.unique(period * n_users + user) // n_users, return_counts=True)
+
+        cells = np.concatenate([feature_cells // n_features, all_cells])
+        replaced = self.month == self.last_month if self.last_month is not None else np.zeros(self.cells, bool)
+        self.cohort = np.concatenate([self.cohort[~replaced], cells // n_months + first_cohort])
+        self.month = np.concatenate([self.month[~replaced], cells % n_months + first_month])
+        self.feature = np.concatenate([self.feature[~replaced], feature_cells % n_features,
+                                       np.full(len(all_cells), ALL_FEATURES, dtype=np.int64)])
+        self.users = np.concatenate([self.users[~replaced], feature_users, all_users])
+
+        self.last_month = int(month.max())
+        latest = month == self.last_month
+        self.open_cohort, self.open_feature, self.open_user = cohort[latest], feature[latest], user[latest]
+        return self
+
+    def save(self, path):
+        """Persist the cells as an uncompressed ``.npz`` archive."""
+        with open(path, 'wb') as handle:
+            np.savez(handle, features=np.array(self.features, dtype=str),
+                     last_month=np.array([] if self.last_month is None else [self.last_month], dtype=np.int64),
+                     **{name: getattr(self, name) for name in self._ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        cohorts = cls()
+        with np.load(path, allow_pickle=False) as archive:
+            cohorts.features = archive['features'].tolist()
+            cohorts.last_month = int(archive['last_month'][0]) if len(archive['last_month']) else None
+            for name in cls._ARRAYS:
+                setattr(cohorts, name, archive[name])
+        return cohorts
+
+    def to_frame(self):
+        """One row per cell with cohort size and retention rate, for the retention visuals.
+
+        ``feature`` is ``'All'`` for users active in any feature, and
+        ``months_since_signup`` is 0 for the signup month itself.
+        """
+        sizes = self.cohort_sizes[np.searchsorted(self.cohort_months, self.cohort)]
+        labels = np.array(self.features + [ALL_FEATURES_LABEL], dtype=object)
+        frame = pd.DataFrame({
+            'cohort': month_label(self.cohort),
+            'activity_month': month_label(self.month),
+            'months_since_signup': self.month - self.cohort,
+            'feature': labels[self.feature],
+            'active_users': self.users,
+            'cohort_size': sizes,
+            'retention_rate': self.users / np.maximum(sizes, 1) * 100,
+        })
+        return frame.sort_values(['feature', 'cohort', 'months_since_signup'], ignore_index=True)
+
+    def matrix(self, feature=None, rates=True):
+        """Cohort x months-since-signup retention (%) or active users, for one feature or all.
+
+        Months after the latest covered month are NaN, giving the usual
+        triangle; observed months without activity are 0.
+        """
+        code = ALL_FEATURES if feature is None else self.features.index(feature)
+        selected = self.feature == code
+        cohort, months_since = self.cohort[selected], self.month[selected] - self.cohort[selected]
+        horizon = 0
+        if self.last_month is not None and len(self.cohort_months):
+            horizon = max(0, self.last_month - int(self.cohort_months[0]))
+        values = np.zeros((len(self.cohort_months), horizon + 1))
+        values[np.searchsorted(self.cohort_months, cohort), months_since] = self.users[selected]
+        if rates:
+            values = values / np.maximum(self.cohort_sizes, 1)[:, None] * 100
+        if self.last_month is not None:
+            values[self.cohort_months[:, None] + np.arange(horizon + 1) > self.last_month] = np.nan
+        return pd.DataFrame(values, index=pd.Index(month_label(self.cohort_months), name='cohort'),
+                            columns=pd.Index(range(horizon + 1), name='months_since_signup'))
@@ -0,0 +1,190 @@
+"""
+SmartPay Analytics - Transaction Cube
+=====================================
+
+Pre-aggregated transaction counts and amounts by date x hour x feature x
+status. The cube is built once per transactions file, persisted, and then
+answers the dashboard's hourly/weekday usage, daily volume and monthly trend
+queries in time proportional to the number of cells instead of the number of
+transactions.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+CUBE_VERSION = 1
+
+
+def cube_key(paths):
+    """Hash identifying the contents of the source files a cube was built from."""
+    identity = [CUBE_VERSION]
+    for path in paths:
+        stat = os.stat(path)
+        identity.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+
+class TransactionCube:
+    """Mergeable cube of ``count`` and ``amount`` per (day, hour, feature, status) cell.
+
+    Cells are held as parallel arrays; ``feature`` and ``status`` are positions
+    in the ``features``/``statuses`` lists, ``day`` is days since the epoch.
+    """
+
+    _ARRAYS = ['day', 'hour', 'feature', 'status', 'count', 'amount']
+
+    def __init__(self):
+        self.features = []
+        self.statuses = []
+        self.day = np.zeros(0, dtype=np.int64)
+        self.hour = np.zeros(0, dtype=np.int64)
+        self.feature = np.zeros(0, dtype=np.int64)
+        self.status = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.amount = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def from_frame(cls, transactions_df):
+        return cls().update(transactions_df)
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        cube = cls()
+        for chunk in chunks:
+            cube.update(chunk)
+        return cube
+
+    @property
+    def cells(self):
+        return len(self.count)
+
+    @property
+    def rows(self):
+        return int(self.count.sum())
+
+    @staticmethod
+    def _positions(names, known):
+        for name in names:
+            if name not in known:
+                known.append(name)
+        return np.array([known.index(name) for name in names], dtype=np.int64)
+
+    def update(self, chunk):
+        """Fold one chunk of transactions into the cube.
+
+        Rows without a feature, status or timestamp have no cell and are left
+        out, as in a groupby over those columns.
+        """
+        feature_codes, feature_names = pd.factorize(chunk['feature'])
+        status_codes, status_names = pd.factorize(chunk['status'])
+        kept = (feature_codes >= 0) & (status_codes >= 0) & chunk['timestamp'].notna().to_numpy()
+        if not kept.any():
+            return self
+        timestamp = chunk['timestamp'][kept]
+        self._reduce(
+            timestamp.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64),
+            timestamp.dt.hour.to_numpy(dtype=np.int64),
+            self._positions(list(feature_names), self.features)[feature_codes[kept]],
+            self._positions(list(status_names), self.statuses)[status_codes[kept]],
+            np.ones(int(kept.sum()), dtype=np.int64),
+            chunk['amount'].to_numpy(dtype=np.float64)[kept],
+        )
+        return self
+
+    def merge(self, other):
+        """Merge another cube into this one in place."""
+        if other.cells == 0:
+            return self
+        self._reduce(
+            other.day, other.hour,
+            self._positions(other.features, self.features)[other.feature],
+            self._positions(other.statuses, self.statuses)[other.status],
+            other.count, other.amount,
+        )
+        return self
+
+    def _reduce(self, day, hour, feature, status, count, amount):
+        """Combine existing cells with new (possibly repeated) cells."""
+        day = np.concatenate([self.day, day])
+        hour = np.concatenate([self.hour, hour])
+        feature = np.concatenate([self.feature, feature])
+        status = np.concatenate([self.status, status])
+        n_features, n_statuses = max(len(self.features), 1), max(len(self.statuses), 1)
+        first_day = day.min()
+        key = (((day - first_day) * 24 + hour) * n_features + feature) * n_statuses + status
+        keys, inverse = np.unique(key, return_inverse=True)
+        self.count = np.bincount(inverse, weights=np.concatenate([self.count, count]),
+                                 minlength=len(keys)).astype(np.int64)
+        self.amount = np.bincount(inverse, weights=np.concatenate([self.amount, amount]), minlength=len(keys))
+        self.status = keys % n_statuses
+        keys = keys // n_statuses
+        self.feature = keys % n_features
+        keys = keys // n_features
+        self.hour = keys % 24
+        self.day = keys // 24 + first_day
+
+    def save(self, path):
+        """Persist the cube as an uncompressed ``.npz`` archive."""
+        with open(path, 'wb') as handle:
+            np.savez(handle, features=np.array(self.features, dtype=str),
+                     statuses=np.array(self.statuses, dtype=str),
+                     **{name: getattr(self, name) for name in self._ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        cube = cls()
+        with np.load(path, allow_pickle=False) as archive:
+            cube.features = archive['features'].tolist()
+            cube.statuses = archive['statuses'].tolist()
+            for name in cls._ARRAYS:
+                setattr(cube, name, archive[name])
+        return cube
+
+    def to_frame(self):
+        """The cells as a DataFrame with ``date``, ``hour``, ``feature`` and ``status``."""
+        return pd.DataFrame({
+            'date': self.day.astype('datetime64[D]').astype('datetime64[s]'),
+            'hour': self.hour,
+            'feature': pd.Categorical.from_codes(self.feature, categories=self.features).astype(str),
+            'status': pd.Categorical.from_codes(self.status, categories=self.statuses).astype(str),
+            'count': self.count,
+            'amount': self.amount,
+        })
+
+    def _with_revenue(self):
+        cells = self.to_frame()
+        success = (cells['status'] == 'Success').to_numpy()
+        return cells.assign(revenue=np.where(success, cells['amount'], 0.0),
+                            successes=np.where(success, cells['count'], 0))
+
+    def hourly_usage(self):
+        """Transactions per feature and hour of day."""
+        cells = self.to_frame()
+        return cells.groupby(['feature', 'hour'], observed=True)['count'].sum().unstack(fill_value=0)
+
+    def daily_usage(self):
+        """Transactions per feature and day of the week."""
+        cells = self.to_frame()
+        day_of_week = cells['date'].dt.day_name().rename('day_of_week')
+        return cells.groupby(['feature', day_of_week], observed=True)['count'].sum().unstack(fill_value=0)
+
+    def daily_volume(self, since=None):
+        """Transaction count and successful revenue per calendar date."""
+        cells = self._with_revenue()
+        if since is not None:
+            cells = cells[cells['date'] >= pd.Timestamp(since).normalize()]
+        daily = cells.groupby('date').agg(transaction_count=('count', 'sum'), total_revenue=('revenue', 'sum'))
+        return daily.sort_index(ascending=False)
+
+    def monthly_trends(self):
+        """Transaction count, successful revenue and average value per month."""
+        cells = self._with_revenue()
+        month = cells['date'].dt.strftime('%Y-%m').rename('month')
+        monthly = cells.groupby(month).agg(transaction_count=('count', 'sum'), total_revenue=('revenue', 'sum'),
+                                           successes=('successes', 'sum'))
+        monthly['avg_transaction_value'] = monthly['total_revenue'] / monthly['successes']
+        return monthly.drop(columns='successes').sort_index(ascending=False)
@@ -8,40 +8,605 @@ This script loads, processes, and analyzes SmartPay mock data for use in dashboa
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import argparse
+import functools
+import importlib.util
+import itertools
 import os
+import shutil
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from config import config
+from cube import TransactionCube, cube_key
+from derived import derived_features, invalidate_derived_features
+from aggregates import TransactionAggregates, frame_aggregates, funnel_from_counts, invalidate_frame_aggregates
+from incremental import incremental_transaction_aggregates
+import instrumentation
+from instrumentation import instrumented
+from scheduler import MetricScheduler
+from sharding import byte_ranges, shard_files, sharded_transaction_aggregates
+from sketches import precision_for_error
+from snapshot_cache import SnapshotCache
+from churn_risk import ChurnRiskScores
+from cohorts import CohortRetention
+from user_index import UserIndex
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Declared schema per input file for the typed ingest mode: low-cardinality
+# strings become categoricals, IDs are downcast and dates are parsed by the
+# CSV reader itself instead of a second pd.to_datetime pass.
+TABLE_SCHEMAS = {
+    'users': {
+        'dtype': {
+            'user_id': 'int32',
+            'age': 'int16',
+            'location': 'category',
+        },
+        'dates': {'signup_date': '%Y-%m-%d'},
+    },
+    'transactions': {
+        'dtype': {
+            'transaction_id': 'uint32',
+            'user_id': 'int32',
+            'feature': 'category',
+            'amount': 'float32',
+            'status': 'category',
+        },
+        'dates': {'timestamp': '%Y-%m-%d %H:%M:%S'},
+    },
+    'activity': {
+        'dtype': {
+            'user_id': 'int32',
+            'app_open_count': 'int32',
+            'days_active_per_month': 'int16',
+        },
+        'dates': {'last_transaction_date': '%Y-%m-%d'},
+    },
+}
+
+# Bump whenever TABLE_SCHEMAS or the parsing in _read_table changes, so stale
+# snapshots in the on-disk cache are no longer matched.
+SCHEMA_VERSION = 1
+
+# Hive-style partition keys and row-group size for the Parquet transaction export.
+PARQUET_PARTITION_COLS = ['month', 'feature']
+PARQUET_ROW_GROUP_SIZE = 1_000_000
+# Rows buffered per partition before a row group is written, so streamed chunks
+# do not each become their own small row group.
+PARQUET_MIN_ROW_GROUP_SIZE = 128_000
+
+# Rows read with default dtypes to estimate the untyped bytes-per-row baseline.
+INGEST_SAMPLE_ROWS = 10000
+
+
+def resolve_csv_engine(engine=None):
+    """Pick the CSV parser backend, preferring pyarrow when it is installed."""
+    if engine in (None, 'auto'):
+        return 'pyarrow' if PYARROW_AVAILABLE else 'c'
+    if engine == 'pyarrow' and not PYARROW_AVAILABLE:
+        raise ImportError("engine='pyarrow' requires the pyarrow package")
+    return engine
+
+
+def read_typed_csv(path, table, engine=None, usecols=None, **kwargs):
+    """Read one of the SmartPay CSV files using its declared schema.
+
+    ``usecols`` restricts the read to a subset of columns (column projection).
+    """
+    schema = TABLE_SCHEMAS[table]
+    engine = resolve_csv_engine(engine)
+    dtype = schema['dtype']
+    dates = schema['dates']
+    if usecols is not None:
+        dtype = {column: kind for column, kind in dtype.items() if column in usecols}
+        dates = {column: fmt for column, fmt in dates.items() if column in usecols}
+    read_kwargs = {
+        'dtype': dtype,
+        'parse_dates': list(dates),
+        'engine': engine,
+        'usecols': usecols,
+    }
+    if engine != 'pyarrow' and dates:
+        # The pyarrow reader infers ISO timestamps natively and rejects date_format.
+        read_kwargs['date_format'] = dates
+    read_kwargs.update(kwargs)
+    return pd.read_csv(path, **read_kwargs)
+
+
+def read_transaction_chunks(source, typed=False, chunk_size=None, names=None):
+    """Read a transactions CSV (path or open handle) in chunks of ``chunk_size`` rows.
+
+    Pass the column ``names`` when ``source`` starts after the header line.
+    """
+    chunk_size = chunk_size or config.CHUNK_SIZE
+    header_kwargs = {} if names is None else {'header': None, 'names': names}
+    if typed:
+        # The pyarrow reader has no chunked mode; the C reader streams.
+        return read_typed_csv(source, 'transactions', engine='c', chunksize=chunk_size, **header_kwargs)
+    return pd.read_csv(source, parse_dates=['timestamp'], chunksize=chunk_size, **header_kwargs)
+
+
+def bytes_per_row(df):
+    """Deep in-memory size of a frame divided by its row count."""
+    if len(df) == 0:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / len(df)
+
+
+VALUE_SEGMENT_QUANTILES = [0.5, 0.8, 0.95]
+VALUE_SEGMENT_LABELS = ['Minimal Value', 'Low Value', 'Medium Value', 'High Value']
+
+
+def segment_by_quantiles(revenue, quantiles=VALUE_SEGMENT_QUANTILES, labels=VALUE_SEGMENT_LABELS, edges=None):
+    """Bin per-user revenue at its quantile edges into categorical labels.
+
+    A user lands in the highest bin whose lower edge they reach, so with the
+    default edges revenue >= p95 is 'High Value' and revenue < p50 is
+    'Minimal Value'. Precomputed ``edges`` (e.g. from a sketch) skip the
+    exact quantile computation.
+    """
+    if edges is None:
+        edges = revenue.quantile(quantiles).to_numpy()
+    codes = np.searchsorted(edges, revenue.to_numpy(), side='right')
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels),
+                     index=revenue.index, name='value_segment')
+
+
+def segment_by_tiers(revenue, transactions, tiers=None):
+    """Assign each user the highest configured value tier they qualify for.
+
+    ``tiers`` maps tier name to ``min_revenue``/``min_transactions`` thresholds,
+    ordered from highest to lowest as in ``SEGMENTATION_CONFIG['value_tiers']``.
+    Users below every tier get a missing label.
+    """
+    if tiers is None:
+        tiers = config.SEGMENTATION_CONFIG['value_tiers']
+    revenue_values = revenue.to_numpy()
+    transaction_values = transactions.reindex(revenue.index, fill_value=0).to_numpy()
+    codes = np.full(len(revenue_values), -1, dtype=np.int8)
+    # Walk from the lowest tier up so higher tiers overwrite lower ones.
+    for code in range(len(tiers) - 1, -1, -1):
+        thresholds = list(tiers.values())[code]
+        qualifies = ((revenue_values >= thresholds['min_revenue']) &
+                     (transaction_values >= thresholds['min_transactions']))
+        codes[qualifies] = code
+    labels = [name.title() for name in tiers]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=labels),
+                     index=revenue.index, name='value_segment')
+
+
+def loaded_rows(*tables):
+    """``rows`` callback for ``@instrumented``: rows held for ``tables`` after the call."""
+    def rows(processor, result):
+        total = 0
+        for table in tables:
+            frame = processor._frames.get(table)
+            if frame is not None:
+                total += len(frame)
+            elif table == 'transactions' and processor._stream_aggregates is not None:
+                total += processor._stream_aggregates.rows
+        return total
+    return rows
+
 
 class SmartPayDataProcessor:
-    def __init__(self, users_file, transactions_file, activity_file):
+    def __init__(self, users_file, transactions_file, activity_file, typed=False, engine=None,
+                 streaming=False, chunk_size=None, state_dir=None, cache=None, lazy=True,
+                 shards=None, distinct=None, quantiles=None):
+        for path in (users_file, transactions_file, activity_file):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Data file not found: {path}")
         self.users_file = users_file
         self.transactions_file = transactions_file
         self.activity_file = activity_file
-        self.users_df = None
-        self.transactions_df = None
-        self.activity_df = None
-        self.load_data()
+        self.typed = typed
+        self.engine = engine
+        # Streaming mode never materialises transactions_df; transaction metrics are
+        # folded chunk by chunk into mergeable aggregates instead.
+        # With a state_dir, streaming runs only read rows appended since the last run.
+        self.state_dir = state_dir
+        # Sharded runs fold shards in worker processes: transactions_file is either
+        # a directory of shard CSVs or one CSV split into `shards` byte ranges.
+        self.shards = shards
+        self.sharded = shards is not None or os.path.isdir(transactions_file)
+        if self.sharded and state_dir is not None:
+            raise ValueError("Sharded and incremental processing cannot be combined")
+        self.streaming = streaming or state_dir is not None or self.sharded
+        # 'approx' serves MAU/DAU and funnel distinct-user counts from mergeable
+        # HyperLogLog sketches instead of exact per-user state.
+        self.distinct = distinct or config.PERFORMANCE_CONFIG['distinct_counts']
+        if self.distinct not in ('exact', 'approx'):
+            raise ValueError(f"Unknown distinct count mode: {self.distinct}")
+        self.sketch_precision = None
+        if self.distinct == 'approx':
+            self.sketch_precision = precision_for_error(config.PERFORMANCE_CONFIG['distinct_count_error'])
+        # 'approx' reads revenue percentiles from a KLL sketch instead of sorting every user.
+        self.quantiles = quantiles or config.PERFORMANCE_CONFIG['quantiles']
+        if self.quantiles not in ('exact', 'approx'):
+            raise ValueError(f"Unknown quantile mode: {self.quantiles}")
+        self.chunk_size = chunk_size or config.CHUNK_SIZE
+        self.incremental_report = None
+        # Parsed frames are snapshotted to disk when caching is on (and pyarrow is available).
+        if cache is None:
+            cache = config.CACHE_RESULTS
+        self.cache = cache
+        self.snapshot_cache = None
+        if cache and PYARROW_AVAILABLE:
+            self.snapshot_cache = SnapshotCache(
+                config.CACHE_DIR, config.PERFORMANCE_CONFIG['snapshot_cache_max_size'] * 1024 * 1024
+            )
+        # Frames are loaded per table on first access. Metric methods ask _table()
+        # for just the columns they use; the *_df attributes return whole tables.
+        self._frames = {}
+        self._complete_tables = set()
+        self._load_lock = threading.RLock()
+        # Tables assigned directly rather than read from their source file.
+        self._assigned_tables = set()
+        self._cube = None
+        self._cohorts = None
+        self._user_summary = None
+        self._user_index = None
+        self._churn_risk = None
+        self.ingest_report = {}
+        self.data_version = 0
+        self._stream_aggregates = None
+        if lazy:
+            self.data_version += 1
+        else:
+            self.load_data()
+
+    @property
+    def users_df(self):
+        return self._table('users')
+
+    @users_df.setter
+    def users_df(self, df):
+        self._set_table('users', df)
+
+    @property
+    def transactions_df(self):
+        return self._table('transactions')
+
+    @transactions_df.setter
+    def transactions_df(self, df):
+        self._set_table('transactions', df)
+
+    @property
+    def activity_df(self):
+        return self._table('activity')
+
+    @activity_df.setter
+    def activity_df(self, df):
+        self._set_table('activity', df)
+
+    def _source(self, table):
+        return {
+            'users': self.users_file,
+            'transactions': self.transactions_file,
+            'activity': self.activity_file,
+        }[table]
+
+    def _set_table(self, table, df):
+        self.invalidate_aggregates()
+        self._frames[table] = df
+        self._complete_tables.add(table)
+        self._assigned_tables.add(table)
+
+    def _table(self, table, columns=None):
+        """The frame for ``table``, loading it (or just ``columns``) on first use.
+
+        With ``columns`` only the missing ones are read from the CSV and attached
+        to the already loaded frame, so narrow metrics parse a fraction of the
+        file. Without ``columns`` the whole table is completed. In streaming mode
+        transactions are never materialised and None is returned.
+        """
+        if table == 'transactions' and self.streaming:
+            return None
+        with self._load_lock:
+            return self._load_table(table, columns)
 
+    def _load_table(self, table, columns):
+        frame = self._frames.get(table)
+        if table in self._complete_tables:
+            return frame
+        path = self._source(table)
+        if columns is None:
+            if frame is None:
+                frame = self._read_table(table, path)
+            else:
+                header = list(pd.read_csv(path, nrows=0).columns)
+                missing = [column for column in header if column not in frame.columns]
+                if missing:
+                    frame = pd.concat([frame, self._read_table(table, path, missing)], axis=1)
+                frame = frame[header]
+            self._frames[table] = frame
+            self._complete_tables.add(table)
+            return frame
+        if frame is None:
+            frame = self._frames[table] = self._read_table(table, path, list(columns))
+            return frame
+        missing = [column for column in columns if column not in frame.columns]
+        if missing:
+            extra = self._read_table(table, path, missing)
+            for column in missing:
+                frame[column] = extra[column].set_axis(frame.index)
+            # Cached sub-frames (e.g. the successful rows) lack the new columns.
+            invalidate_frame_aggregates(frame)
+        return frame
+
+    @instrumented(rows=loaded_rows('users', 'transactions', 'activity'))
     def load_data(self):
-        self.users_df = pd.read_csv(self.users_file)
-        self.transactions_df = pd.read_csv(self.transactions_file)
-        self.activity_df = pd.read_csv(self.activity_file)
-        self.users_df['signup_date'] = pd.to_datetime(self.users_df['signup_date'])
-        self.transactions_df['timestamp'] = pd.to_datetime(self.transactions_df['timestamp'])
-        self.activity_df['last_transaction_date'] = pd.to_datetime(self.activity_df['last_transaction_date'])
+        """(Re)load all tables eagerly, dropping any cached frames and aggregates."""
+        self.invalidate_aggregates()
+        self.ingest_report = {}
+        self._frames = {}
+        self._complete_tables = set()
+        for table in ('users', 'transactions', 'activity'):
+            self._table(table)
+        for table, report in self.ingest_report.items():
+            print(f"   {table}: {report['rows']:,} rows, "
+                  f"{report['bytes_per_row_before']:.1f} -> {report['bytes_per_row_after']:.1f} bytes/row "
+                  f"({report['engine']} engine)")
         print("✅ Data loaded successfully!")
 
+    @instrumented(rows=lambda processor, df: len(df))
+    def _read_table(self, table, path, columns=None):
+        parse_spec = {
+            'version': SCHEMA_VERSION,
+            'table': table,
+            'schema': TABLE_SCHEMAS[table] if self.typed else None,
+            'columns': columns,
+        }
+        if self.snapshot_cache is not None:
+            df = self.snapshot_cache.get(path, parse_spec)
+            if df is not None:
+                return df
+        if self.typed:
+            df = read_typed_csv(path, table, engine=self.engine, usecols=columns)
+            self.ingest_report[table] = self._ingest_report(table, path, df)
+        else:
+            df = pd.read_csv(path, usecols=columns)
+            for column in TABLE_SCHEMAS[table]['dates']:
+                if column in df.columns:
+                    df[column] = pd.to_datetime(df[column])
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.put(path, parse_spec, df)
+        return df
+
+    def _ingest_report(self, table, path, df):
+        # Baseline: the same file read the old way, on a bounded sample.
+        untyped_sample = pd.read_csv(path, nrows=INGEST_SAMPLE_ROWS, usecols=list(df.columns))
+        for column in TABLE_SCHEMAS[table]['dates']:
+            if column in untyped_sample.columns:
+                untyped_sample[column] = pd.to_datetime(untyped_sample[column])
+        return {
+            'rows': len(df),
+            'engine': resolve_csv_engine(self.engine),
+            'bytes_per_row_before': bytes_per_row(untyped_sample),
+            'bytes_per_row_after': bytes_per_row(df),
+        }
+
+    def iter_transaction_chunks(self, chunk_size=None, source=None, names=None):
+        """Read transactions in chunks of ``chunk_size`` rows.
+
+        ``source`` defaults to the transactions file; pass an open handle and the
+        column ``names`` to read from the middle of the file.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        if source is None and os.path.isdir(self.transactions_file):
+            return itertools.chain.from_iterable(
+                read_transaction_chunks(path, self.typed, chunk_size)
+                for path in shard_files(self.transactions_file)
+            )
+        source = self.transactions_file if source is None else source
+        return read_transaction_chunks(source, self.typed, chunk_size, names)
+
+    def stream_transaction_aggregates(self, chunk_size=None):
+        """Fold the transactions file into aggregates without loading it whole."""
+        return TransactionAggregates.from_chunks(self.iter_transaction_chunks(chunk_size), self.sketch_precision)
+
+    def sharded_transaction_aggregates(self, max_workers=None):
+        """Fold transaction shards in worker processes and merge the results."""
+        if os.path.isdir(self.transactions_file):
+            shards = shard_files(self.transactions_file)
+        else:
+            shards = byte_ranges(self.transactions_file, self.shards or config.MAX_WORKERS)
+        read_chunks = functools.partial(read_transaction_chunks, typed=self.typed, chunk_size=self.chunk_size)
+        return sharded_transaction_aggregates(shards, read_chunks, max_workers or config.MAX_WORKERS,
+                                              self.sketch_precision)
+
+    @instrumented(rows=loaded_rows('transactions'))
+    def transaction_aggregates(self):
+        if self._stream_aggregates is None:
+            if self.sharded:
+                self._stream_aggregates = self.sharded_transaction_aggregates()
+            elif self.state_dir is not None:
+                self._stream_aggregates, self._cube, self.incremental_report = incremental_transaction_aggregates(
+                    self.transactions_file, self.state_dir,
+                    lambda handle, names: self.iter_transaction_chunks(source=handle, names=names),
+                    self.sketch_precision
+                )
+            else:
+                self._stream_aggregates = self.stream_transaction_aggregates()
+        return self._stream_aggregates
+
+    @instrumented(rows=lambda processor, cube: cube.rows)
+    def transaction_cube(self):
+        """The date x hour x feature x status cube of the transactions.
+
+        Built once per processor; with caching on it is also persisted under
+        ``CACHE_DIR``, keyed on the transactions file, and reused by later runs.
+        Incremental processors keep it with their state and only fold in
+        appended rows.
+        """
+        if self._cube is None and self.state_dir is not None and not self.sharded:
+            self.transaction_aggregates()
+        if self._cube is None:
+            path = None
+            if self.cache and 'transactions' not in self._assigned_tables:
+                sources = (shard_files(self.transactions_file) if os.path.isdir(self.transactions_file)
+                           else [self.transactions_file])
+                path = os.path.join(str(config.CACHE_DIR), f'cube-{cube_key(sources)}.npz')
+            if path is not None and os.path.exists(path):
+                self._cube = TransactionCube.load(path)
+                return self._cube
+            if self.streaming:
+                cube = TransactionCube.from_chunks(self.iter_transaction_chunks())
+            else:
+                cube = TransactionCube.from_frame(
+                    self._table('transactions', ['feature', 'amount', 'timestamp', 'status']))
+            if path is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                cube.save(path + '.tmp')
+                os.replace(path + '.tmp', path)
+            self._cube = cube
+        return self._cube
+
+    @instrumented(rows=loaded_rows('transactions'))
+    def cohort_retention(self):
+        """Signup-month x activity-month ``CohortRetention`` cells, overall and per feature.
+
+        Built once per processor; with caching on it is also persisted under
+        ``CACHE_DIR``, keyed on the users and transactions files.
+        """
+        if self.streaming:
+            raise ValueError("Cohort retention needs the transactions in memory and is unavailable in streaming mode")
+        if self._cohorts is None:
+            path = None
+            if self.cache and not self._assigned_tables & {'users', 'transactions'}:
+                sources = [self.users_file] + (shard_files(self.transactions_file)
+                                               if os.path.isdir(self.transactions_file) else [self.transactions_file])
+                path = os.path.join(str(config.CACHE_DIR), f'cohorts-{cube_key(sources)}.npz')
+            if path is not None and os.path.exists(path):
+                self._cohorts = CohortRetention.load(path)
+                return self._cohorts
+            cohorts = CohortRetention.from_frames(self._table('users', ['user_id', 'signup_date']),
+                                                  self._table('transactions', ['user_id', 'feature', 'timestamp']))
+            if path is not None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                cohorts.save(path + '.tmp')
+                os.replace(path + '.tmp', path)
+            self._cohorts = cohorts
+        return self._cohorts
+
+    def get_cohort_retention(self, feature=None, rates=True):
+        """Cohort x months-since-signup retention (%), or active users, overall or for one feature."""
+        return self.cohort_retention().matrix(feature, rates)
+
+    def window(self, start=None, end=None, columns=None):
+        """Transactions with ``start <= timestamp < end`` (either bound optional).
+
+        The window is found by binary search over a timestamp-sorted view that
+        is built once per loaded frame, and returned as a zero-copy slice.
+        ``columns`` limits which transaction columns need loading.
+        """
+        if self.streaming:
+            raise ValueError("window() needs the transactions in memory and is unavailable in streaming mode")
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ['timestamp']))
+        return self.aggregates(columns).window(start, end)
+
+    def user_summary(self):
+        """Users left-joined with their activity, one row per user (built once)."""
+        if self._user_summary is None:
+            self._user_summary = self.users_df.merge(self.activity_df, on='user_id', how='left')
+        return self._user_summary
+
+    @instrumented(rows=loaded_rows('transactions'))
+    def user_index(self):
+        """The per-user ``UserIndex``, built on first use."""
+        if self.streaming:
+            raise ValueError("The user index needs the transactions in memory and is unavailable in streaming mode")
+        if self._user_index is None:
+            segments = self.get_user_segmentation()['user_value_segments']
+            self._user_index = UserIndex(self.transactions_df, self.user_summary(), segments)
+        return self._user_index
+
+    def get_user_profile(self, user_id):
+        """One user's attributes, revenue, per-feature transactions, last activity and segment.
+
+        Raises KeyError for unknown users.
+        """
+        return self.user_index().profile(user_id)
+
+    @instrumented(rows=loaded_rows('transactions'))
+    def churn_risk(self, now=None):
+        """Per-user ``ChurnRiskScores`` over every user.
+
+        Scores as of now are built once per data load; pass ``now`` to score
+        as of another time without touching the cached scores.
+        """
+        if self.streaming:
+            raise ValueError("Churn-risk scores need the transactions in memory and are unavailable in streaming mode")
+        if now is not None:
+            return self._score_churn_risk(now)
+        if self._churn_risk is None:
+            self._churn_risk = self._score_churn_risk()
+        return self._churn_risk
+
+    def _score_churn_risk(self, now=None):
+        transactions = self._table('transactions', ['user_id', 'status', 'timestamp'])
+        users = self._table('users', ['user_id'])
+        return ChurnRiskScores(transactions, self.activity_df, users['user_id'].to_numpy(), now=now)
+
+    def get_riskiest_users(self, k=10):
+        """The ``k`` users most likely to churn, riskiest first, with their score components."""
+        return self.churn_risk().top(k)
+
+    def aggregates(self, columns=None):
+        """Shared lazily computed aggregates for the loaded transactions.
+
+        ``columns`` lists the transaction columns the caller's aggregates need;
+        by default the whole table is loaded.
+        """
+        return frame_aggregates(self._table('transactions', columns))
+
+    def invalidate_aggregates(self):
+        """Forget cached aggregates, e.g. after editing the frames in place.
+
+        Bumps ``data_version`` so results memoized against it are recomputed too.
+        """
+        self.data_version += 1
+        self._stream_aggregates = None
+        self._cube = None
+        self._cohorts = None
+        self._user_summary = None
+        self._user_index = None
+        self._churn_risk = None
+        for frame in self._frames.values():
+            invalidate_derived_features(frame)
+        if self._frames.get('transactions') is not None:
+            invalidate_frame_aggregates(self._frames['transactions'])
+
+    @instrumented(rows=loaded_rows('users', 'transactions', 'activity'))
     def get_user_metrics(self):
         metrics = {}
-        metrics['total_users'] = len(self.users_df)
+        users = self._table('users', ['signup_date'])
+        activity = self._table('activity', ['last_transaction_date'])
+        metrics['total_users'] = len(users)
         three_months_ago = datetime.now() - timedelta(days=90)
-        recent_tx = self.transactions_df[self.transactions_df['timestamp'] >= three_months_ago]
-        metrics['mau_last_3_months'] = recent_tx['user_id'].nunique()
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_tx_30d = self.transactions_df[self.transactions_df['timestamp'] >= thirty_days_ago]
-        metrics['dau_last_30_days'] = recent_tx_30d['user_id'].nunique()
-        churned = self.activity_df[self.activity_df['last_transaction_date'] < thirty_days_ago]
-        metrics['churn_rate'] = (len(churned) / len(self.activity_df)) * 100
-        self.users_df['signup_month'] = self.users_df['signup_date'].dt.to_period('M')
-        monthly_signups = self.users_df.groupby('signup_month').size()
+        approximate = self.sketch_precision is not None
+        if self.streaming:
+            aggregates = self.transaction_aggregates()
+            metrics['mau_last_3_months'] = aggregates.distinct_users(three_months_ago, approximate)
+            metrics['dau_last_30_days'] = aggregates.distinct_users(thirty_days_ago, approximate)
+        elif approximate:
+            active, _ = self.aggregates(['user_id', 'status', 'timestamp']).user_sketches(self.sketch_precision)
+            metrics['mau_last_3_months'] = active.count(pd.Timestamp(three_months_ago).value)
+            metrics['dau_last_30_days'] = active.count(pd.Timestamp(thirty_days_ago).value)
+        else:
+            recent_tx = self.window(three_months_ago, columns=['user_id'])
+            metrics['mau_last_3_months'] = recent_tx['user_id'].nunique()
+            recent_tx_30d = self.window(thirty_days_ago, columns=['user_id'])
+            metrics['dau_last_30_days'] = recent_tx_30d['user_id'].nunique()
+        churned = activity[activity['last_transaction_date'] < thirty_days_ago]
+        metrics['churn_rate'] = (len(churned) / len(activity)) * 100
+        monthly_signups = users.groupby(derived_features(users).signup_month).size()
         if len(monthly_signups) > 1:
             current_month = monthly_signups.iloc[-1]
             previous_month = monthly_signups.iloc[-2]
@@ -50,119 +615,275 @@ class SmartPayDataProcessor:
             metrics['growth_rate'] = 0
         return metrics
 
+    @instrumented(rows=loaded_rows('transactions'))
     def get_transaction_metrics(self):
+        if self.streaming:
+            return self.transaction_aggregates().transaction_metrics()
         metrics = {}
-        total_tx = len(self.transactions_df)
-        successful_tx = len(self.transactions_df[self.transactions_df['status'] == 'Success'])
+        aggregates = self.aggregates(['user_id', 'feature', 'amount', 'status'])
+        total_tx = len(aggregates.df)
+        successful_tx = aggregates.success_count
         metrics['success_rate'] = (successful_tx / total_tx) * 100
-        successful_df = self.transactions_df[self.transactions_df['status'] == 'Success']
-        metrics['avg_transaction_value'] = successful_df['amount'].mean()
-        metrics['total_revenue'] = successful_df['amount'].sum()
-        unique_users = self.transactions_df['user_id'].nunique()
-        metrics['arpu'] = metrics['total_revenue'] / unique_users
-        feature_metrics = self.transactions_df.groupby('feature').agg({
-            'transaction_id': 'count',
-            'amount': lambda x: x[self.transactions_df.loc[x.index, 'status'] == 'Success'].sum(),
-            'status': lambda x: (x == 'Success').sum() / len(x) * 100
-        }).rename(columns={
-            'transaction_id': 'transaction_count',
-            'amount': 'total_revenue',
-            'status': 'success_rate'
-        })
-        metrics['feature_metrics'] = feature_metrics
+        metrics['avg_transaction_value'] = aggregates.successful['amount'].mean()
+        metrics['total_revenue'] = aggregates.total_revenue
+        metrics['arpu'] = metrics['total_revenue'] / aggregates.unique_users
+        metrics['feature_metrics'] = aggregates.feature_metrics
         return metrics
 
+    @instrumented(rows=loaded_rows('transactions', 'activity'))
     def get_funnel_metrics(self):
-        funnel = {}
-        app_opens = len(self.activity_df[self.activity_df['app_open_count'] > 0])
-        funnel['app_opens'] = app_opens
-        feature_used = self.transactions_df['user_id'].nunique()
-        funnel['feature_used'] = feature_used
-        funnel['app_to_feature_rate'] = (feature_used / app_opens) * 100 if app_opens else 0
-        transaction_started = self.transactions_df['user_id'].nunique()
-        funnel['transaction_started'] = transaction_started
-        funnel['feature_to_transaction_rate'] = (transaction_started / feature_used) * 100 if feature_used else 0
-        transaction_completed = self.transactions_df[self.transactions_df['status'] == 'Success']['user_id'].nunique()
-        funnel['transaction_completed'] = transaction_completed
-        funnel['transaction_success_rate'] = (transaction_completed / transaction_started) * 100 if transaction_started else 0
-        funnel['overall_conversion_rate'] = (transaction_completed / app_opens) * 100 if app_opens else 0
-        return funnel
+        activity = self._table('activity', ['app_open_count'])
+        app_opens = len(activity[activity['app_open_count'] > 0])
+        if self.streaming:
+            return self.transaction_aggregates().funnel_metrics(app_opens, self.sketch_precision is not None)
+        if self.sketch_precision is not None:
+            sketches = self.aggregates(['user_id', 'status', 'timestamp']).user_sketches(self.sketch_precision)
+            return funnel_from_counts(app_opens, *(sketch.count() for sketch in sketches))
+        aggregates = self.aggregates(['user_id', 'status'])
+        return funnel_from_counts(app_opens, aggregates.unique_users, aggregates.completed_users)
 
+    @instrumented(rows=loaded_rows('transactions'))
     def get_feature_engagement(self):
+        if self.streaming:
+            thirty_days_ago = datetime.now() - timedelta(days=30)
+            return self.transaction_aggregates().feature_engagement(retention_since=thirty_days_ago)
         engagement = {}
-        self.transactions_df['hour'] = self.transactions_df['timestamp'].dt.hour
-        hourly_usage = self.transactions_df.groupby(['feature', 'hour']).size().unstack(fill_value=0)
-        engagement['hourly_usage'] = hourly_usage
-        self.transactions_df['day_of_week'] = self.transactions_df['timestamp'].dt.day_name()
-        daily_usage = self.transactions_df.groupby(['feature', 'day_of_week']).size().unstack(fill_value=0)
-        engagement['daily_usage'] = daily_usage
+        transactions = self._table('transactions', ['user_id', 'feature', 'timestamp'])
+        cube = self.transaction_cube()
+        engagement['hourly_usage'] = cube.hourly_usage()
+        engagement['daily_usage'] = cube.daily_usage()
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_tx = self.transactions_df[self.transactions_df['timestamp'] >= thirty_days_ago]
-        feature_retention = {}
-        for feature in self.transactions_df['feature'].unique():
-            total_users = self.transactions_df[self.transactions_df['feature'] == feature]['user_id'].nunique()
-            retained_users = recent_tx[recent_tx['feature'] == feature]['user_id'].nunique()
-            retention_rate = (retained_users / total_users) * 100 if total_users > 0 else 0
-            feature_retention[feature] = retention_rate
-        engagement['feature_retention'] = feature_retention
+        recent_tx = self.window(thirty_days_ago, columns=['user_id', 'feature'])
+        total_users = transactions.groupby('feature', sort=False, observed=True)['user_id'].nunique()
+        retained_users = recent_tx.groupby('feature', sort=False, observed=True)['user_id'].nunique()
+        retained_users = retained_users.reindex(total_users.index, fill_value=0)
+        engagement['feature_retention'] = (retained_users / total_users * 100).to_dict()
         return engagement
 
-    def get_user_segmentation(self):
+    @instrumented(rows=lambda processor, result: processor._cube.rows)
+    def get_daily_volume(self, since=None):
+        """Transactions and successful revenue per date (from ``since`` on), newest first."""
+        return self.transaction_cube().daily_volume(since)
+
+    @instrumented(rows=lambda processor, result: processor._cube.rows)
+    def get_monthly_trends(self):
+        """Transactions, successful revenue and average value per month, newest first."""
+        return self.transaction_cube().monthly_trends()
+
+    def revenue_quantiles(self, quantiles):
+        """Per-user successful revenue at each of ``quantiles``, as an array.
+
+        Exact unless the processor was created with ``quantiles='approx'``, in
+        which case they are read from a KLL sketch of ``quantile_sketch_k``.
+        """
+        if self.streaming:
+            aggregates = self.transaction_aggregates()
+            if self.quantiles == 'approx':
+                return aggregates.revenue_sketch(config.PERFORMANCE_CONFIG['quantile_sketch_k']).quantiles(quantiles)
+            return aggregates.user_revenue_series().quantile(quantiles).to_numpy()
+        aggregates = self.aggregates(['user_id', 'amount', 'status'])
+        if self.quantiles == 'approx':
+            return aggregates.revenue_sketch(config.PERFORMANCE_CONFIG['quantile_sketch_k']).quantiles(quantiles)
+        return aggregates.user_revenue.quantile(quantiles).to_numpy()
+
+    @instrumented(rows=loaded_rows('transactions', 'activity'))
+    def get_user_segmentation(self, value_mode='quantile'):
         segmentation = {}
-        self.activity_df['activity_level'] = pd.cut(
-            self.activity_df['days_active_per_month'],
-            bins=[0, 10, 20, float('inf')],
-            labels=['Low Activity', 'Medium Activity', 'High Activity']
-        )
-        activity_segments = self.activity_df['activity_level'].value_counts()
+        activity = self._table('activity', ['days_active_per_month'])
+        activity_segments = derived_features(activity).activity_level.value_counts()
         segmentation['activity_segments'] = activity_segments
-        user_revenue = self.transactions_df[self.transactions_df['status'] == 'Success'].groupby('user_id')['amount'].sum()
-        user_revenue_percentiles = user_revenue.quantile([0.5, 0.8, 0.95])
-        def categorize_user_value(revenue):
-            if revenue >= user_revenue_percentiles[0.95]:
-                return 'High Value'
-            elif revenue >= user_revenue_percentiles[0.8]:
-                return 'Medium Value'
-            elif revenue >= user_revenue_percentiles[0.5]:
-                return 'Low Value'
-            else:
-                return 'Minimal Value'
-        user_revenue_df = user_revenue.reset_index()
-        user_revenue_df['value_segment'] = user_revenue_df['amount'].apply(categorize_user_value)
-        value_segments = user_revenue_df['value_segment'].value_counts()
-        segmentation['value_segments'] = value_segments
+        if self.streaming:
+            aggregates = self.transaction_aggregates()
+            user_revenue = aggregates.user_revenue_series()
+            user_transactions = aggregates.user_transactions_series()
+        else:
+            aggregates = self.aggregates(['user_id', 'amount', 'status'])
+            user_revenue = aggregates.user_revenue
+            user_transactions = aggregates.user_transactions
+        if value_mode == 'quantile':
+            edges = None
+            if self.quantiles == 'approx':
+                edges = self.revenue_quantiles(VALUE_SEGMENT_QUANTILES)
+            user_value_segments = segment_by_quantiles(user_revenue, edges=edges)
+        elif value_mode == 'tiers':
+            user_value_segments = segment_by_tiers(user_revenue, user_transactions)
+        else:
+            raise ValueError(f"Unknown value_mode: {value_mode!r} (expected 'quantile' or 'tiers')")
+        value_segments = user_value_segments.value_counts()
+        segmentation['value_segments'] = value_segments[value_segments > 0]
+        segmentation['user_value_segments'] = user_value_segments
         return segmentation
 
-    def export_processed_data(self, output_dir='processed_data'):
+    @instrumented(rows=loaded_rows('users', 'transactions', 'activity'))
+    def export_processed_data(self, output_dir='processed_data', file_format='csv', include_transactions=True,
+                              include_rollups=False):
+        """Write the processed tables to ``output_dir`` as CSV or Parquet.
+
+        The default file set is ``user_summary``, ``transaction_summary``,
+        ``feature_metrics`` and ``funnel_data``. ``include_rollups`` adds the
+        ``daily_volume`` and ``monthly_trends`` tables from the transaction
+        cube and, outside streaming mode, ``cohort_retention``.
+        """
+        if file_format == 'parquet':
+            return self._export_parquet(output_dir, include_transactions, include_rollups)
+        if file_format != 'csv':
+            raise ValueError(f"Unknown file_format: {file_format!r} (expected 'csv' or 'parquet')")
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-        user_summary = self.users_df.merge(self.activity_df, on='user_id', how='left')
-        user_summary.to_csv(f'{output_dir}/user_summary.csv', index=False)
-        transaction_summary = self.transactions_df.copy()
-        transaction_summary.to_csv(f'{output_dir}/transaction_summary.csv', index=False)
+        self.user_summary().to_csv(f'{output_dir}/user_summary.csv', index=False)
+        if include_transactions and self.streaming:
+            for i, chunk in enumerate(self.iter_transaction_chunks()):
+                chunk.to_csv(f'{output_dir}/transaction_summary.csv', mode='a' if i else 'w',
+                             header=(i == 0), index=False)
+        elif include_transactions:
+            transaction_summary = self.transactions_df.copy()
+            transaction_summary.to_csv(f'{output_dir}/transaction_summary.csv', index=False)
         feature_metrics = self.get_transaction_metrics()['feature_metrics'].reset_index()
         feature_metrics.to_csv(f'{output_dir}/feature_metrics.csv', index=False)
+        self._funnel_data().to_csv(f'{output_dir}/funnel_data.csv', index=False)
+        if include_rollups:
+            self.get_daily_volume().reset_index().to_csv(f'{output_dir}/daily_volume.csv', index=False)
+            self.get_monthly_trends().reset_index().to_csv(f'{output_dir}/monthly_trends.csv', index=False)
+            if not self.streaming:
+                self.cohort_retention().to_frame().to_csv(f'{output_dir}/cohort_retention.csv', index=False)
+        print(f"✅ Processed data exported to {output_dir}/")
+
+    def _funnel_data(self):
         funnel = self.get_funnel_metrics()
-        funnel_data = pd.DataFrame([
+        return pd.DataFrame([
             {'stage': 'App Opens', 'count': funnel['app_opens']},
             {'stage': 'Feature Used', 'count': funnel['feature_used']},
             {'stage': 'Transaction Started', 'count': funnel['transaction_started']},
             {'stage': 'Transaction Completed', 'count': funnel['transaction_completed']}
         ])
-        funnel_data.to_csv(f'{output_dir}/funnel_data.csv', index=False)
-        print(f"✅ Processed data exported to {output_dir}/")
 
-    def generate_insights_report(self):
+    def _export_parquet(self, output_dir, include_transactions=True, include_rollups=False):
+        """Write the processed tables as compressed, typed Parquet files.
+
+        Transactions become a Hive-partitioned dataset
+        (``transaction_summary/month=YYYY-MM/feature=.../``) with row-group
+        statistics, so readers can prune partitions and row groups.
+        """
+        if not PYARROW_AVAILABLE:
+            raise ImportError("file_format='parquet' requires the pyarrow package")
+        compression = config.EXPORT_CONFIG['compression']
+        os.makedirs(output_dir, exist_ok=True)
+        self.user_summary().to_parquet(f'{output_dir}/user_summary.parquet', index=False, compression=compression)
+        feature_metrics = self.get_transaction_metrics()['feature_metrics'].reset_index()
+        feature_metrics.to_parquet(f'{output_dir}/feature_metrics.parquet', index=False, compression=compression)
+        self._funnel_data().to_parquet(f'{output_dir}/funnel_data.parquet', index=False, compression=compression)
+        if include_rollups:
+            self.get_daily_volume().reset_index().to_parquet(f'{output_dir}/daily_volume.parquet', index=False,
+                                                             compression=compression)
+            self.get_monthly_trends().reset_index().to_parquet(f'{output_dir}/monthly_trends.parquet', index=False,
+                                                               compression=compression)
+            if not self.streaming:
+                self.cohort_retention().to_frame().to_parquet(f'{output_dir}/cohort_retention.parquet',
+                                                              index=False, compression=compression)
+
+        if include_transactions:
+            self._export_transactions_parquet(f'{output_dir}/transaction_summary', compression)
+        print(f"✅ Processed data exported to {output_dir}/ (parquet)")
+
+    def _export_transactions_parquet(self, dataset_dir, compression):
+        """Write the transactions dataset in one ``write_dataset`` call.
+
+        Streamed chunks are fed as record batches with the first chunk's
+        schema, so each partition gets one file with full-size row groups
+        rather than a file per chunk.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if os.path.exists(dataset_dir):
+            shutil.rmtree(dataset_dir)
+        chunks = iter(self.iter_transaction_chunks() if self.streaming else [self.transactions_df])
+        first = next(chunks, None)
+        if first is None:
+            return
+
+        def to_table(chunk):
+            month = chunk['timestamp'].to_numpy().astype('datetime64[M]').astype(str)
+            return pa.Table.from_pandas(chunk.assign(month=month), preserve_index=False)
+
+        head = to_table(first)
+        schema = head.schema
+
+        def batches():
+            yield from head.to_batches()
+            for chunk in chunks:
+                yield from to_table(chunk).cast(schema).to_batches()
+
+        file_options = ds.ParquetFileFormat().make_write_options(compression=compression, write_statistics=True)
+        ds.write_dataset(
+            batches(), dataset_dir, schema=schema, format='parquet', file_options=file_options,
+            partitioning=PARQUET_PARTITION_COLS, partitioning_flavor='hive',
+            basename_template='part-{i}.parquet', min_rows_per_group=PARQUET_MIN_ROW_GROUP_SIZE,
+            max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+        )
+
+    @instrumented(rows=loaded_rows('users', 'transactions', 'activity'))
+    def compute_metrics(self, metrics=None, parallel=None, max_workers=None):
+        """Compute several metric groups, running independent ones concurrently.
+
+        ``metrics`` names the groups to compute (default: all of
+        ``user_metrics``, ``transaction_metrics``, ``funnel``,
+        ``feature_engagement`` and ``segmentation``). The columns every group
+        needs and the shared transaction aggregates are prepared first, so each
+        is loaded or computed once; the groups then run on a thread pool of
+        ``config.MAX_WORKERS`` threads, where the pandas/NumPy kernels release
+        the GIL. Parallelism follows ``PERFORMANCE_CONFIG['enable_parallel_processing']``
+        unless ``parallel`` is given.
+        """
+        if parallel is None:
+            parallel = config.PERFORMANCE_CONFIG['enable_parallel_processing']
+        scheduler = MetricScheduler(max_workers or config.MAX_WORKERS, parallel)
+
+        def load_transactions():
+            if self.streaming:
+                return self.transaction_aggregates()
+            aggregates = self.aggregates(['user_id', 'feature', 'amount', 'status', 'timestamp'])
+            # Warm the intermediates shared by several metric groups.
+            aggregates.successful
+            aggregates.user_revenue
+            return aggregates
+
+        scheduler.add('users', lambda: self._table('users', ['signup_date']))
+        scheduler.add('activity', lambda: self._table(
+            'activity', ['last_transaction_date', 'app_open_count', 'days_active_per_month']))
+        scheduler.add('transactions', load_transactions)
+        scheduler.add('user_metrics', self.get_user_metrics, ['users', 'activity', 'transactions'])
+        scheduler.add('transaction_metrics', self.get_transaction_metrics, ['transactions'])
+        scheduler.add('funnel', self.get_funnel_metrics, ['activity', 'transactions'])
+        scheduler.add('feature_engagement', self.get_feature_engagement, ['transactions'])
+        scheduler.add('segmentation', self.get_user_segmentation, ['activity', 'transactions'])
+
+        if metrics is None:
+            metrics = ['user_metrics', 'transaction_metrics', 'funnel', 'feature_engagement', 'segmentation']
+        results = scheduler.run(metrics)
+        return {name: results[name] for name in metrics}
+
+    def generate_insights_report(self, timing_summary=None):
+        """Print the insights report.
+
+        With instrumentation on, a table of the stages timed during the report
+        follows it unless ``timing_summary`` (default
+        ``PERFORMANCE_CONFIG['instrumentation_summary']``) is false.
+        """
+        if timing_summary is None:
+            timing_summary = config.PERFORMANCE_CONFIG['instrumentation_summary']
+        first_record = len(instrumentation.records()) if instrumentation.is_enabled() else None
         print("📊 SmartPay Analytics Insights Report")
         print("=" * 50)
-        user_metrics = self.get_user_metrics()
+        results = self.compute_metrics(['user_metrics', 'transaction_metrics', 'funnel', 'segmentation'])
+        user_metrics = results['user_metrics']
         print("\n👥 USER OVERVIEW")
         print(f"Total Users: {user_metrics['total_users']:,}")
         print(f"Monthly Active Users (3 months): {user_metrics['mau_last_3_months']:,}")
         print(f"Daily Active Users (30 days): {user_metrics['dau_last_30_days']:,}")
         print(f"Churn Rate: {user_metrics['churn_rate']:.2f}%")
         print(f"Growth Rate: {user_metrics['growth_rate']:.2f}%")
-        transaction_metrics = self.get_transaction_metrics()
+        transaction_metrics = results['transaction_metrics']
         print("\n💰 TRANSACTION METRICS")
         print(f"Success Rate: {transaction_metrics['success_rate']:.2f}%")
         print(f"Average Transaction Value: ${transaction_metrics['avg_transaction_value']:.2f}")
@@ -175,33 +896,60 @@ class SmartPayDataProcessor:
             print(f"  - Transactions: {feature_metrics.loc[feature, 'transaction_count']:,}")
             print(f"  - Revenue: ${feature_metrics.loc[feature, 'total_revenue']:,.2f}")
             print(f"  - Success Rate: {feature_metrics.loc[feature, 'success_rate']:.2f}%")
-        funnel = self.get_funnel_metrics()
+        funnel = results['funnel']
         print("\n🔄 FUNNEL ANALYSIS")
         print(f"App Opens: {funnel['app_opens']:,}")
         print(f"Feature Used: {funnel['feature_used']:,} ({funnel['app_to_feature_rate']:.2f}%)")
         print(f"Transaction Started: {funnel['transaction_started']:,} ({funnel['feature_to_transaction_rate']:.2f}%)")
         print(f"Transaction Completed: {funnel['transaction_completed']:,} ({funnel['transaction_success_rate']:.2f}%)")
         print(f"Overall Conversion: {funnel['overall_conversion_rate']:.2f}%")
-        segmentation = self.get_user_segmentation()
+        segmentation = results['segmentation']
         print("\n👤 USER SEGMENTATION")
         print("Activity-based:")
         for segment, count in segmentation['activity_segments'].items():
-            percentage = (count / len(self.activity_df)) * 100
+            percentage = (count / len(self._table('activity', ['days_active_per_month']))) * 100
             print(f"  {segment}: {count:,} ({percentage:.1f}%)")
         print("\nValue-based:")
         for segment, count in segmentation['value_segments'].items():
             percentage = (count / len(segmentation['value_segments'])) * 100
             print(f"  {segment}: {count:,} ({percentage:.1f}%)")
+        if timing_summary and first_record is not None:
+            print("\n⏱️ STAGE TIMINGS")
+            print(instrumentation.summary_table(instrumentation.records()[first_record:]))
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Process SmartPay data for dashboards and reporting.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only ingest transactions appended since the previous incremental run')
+    parser.add_argument('--state-dir', default='processed_data/state',
+                        help='where the incremental watermark and aggregates are kept')
+    parser.add_argument('--shards', type=int,
+                        help='fold the transactions file in this many shards across worker processes')
+    parser.add_argument('--rollups', action='store_true',
+                        help='also export daily volume, monthly trends and cohort retention tables')
+    parser.add_argument('--instrument', action='store_true',
+                        help='log per-stage timings and print a stage summary after the report')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='with --instrument, also record peak allocated bytes per stage (slower)')
+    args = parser.parse_args()
+    if args.instrument:
+        instrumentation.enable(memory=args.trace_memory)
+
     processor = SmartPayDataProcessor(
         users_file='../smartpay_users.csv',
         transactions_file='../smartpay_transactions.csv',
-        activity_file='../smartpay_app_activity.csv'
+        activity_file='../smartpay_app_activity.csv',
+        state_dir=args.state_dir if args.incremental else None,
+        shards=args.shards
     )
     processor.generate_insights_report()
-    processor.export_processed_data()
+    if args.incremental:
+        report = processor.incremental_report
+        print(f"\n🔁 Incremental run: {report['mode']} ({report['new_rows']:,} new rows"
+              + (f", {report['reason']})" if report['reason'] else ")"))
+    # The raw transaction copy is only rewritten on full runs.
+    processor.export_processed_data(include_transactions=not args.incremental, include_rollups=args.rollups)
     print("\n🎉 Data processing completed successfully!")
 
 if __name__ == "__main__":
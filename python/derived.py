@@ -0,0 +1,89 @@
+"""
+SmartPay Analytics - Derived Features
+=====================================
+
+Columns derived from the loaded tables (hour of day, weekday, signup month,
+activity level) computed once per frame as compact integer or categorical
+Series and kept beside the frame rather than written into it, so repeated
+metric calls reuse them and exports keep the source schema.
+"""
+
+import threading
+import weakref
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+ACTIVITY_LEVEL_BINS = [0, 10, 20, float('inf')]
+ACTIVITY_LEVEL_LABELS = ['Low Activity', 'Medium Activity', 'High Activity']
+
+
+class DerivedFeatures:
+    """Lazily computed derived columns for one frame, aligned with its index.
+
+    Each property only needs the source column it is derived from, so it works
+    on partially loaded (column-projected) frames.
+    """
+
+    def __init__(self, df):
+        # Weak reference: the store must not keep a replaced frame alive.
+        self._df_ref = weakref.ref(df)
+
+    @property
+    def df(self):
+        return self._df_ref()
+
+    @cached_property
+    def hour(self):
+        """Transaction hour of day as int8."""
+        return self.df['timestamp'].dt.hour.astype(np.int8).rename('hour')
+
+    @cached_property
+    def day_of_week(self):
+        """Transaction weekday as int8, Monday=0."""
+        return self.df['timestamp'].dt.dayofweek.astype(np.int8).rename('day_of_week')
+
+    @cached_property
+    def day_name(self):
+        """Transaction weekday name as a categorical in calendar order."""
+        codes = self.day_of_week.to_numpy()
+        return pd.Series(pd.Categorical.from_codes(codes, categories=DAY_NAMES, ordered=True),
+                         index=self.df.index, name='day_of_week')
+
+    @cached_property
+    def signup_month(self):
+        """User signup month as a monthly period."""
+        return self.df['signup_date'].dt.to_period('M').rename('signup_month')
+
+    @cached_property
+    def activity_level(self):
+        """Activity level binned from ``days_active_per_month``."""
+        return pd.cut(self.df['days_active_per_month'], bins=ACTIVITY_LEVEL_BINS,
+                      labels=ACTIVITY_LEVEL_LABELS).rename('activity_level')
+
+
+_derived_features = {}
+_derived_features_lock = threading.Lock()
+
+
+def derived_features(df):
+    """Return the shared ``DerivedFeatures`` store for a frame."""
+    key = id(df)
+    with _derived_features_lock:
+        features = _derived_features.get(key)
+        if features is None or features.df is not df:
+            features = DerivedFeatures(df)
+            _derived_features[key] = features
+            weakref.finalize(df, _derived_features.pop, key, None)
+    return features
+
+
+def invalidate_derived_features(df=None):
+    """Drop derived columns for one frame, or for every frame."""
+    with _derived_features_lock:
+        if df is None:
+            _derived_features.clear()
+        else:
+            _derived_features.pop(id(df), None)
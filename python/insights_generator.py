@@ -8,7 +8,155 @@ This module generates business insights and strategic recommendations based on d
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import functools
+import threading
 from data_processing import SmartPayDataProcessor
+from aggregates import frame_aggregates
+from config import config
+from instrumentation import instrumented
+from report import ExecutiveSummary, format_for_path, render
+
+
+def _transaction_rows(generator, result):
+    if generator._streaming():
+        return generator.processor.transaction_aggregates().rows
+    return len(generator.processor.transactions_df)
+
+
+def behavior_insights(peak_hour, peak_count, busiest_day, slowest_day):
+    """Peak-hour and weekly-pattern insights."""
+    return [
+        {
+            'type': 'Peak Usage Time',
+            'insight': f'Peak transaction activity occurs at {peak_hour}:00 with {peak_count} transactions',
+            'impact': 'High',
+            'action': 'Optimize server capacity and support during peak hours'
+        },
+        {
+            'type': 'Weekly Pattern',
+            'insight': f'{busiest_day} is the busiest day, {slowest_day} is the slowest',
+            'impact': 'Medium',
+            'action': 'Schedule promotions and maintenance accordingly'
+        },
+    ]
+
+
+def revenue_insights(high_value_count, percentile, high_value_revenue, top_feature, top_feature_revenue):
+    """High-value user and top revenue feature insights."""
+    return [
+        {
+            'type': 'High-Value Users',
+            'insight': f'{high_value_count} users (top {(1 - percentile) * 100:.0f}%) generate {high_value_revenue:,.2f} in revenue',
+            'impact': 'High',
+            'action': 'Implement VIP program and personalized offers for high-value users'
+        },
+        {
+            'type': 'Revenue by Feature',
+            'insight': f'{top_feature} generates the highest revenue: ${top_feature_revenue:,.2f}',
+            'impact': 'High',
+            'action': f'Invest in {top_feature} feature development and marketing'
+        },
+    ]
+
+
+def churn_insights(at_risk_count):
+    """Users 7-30 days inactive."""
+    return [{
+        'type': 'Churn Risk',
+        'insight': f'{at_risk_count} users are at risk of churning (7-30 days inactive)',
+        'impact': 'High',
+        'action': 'Implement re-engagement campaigns for at-risk users'
+    }]
+
+
+def feature_insights(lowest_feature, lowest_success_rate):
+    """The feature with the lowest success rate."""
+    return [{
+        'type': 'Feature Success Rate',
+        'insight': f'{lowest_feature} has the lowest success rate: {lowest_success_rate:.1f}%',
+        'impact': 'High',
+        'action': f'Investigate and optimize {lowest_feature} user experience'
+    }]
+
+
+def strategic_recommendations(all_insights):
+    """Recommendation categories from insights, prioritized by impact."""
+    recommendations = []
+    
+    # Prioritize by impact
+    high_impact_insights = [insight for insight in all_insights if insight['impact'] == 'High']
+    medium_impact_insights = [insight for insight in all_insights if insight['impact'] == 'Medium']
+    
+    # Generate strategic recommendations
+    recommendations.append({
+        'category': 'Immediate Actions (High Impact)',
+        'recommendations': [
+            insight['action'] for insight in high_impact_insights[:5]
+        ]
+    })
+    
+    recommendations.append({
+        'category': 'Strategic Initiatives (Medium Impact)',
+        'recommendations': [
+            insight['action'] for insight in medium_impact_insights[:5]
+        ]
+    })
+    
+    # Add general strategic recommendations
+    general_recommendations = [
+        'Implement A/B testing framework for feature optimization',
+        'Develop customer lifetime value (CLV) prediction model',
+        'Create personalized onboarding experience based on user segments',
+        'Establish real-time monitoring dashboard for key metrics',
+        'Launch referral program to increase user acquisition'
+    ]
+    
+    recommendations.append({
+        'category': 'Long-term Strategic Initiatives',
+        'recommendations': general_recommendations
+    })
+    
+    return recommendations
+
+
+def executive_summary(user_metrics, transaction_metrics, user_insights, revenue_insights, recommendations,
+                      generated_at=None):
+    """``ExecutiveSummary`` with the key metrics, the top two user and revenue
+    insights and the first three recommendations per category."""
+    metrics = {
+        'total_users': user_metrics['total_users'],
+        'monthly_active_users': user_metrics['mau_last_3_months'],
+        'success_rate': transaction_metrics['success_rate'],
+        'avg_transaction_value': transaction_metrics['avg_transaction_value'],
+        'total_revenue': transaction_metrics['total_revenue'],
+        'churn_rate': user_metrics['churn_rate'],
+    }
+    top_insights = user_insights[:2] + revenue_insights[:2]
+    recommendations = [
+        {'category': category['category'], 'recommendations': category['recommendations'][:3]}
+        for category in recommendations
+    ]
+    return ExecutiveSummary(metrics, top_insights, recommendations, generated_at)
+
+
+def memoized(method):
+    """Cache a no-argument generator method's result for the current data version."""
+    @functools.wraps(method)
+    def wrapper(self):
+        version = self.data_version()
+        with self._memo_lock:
+            if self._memo_version != version:
+                self._memo = {}
+                self._memo_version = version
+            if method.__name__ in self._memo:
+                return self._memo[method.__name__]
+        result = method(self)
+        with self._memo_lock:
+            if self._memo_version == version:
+                self._memo[method.__name__] = result
+        return result
+    return wrapper
+
 
 class SmartPayInsightsGenerator:
     """Generate business insights and strategic recommendations."""
@@ -17,79 +165,98 @@ class SmartPayInsightsGenerator:
         self.processor = data_processor
         self.insights = {}
         self.recommendations = []
+        # Analyzer results for one data version of the processor; see memoized.
+        self._memo = {}
+        self._memo_version = None
+        self._memo_lock = threading.Lock()
     
+    def data_version(self):
+        """Key identifying the processor's current data.
+
+        ``SmartPayDataProcessor.data_version`` changes whenever tables are
+        reloaded or reassigned. Processors without it are keyed on the
+        identity of their frames.
+        """
+        version = getattr(self.processor, 'data_version', None)
+        if version is None:
+            version = tuple(id(getattr(self.processor, name, None))
+                            for name in ('users_df', 'transactions_df', 'activity_df'))
+        return version
+    
+    def invalidate(self):
+        """Forget memoized insights, e.g. after editing the processor's frames in place."""
+        with self._memo_lock:
+            self._memo = {}
+            self._memo_version = None
+    
+    def _streaming(self):
+        """Whether the processor streams transactions instead of holding a frame."""
+        return getattr(self.processor, 'streaming', False) is True
+    
+    def _aggregates(self):
+        """Aggregates shared with the processor for the current transactions frame."""
+        return frame_aggregates(self.processor.transactions_df)
+    
+    def _usage(self):
+        """Transactions per feature by hour and by weekday, as ``(hourly, daily)``."""
+        if self._streaming():
+            engagement = self.processor.get_feature_engagement()
+            return engagement['hourly_usage'], engagement['daily_usage']
+        aggregates = self._aggregates()
+        return aggregates.hourly_usage, aggregates.daily_usage
+    
+    def _feature_metrics(self):
+        if self._streaming():
+            return self.processor.get_transaction_metrics()['feature_metrics']
+        return self._aggregates().feature_metrics
+    
+    def _user_revenue(self):
+        if self._streaming():
+            return self.processor.transaction_aggregates().user_revenue_series()
+        return self._aggregates().user_revenue
+    
+    def _revenue_quantile(self, percentile):
+        """Per-user revenue at ``percentile``, in the processor's quantile mode.
+
+        Processors without a quantile mode use the configured one.
+        """
+        if hasattr(self.processor, 'quantiles'):
+            return self.processor.revenue_quantiles([percentile])[0]
+        aggregates = self._aggregates()
+        if config.PERFORMANCE_CONFIG['quantiles'] == 'approx':
+            return aggregates.revenue_sketch(config.PERFORMANCE_CONFIG['quantile_sketch_k']).quantile(percentile)
+        return aggregates.user_revenue.quantile(percentile)
+    
+    @memoized
+    @instrumented(rows=_transaction_rows)
     def analyze_user_behavior_patterns(self):
         """Analyze user behavior patterns and generate insights."""
-        insights = []
-        
-        # Analyze peak transaction times
-        self.processor.transactions_df['hour'] = self.processor.transactions_df['timestamp'].dt.hour
-        hourly_transactions = self.processor.transactions_df.groupby('hour').size()
-        peak_hour = hourly_transactions.idxmax()
-        peak_count = hourly_transactions.max()
-        
-        insights.append({
-            'type': 'Peak Usage Time',
-            'insight': f'Peak transaction activity occurs at {peak_hour}:00 with {peak_count} transactions',
-            'impact': 'High',
-            'action': 'Optimize server capacity and support during peak hours'
-        })
-        
-        # Analyze day-of-week patterns
-        self.processor.transactions_df['day_of_week'] = self.processor.transactions_df['timestamp'].dt.day_name()
-        daily_transactions = self.processor.transactions_df.groupby('day_of_week').size()
-        busiest_day = daily_transactions.idxmax()
-        slowest_day = daily_transactions.idxmin()
-        
-        insights.append({
-            'type': 'Weekly Pattern',
-            'insight': f'{busiest_day} is the busiest day, {slowest_day} is the slowest',
-            'impact': 'Medium',
-            'action': 'Schedule promotions and maintenance accordingly'
-        })
-        
-        return insights
+        hourly_usage, daily_usage = self._usage()
+        hourly_transactions = hourly_usage.sum(axis=0)
+        daily_transactions = daily_usage.sum(axis=0)
+        return behavior_insights(hourly_transactions.idxmax(), hourly_transactions.max(),
+                                 daily_transactions.idxmax(), daily_transactions.idxmin())
     
+    @memoized
+    @instrumented(rows=_transaction_rows)
     def analyze_revenue_optimization(self):
         """Analyze revenue optimization opportunities."""
-        insights = []
-        
         # High-value user analysis
-        user_revenue = self.processor.transactions_df[
-            self.processor.transactions_df['status'] == 'Success'
-        ].groupby('user_id')['amount'].sum()
+        user_revenue = self._user_revenue()
         
-        top_10_percent = user_revenue.quantile(0.9)
-        high_value_users = user_revenue[user_revenue >= top_10_percent]
-        
-        insights.append({
-            'type': 'High-Value Users',
-            'insight': f'{len(high_value_users)} users (top 10%) generate {high_value_users.sum():,.2f} in revenue',
-            'impact': 'High',
-            'action': 'Implement VIP program and personalized offers for high-value users'
-        })
+        percentile = config.INSIGHT_THRESHOLDS['high_value_user_percentile']
+        threshold = self._revenue_quantile(percentile)
+        high_value_users = user_revenue[user_revenue >= threshold]
         
         # Feature revenue analysis
-        feature_revenue = self.processor.transactions_df[
-            self.processor.transactions_df['status'] == 'Success'
-        ].groupby('feature')['amount'].sum()
-        
-        highest_revenue_feature = feature_revenue.idxmax()
-        highest_revenue = feature_revenue.max()
-        
-        insights.append({
-            'type': 'Revenue by Feature',
-            'insight': f'{highest_revenue_feature} generates the highest revenue: ${highest_revenue:,.2f}',
-            'impact': 'High',
-            'action': f'Invest in {highest_revenue_feature} feature development and marketing'
-        })
-        
-        return insights
+        feature_revenue = self._feature_metrics()['total_revenue']
+        return revenue_insights(len(high_value_users), percentile, high_value_users.sum(),
+                                feature_revenue.idxmax(), feature_revenue.max())
     
+    @memoized
+    @instrumented(rows=_transaction_rows)
     def analyze_churn_risk(self):
         """Analyze churn risk and retention opportunities."""
-        insights = []
-        
         # Churn analysis by user segment
         user_activity = self.processor.activity_df.merge(
             self.processor.users_df[['user_id', 'age', 'location']], on='user_id'
@@ -106,147 +273,60 @@ class SmartPayInsightsGenerator:
             (user_activity['days_since_last'] <= 30)
         ]
         
-        insights.append({
-            'type': 'Churn Risk',
-            'insight': f'{len(at_risk_users)} users are at risk of churning (7-30 days inactive)',
-            'impact': 'High',
-            'action': 'Implement re-engagement campaigns for at-risk users'
-        })
-        
-        return insights
+        return churn_insights(len(at_risk_users))
     
+    @memoized
+    @instrumented(rows=_transaction_rows)
     def analyze_feature_performance(self):
         """Analyze feature performance and optimization opportunities."""
-        insights = []
-        
         # Feature success rates
-        feature_success = self.processor.transactions_df.groupby('feature').agg({
-            'status': lambda x: (x == 'Success').sum() / len(x) * 100
-        }).rename(columns={'status': 'success_rate'})
-        
-        lowest_success_feature = feature_success['success_rate'].idxmin()
-        lowest_success_rate = feature_success['success_rate'].min()
+        feature_success = self._feature_metrics()[['success_rate']]
         
-        insights.append({
-            'type': 'Feature Success Rate',
-            'insight': f'{lowest_success_feature} has the lowest success rate: {lowest_success_rate:.1f}%',
-            'impact': 'High',
-            'action': f'Investigate and optimize {lowest_success_feature} user experience'
-        })
-        
-        return insights
+        return feature_insights(feature_success['success_rate'].idxmin(), feature_success['success_rate'].min())
     
+    @memoized
+    @instrumented(rows=_transaction_rows)
     def generate_strategic_recommendations(self):
         """Generate strategic business recommendations."""
-        recommendations = []
-        
         # Collect all insights
-        user_insights = self.analyze_user_behavior_patterns()
-        revenue_insights = self.analyze_revenue_optimization()
-        churn_insights = self.analyze_churn_risk()
-        feature_insights = self.analyze_feature_performance()
-        
-        all_insights = user_insights + revenue_insights + churn_insights + feature_insights
-        
-        # Prioritize by impact
-        high_impact_insights = [insight for insight in all_insights if insight['impact'] == 'High']
-        medium_impact_insights = [insight for insight in all_insights if insight['impact'] == 'Medium']
-        
-        # Generate strategic recommendations
-        recommendations.append({
-            'category': 'Immediate Actions (High Impact)',
-            'recommendations': [
-                insight['action'] for insight in high_impact_insights[:5]
-            ]
-        })
-        
-        recommendations.append({
-            'category': 'Strategic Initiatives (Medium Impact)',
-            'recommendations': [
-                insight['action'] for insight in medium_impact_insights[:5]
-            ]
-        })
-        
-        # Add general strategic recommendations
-        general_recommendations = [
-            'Implement A/B testing framework for feature optimization',
-            'Develop customer lifetime value (CLV) prediction model',
-            'Create personalized onboarding experience based on user segments',
-            'Establish real-time monitoring dashboard for key metrics',
-            'Launch referral program to increase user acquisition'
-        ]
-        
-        recommendations.append({
-            'category': 'Long-term Strategic Initiatives',
-            'recommendations': general_recommendations
-        })
-        
-        return recommendations
+        all_insights = (self.analyze_user_behavior_patterns() + self.analyze_revenue_optimization()
+                        + self.analyze_churn_risk() + self.analyze_feature_performance())
+        return strategic_recommendations(all_insights)
+    
+    @memoized
+    def key_metrics(self):
+        """User and transaction metrics for the summary, as ``(user_metrics, transaction_metrics)``."""
+        return self.processor.get_user_metrics(), self.processor.get_transaction_metrics()
+    
+    @memoized
+    @instrumented(rows=_transaction_rows)
+    def build_executive_summary(self):
+        """Build the executive summary once per data version as an ``ExecutiveSummary``."""
+        user_metrics, transaction_metrics = self.key_metrics()
+        return executive_summary(user_metrics, transaction_metrics, self.analyze_user_behavior_patterns(),
+                                 self.analyze_revenue_optimization(), self.generate_strategic_recommendations())
+    
+    def render_executive_summary(self, file_format='text'):
+        """The executive summary as ``'text'``, ``'json'``, ``'markdown'`` or ``'html'``."""
+        return render(self.build_executive_summary(), file_format)
     
     def generate_executive_summary(self):
-        """Generate executive summary report."""
-        print("🎯 SmartPay Executive Summary Report")
-        print("=" * 50)
-        print(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print()
-        
-        # Key Metrics Summary
-        user_metrics = self.processor.get_user_metrics()
-        transaction_metrics = self.processor.get_transaction_metrics()
-        
-        print("📊 KEY METRICS")
-        print(f"• Total Users: {user_metrics['total_users']:,}")
-        print(f"• Monthly Active Users: {user_metrics['mau_last_3_months']:,}")
-        print(f"• Transaction Success Rate: {transaction_metrics['success_rate']:.1f}%")
-        print(f"• Average Transaction Value: ${transaction_metrics['avg_transaction_value']:.2f}")
-        print(f"• Total Revenue: ${transaction_metrics['total_revenue']:,.2f}")
-        print(f"• Churn Rate: {user_metrics['churn_rate']:.1f}%")
-        print()
-        
-        # Top Insights
-        print("🔍 TOP INSIGHTS")
-        user_insights = self.analyze_user_behavior_patterns()
-        revenue_insights = self.analyze_revenue_optimization()
-        
-        top_insights = user_insights[:2] + revenue_insights[:2]
-        for i, insight in enumerate(top_insights, 1):
-            print(f"{i}. {insight['insight']}")
-        print()
-        
-        # Strategic Recommendations
-        print("🎯 STRATEGIC RECOMMENDATIONS")
-        recommendations = self.generate_strategic_recommendations()
-        
-        for category in recommendations:
-            print(f"\n{category['category']}:")
-            for i, rec in enumerate(category['recommendations'][:3], 1):
-                print(f"  {i}. {rec}")
-        
-        print("\n" + "=" * 50)
-        print("📈 NEXT STEPS")
-        print("1. Review and prioritize recommendations")
-        print("2. Assign ownership and timelines")
-        print("3. Implement monitoring for key metrics")
-        print("4. Schedule follow-up review in 30 days")
+        """Print the executive summary report."""
+        for line in self.render_executive_summary('text').splitlines():
+            print(line)
+        return self.build_executive_summary()
     
-    def export_insights_report(self, filename='smartpay_insights_report.txt'):
-        """Export insights report to file."""
-        import sys
-        from io import StringIO
-        
-        # Capture print output
-        old_stdout = sys.stdout
-        result = StringIO()
-        sys.stdout = result
-        
-        # Generate report
-        self.generate_executive_summary()
-        
-        # Restore stdout and save to file
-        sys.stdout = old_stdout
-        report_content = result.getvalue()
+    @instrumented(rows=_transaction_rows)
+    def export_insights_report(self, filename='smartpay_insights_report.txt', file_format=None):
+        """Export the executive summary to a file.
+
+        ``file_format`` defaults to the one implied by the extension (``.json``,
+        ``.md``, ``.html``, otherwise text). Every format is rendered from the
+        same summary, built once per data version.
+        """
+        report_content = self.render_executive_summary(file_format or format_for_path(filename))
         
-        with open(filename, 'w') as f:
+        with open(filename, 'w', encoding='utf-8') as f:
             f.write(report_content)
         
         print(f"✅ Insights report exported to {filename}")
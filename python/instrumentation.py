@@ -0,0 +1,215 @@
+"""
+SmartPay Analytics - Instrumentation
+====================================
+
+Per-stage timing for the processor and insights hot paths. Methods decorated
+with ``@instrumented`` record wall and CPU time, rows processed and the
+process's peak RSS. With memory tracing on, they also record the peak bytes
+allocated (via ``tracemalloc``). Each record is logged as a structured
+``key=value`` line on the ``smartpay.instrumentation`` logger, which follows
+``Config.LOG_LEVEL`` and ``Config.LOG_FORMAT``, and is kept for
+``summary_table``.
+
+Instrumentation is off unless ``PERFORMANCE_CONFIG['instrumentation']`` is set
+or ``enable()`` is called. When it is off, a decorated method does one flag
+check before calling straight through.
+"""
+
+import functools
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+from config import config
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+logger = logging.getLogger('smartpay.instrumentation')
+
+_state = {
+    'enabled': config.PERFORMANCE_CONFIG['instrumentation'],
+    'memory': config.PERFORMANCE_CONFIG['instrumentation_memory'],
+}
+_records = []
+_records_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure_logging():
+    """Attach a handler using ``LOG_LEVEL``/``LOG_FORMAT`` unless one is already configured."""
+    logger.setLevel(config.LOG_LEVEL)
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(config.LOG_FORMAT))
+        logger.addHandler(handler)
+
+
+def enable(memory=None):
+    """Turn instrumentation on; ``memory`` also traces allocations (slower)."""
+    if memory is not None:
+        _state['memory'] = memory
+    if _state['memory'] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state['started_tracing'] = True
+    _state['enabled'] = True
+    configure_logging()
+
+
+def disable():
+    _state['enabled'] = False
+    if _state.pop('started_tracing', False):
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _state['enabled']
+
+
+def records():
+    """Copies of the stage records collected so far."""
+    with _records_lock:
+        return [dict(record) for record in _records]
+
+
+def clear():
+    with _records_lock:
+        _records.clear()
+
+
+def _peak_rss():
+    """Process high-water RSS in bytes (ru_maxrss is KiB on Linux, bytes on macOS).
+
+    None where the ``resource`` module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _Stage:
+    """One running stage; nested stages pass their allocation peak to the parent."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.traced_peak = 0
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        self.depth = len(stack)
+        self.tracing = _state['memory'] and tracemalloc.is_tracing()
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].traced_peak = max(stack[-1].traced_peak, peak)
+            tracemalloc.reset_peak()
+            self.traced_start = current
+        stack.append(self)
+        self.wall_start, self.cpu_start = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        stack = _local.stack
+        stack.pop()
+        record = {
+            'stage': self.name,
+            'depth': self.depth,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'rows': self.rows,
+            'peak_rss_bytes': _peak_rss(),
+            'alloc_bytes': None,
+            'error': exc_type.__name__ if exc_type else None,
+        }
+        if self.tracing and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.traced_peak)
+            record['alloc_bytes'] = max(0, peak - self.traced_start)
+            if stack:
+                stack[-1].traced_peak = max(stack[-1].traced_peak, peak)
+        with _records_lock:
+            _records.append(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(_format(record), extra={'stage_metrics': record})
+        return False
+
+
+def _format(record):
+    fields = [f"stage={record['stage']}", f"wall_s={record['wall_s']:.4f}", f"cpu_s={record['cpu_s']:.4f}"]
+    if record['rows'] is not None:
+        fields.append(f"rows={record['rows']}")
+    if record['peak_rss_bytes'] is not None:
+        fields.append(f"peak_rss_mb={record['peak_rss_bytes'] / 2**20:.1f}")
+    if record['alloc_bytes'] is not None:
+        fields.append(f"alloc_mb={record['alloc_bytes'] / 2**20:.1f}")
+    if record['error']:
+        fields.append(f"error={record['error']}")
+    return ' '.join(fields)
+
+
+def instrumented(name=None, rows=None):
+    """Decorator recording a stage per call of the wrapped method.
+
+    ``rows(self, result)`` returns the rows the call processed, if known.
+    """
+    def decorate(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state['enabled']:
+                return func(*args, **kwargs)
+            with _Stage(stage_name) as running:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    running.rows = rows(args[0], result)
+            return result
+        return wrapper
+    return decorate
+
+
+def summary(stage_records=None):
+    """Per-stage totals: calls, wall/CPU seconds, rows, peak RSS and allocations."""
+    totals = {}
+    for record in records() if stage_records is None else stage_records:
+        total = totals.setdefault(record['stage'], {
+            'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': None,
+            'peak_rss_bytes': None, 'alloc_bytes': None,
+        })
+        total['calls'] += 1
+        total['wall_s'] += record['wall_s']
+        total['cpu_s'] += record['cpu_s']
+        if record['rows'] is not None:
+            total['rows'] = (total['rows'] or 0) + record['rows']
+        if record['peak_rss_bytes'] is not None:
+            total['peak_rss_bytes'] = max(total['peak_rss_bytes'] or 0, record['peak_rss_bytes'])
+        if record['alloc_bytes'] is not None:
+            total['alloc_bytes'] = max(total['alloc_bytes'] or 0, record['alloc_bytes'])
+    return totals
+
+
+def summary_table(stage_records=None):
+    """The per-stage totals as a text table, slowest first.
+
+    Nested stages are included in their callers' times as well as their own.
+    """
+    totals = summary(stage_records)
+    lines = [f"{'Stage':<52} {'Calls':>5} {'Wall s':>9} {'CPU s':>9} {'Rows':>12} {'RSS MB':>8} {'Alloc MB':>9}"]
+    for name, total in sorted(totals.items(), key=lambda item: -item[1]['wall_s']):
+        rows = f"{total['rows']:,}" if total['rows'] is not None else '-'
+        rss = f"{total['peak_rss_bytes'] / 2**20:.1f}" if total['peak_rss_bytes'] is not None else '-'
+        alloc = f"{total['alloc_bytes'] / 2**20:.1f}" if total['alloc_bytes'] is not None else '-'
+        lines.append(f"{name:<52} {total['calls']:>5} {total['wall_s']:>9.3f} {total['cpu_s']:>9.3f} "
+                     f"{rows:>12} {rss:>8} {alloc:>9}")
+    return '\n'.join(lines)
+
+
+if _state['enabled']:
+    enable()
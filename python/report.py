@@ -0,0 +1,165 @@
+"""
+SmartPay Analytics - Executive Summary Report
+=============================================
+
+The executive summary as a structured object (key metrics, top insights,
+recommendations and next steps), built once and rendered to text, JSON,
+Markdown or HTML. Renderers are pure functions of the summary, so one
+summary can be rendered to every format, concurrently if need be.
+"""
+
+import html
+import json
+import math
+import os
+from datetime import datetime
+
+# (key, label, format) for each key metric, in report order.
+KEY_METRICS = [
+    ('total_users', 'Total Users', '{:,}'),
+    ('monthly_active_users', 'Monthly Active Users', '{:,}'),
+    ('success_rate', 'Transaction Success Rate', '{:.1f}%'),
+    ('avg_transaction_value', 'Average Transaction Value', '${:.2f}'),
+    ('total_revenue', 'Total Revenue', '${:,.2f}'),
+    ('churn_rate', 'Churn Rate', '{:.1f}%'),
+]
+
+NEXT_STEPS = [
+    'Review and prioritize recommendations',
+    'Assign ownership and timelines',
+    'Implement monitoring for key metrics',
+    'Schedule follow-up review in 30 days',
+]
+
+TITLE = 'SmartPay Executive Summary Report'
+
+# File extensions accepted by export_insights_report, per format.
+FORMAT_EXTENSIONS = {
+    '.txt': 'text',
+    '.json': 'json',
+    '.md': 'markdown',
+    '.html': 'html',
+    '.htm': 'html',
+}
+
+
+def _plain(value):
+    """NumPy scalars as Python numbers, so the summary serialises to JSON."""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _json_value(value):
+    """Non-finite floats (e.g. a NaN average over no transactions) as JSON ``null``."""
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+class ExecutiveSummary:
+    """Key metrics, top insights and recommendations for one report.
+
+    ``metrics`` maps the keys of ``KEY_METRICS`` to values. ``insights`` are
+    dicts with ``type``, ``insight``, ``impact`` and ``action``.
+    ``recommendations`` are dicts with a ``category`` and its
+    ``recommendations`` list.
+    """
+
+    def __init__(self, metrics, insights, recommendations, generated_at=None, next_steps=None):
+        self.metrics = {key: _plain(value) for key, value in metrics.items()}
+        self.insights = [dict(insight) for insight in insights]
+        self.recommendations = [
+            {'category': category['category'], 'recommendations': list(category['recommendations'])}
+            for category in recommendations
+        ]
+        self.generated_at = generated_at or datetime.now()
+        self.next_steps = list(NEXT_STEPS if next_steps is None else next_steps)
+
+    def metric_lines(self):
+        """``(label, formatted value)`` for each key metric present."""
+        return [(label, fmt.format(self.metrics[key])) for key, label, fmt in KEY_METRICS if key in self.metrics]
+
+    def to_dict(self):
+        return {
+            'title': TITLE,
+            'generated_at': self.generated_at.isoformat(timespec='seconds'),
+            'metrics': {key: _json_value(value) for key, value in self.metrics.items()},
+            'insights': [dict(insight) for insight in self.insights],
+            'recommendations': [dict(category) for category in self.recommendations],
+            'next_steps': list(self.next_steps),
+        }
+
+
+def render_text(summary):
+    lines = [f"🎯 {TITLE}", "=" * 50, f"Generated on: {summary.generated_at.strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    lines.append("📊 KEY METRICS")
+    lines += [f"• {label}: {value}" for label, value in summary.metric_lines()]
+    lines += ["", "🔍 TOP INSIGHTS"]
+    lines += [f"{i}. {insight['insight']}" for i, insight in enumerate(summary.insights, 1)]
+    lines += ["", "🎯 STRATEGIC RECOMMENDATIONS"]
+    for category in summary.recommendations:
+        lines += ["", f"{category['category']}:"]
+        lines += [f"  {i}. {rec}" for i, rec in enumerate(category['recommendations'], 1)]
+    lines += ["", "=" * 50, "📈 NEXT STEPS"]
+    lines += [f"{i}. {step}" for i, step in enumerate(summary.next_steps, 1)]
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(summary):
+    return json.dumps(summary.to_dict(), indent=2, ensure_ascii=False, allow_nan=False) + '\n'
+
+
+def render_markdown(summary):
+    lines = [f"# {TITLE}", "", f"_Generated on {summary.generated_at.strftime('%Y-%m-%d %H:%M:%S')}_", ""]
+    lines += ["## Key Metrics", "", "| Metric | Value |", "| --- | --- |"]
+    lines += [f"| {label} | {value} |" for label, value in summary.metric_lines()]
+    lines += ["", "## Top Insights", ""]
+    lines += [f"{i}. **{insight['type']}**: {insight['insight']}" for i, insight in enumerate(summary.insights, 1)]
+    lines += ["", "## Strategic Recommendations"]
+    for category in summary.recommendations:
+        lines += ["", f"### {category['category']}", ""]
+        lines += [f"{i}. {rec}" for i, rec in enumerate(category['recommendations'], 1)]
+    lines += ["", "## Next Steps", ""]
+    lines += [f"{i}. {step}" for i, step in enumerate(summary.next_steps, 1)]
+    return '\n'.join(lines) + '\n'
+
+
+def render_html(summary):
+    esc = html.escape
+    parts = [
+        '<!DOCTYPE html>', '<html lang="en">', '<head>', '<meta charset="utf-8">',
+        f'<title>{esc(TITLE)}</title>', '</head>', '<body>',
+        f'<h1>{esc(TITLE)}</h1>',
+        f'<p class="generated">Generated on {summary.generated_at.strftime("%Y-%m-%d %H:%M:%S")}</p>',
+        '<h2>Key Metrics</h2>', '<table class="metrics">',
+    ]
+    parts += [f'<tr><th>{esc(label)}</th><td>{esc(value)}</td></tr>' for label, value in summary.metric_lines()]
+    parts += ['</table>', '<h2>Top Insights</h2>', '<ol class="insights">']
+    parts += [f'<li data-impact="{esc(insight["impact"])}"><strong>{esc(insight["type"])}</strong>: '
+              f'{esc(insight["insight"])}</li>' for insight in summary.insights]
+    parts += ['</ol>', '<h2>Strategic Recommendations</h2>']
+    for category in summary.recommendations:
+        parts += [f'<h3>{esc(category["category"])}</h3>', '<ol>']
+        parts += [f'<li>{esc(rec)}</li>' for rec in category['recommendations']]
+        parts.append('</ol>')
+    parts += ['<h2>Next Steps</h2>', '<ol>']
+    parts += [f'<li>{esc(step)}</li>' for step in summary.next_steps]
+    parts += ['</ol>', '</body>', '</html>']
+    return '\n'.join(parts) + '\n'
+
+
+RENDERERS = {
+    'text': render_text,
+    'json': render_json,
+    'markdown': render_markdown,
+    'html': render_html,
+}
+
+
+def render(summary, file_format='text'):
+    """Render ``summary`` as ``'text'``, ``'json'``, ``'markdown'`` or ``'html'``."""
+    if file_format not in RENDERERS:
+        raise ValueError(f"Unknown report format: {file_format!r} (expected one of {', '.join(RENDERERS)})")
+    return RENDERERS[file_format](summary)
+
+
+def format_for_path(path):
+    """The report format implied by a file's extension (text if unrecognised)."""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'text')
@@ -0,0 +1,230 @@
+"""
+SmartPay Analytics - Segment Reports
+====================================
+
+Executive summaries for every segment of a dimension at once: user
+``location``, age group (``SEGMENTATION_CONFIG['age_groups']``) or
+``feature``. Transactions, users and activity rows are mapped to a segment
+code once, and every metric and insight input is a ``bincount`` over
+``segment * n + key`` codes. The cost therefore grows with the data size, not
+with data size x segments.
+
+Each summary matches what ``SmartPayInsightsGenerator`` reports for a
+processor holding only that segment's users, transactions and activity. The
+high-value threshold is always the exact per-segment percentile.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import config
+from derived import DAY_NAMES, derived_features
+from insights_generator import (behavior_insights, churn_insights, executive_summary, feature_insights,
+                                revenue_insights, strategic_recommendations)
+from instrumentation import instrumented
+
+DIMENSIONS = ('location', 'age_group', 'feature')
+
+_NS_PER_DAY = 86_400 * 10**9
+# Weekday columns in the alphabetical order the aggregates report them in.
+_ALPHABETICAL_DAYS = sorted(range(len(DAY_NAMES)), key=lambda day: DAY_NAMES[day])
+
+
+def age_groups(ages, groups=None):
+    """Age group label per age, from inclusive ``(low, high)`` bounds; missing if none applies."""
+    if groups is None:
+        groups = config.SEGMENTATION_CONFIG['age_groups']
+    ages = np.asarray(ages)
+    codes = np.full(len(ages), -1, dtype=np.int8)
+    for code, (low, high) in enumerate(groups.values()):
+        codes[(ages >= low) & (ages <= high)] = code
+    return pd.Categorical.from_codes(codes, categories=list(groups))
+
+
+class SegmentReports:
+    """Per-segment metrics and executive summaries for one processor's data.
+
+    ``now`` fixes the reference time for the activity windows (default: when
+    the object is created), so every segment is measured against the same
+    instant.
+    """
+
+    def __init__(self, processor, now=None):
+        if getattr(processor, 'streaming', False):
+            raise ValueError("Segment reports need the tables in memory and are unavailable in streaming mode")
+        self.processor = processor
+        self.now = pd.Timestamp(now if now is not None else datetime.now())
+        self._arrays = None
+
+    def _prepare(self):
+        """Per-row arrays shared by every dimension, built on first use."""
+        if self._arrays is not None:
+            return self._arrays
+        transactions = self.processor.transactions_df
+        users = self.processor.users_df
+        activity = self.processor.activity_df
+
+        tx_user = transactions['user_id'].to_numpy(dtype=np.int64)
+        user_ids = users['user_id'].to_numpy(dtype=np.int64)
+        activity_user = activity['user_id'].to_numpy(dtype=np.int64)
+        size = int(max(tx_user.max(initial=-1), user_ids.max(initial=-1), activity_user.max(initial=-1))) + 1
+
+        feature_codes, features = pd.factorize(transactions['feature'], sort=True)
+        timestamp = transactions['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        derived = derived_features(transactions)
+
+        # Activity rows per user, and how many are churned (inactive 30+ days)
+        # or at risk (7-30 whole days inactive), as the metrics count rows.
+        now_ns = self.now.as_unit('ns').value
+        last = activity['last_transaction_date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        churned = last < (self.now - timedelta(days=30)).as_unit('ns').value
+        days_inactive = (now_ns - last) // _NS_PER_DAY
+        at_risk = (days_inactive >= 7) & (days_inactive <= 30)
+
+        in_users = np.zeros(size, dtype=bool)
+        in_users[user_ids] = True
+        self._arrays = {
+            'size': size,
+            'tx_user': tx_user,
+            'feature': feature_codes,
+            'features': list(features),
+            'success': (transactions['status'] == 'Success').to_numpy(dtype=bool),
+            'amount': transactions['amount'].to_numpy(dtype=np.float64),
+            'recent': timestamp >= (self.now - timedelta(days=90)).as_unit('ns').value,
+            'hour': derived.hour.to_numpy(dtype=np.int64),
+            'day': derived.day_of_week.to_numpy(dtype=np.int64),
+            'users': users,
+            'user_ids': user_ids,
+            'in_users': in_users,
+            'activity_rows': np.bincount(activity_user, minlength=size),
+            'churned_rows': np.bincount(activity_user[churned], minlength=size),
+            'at_risk_rows': np.bincount(activity_user[at_risk], minlength=size),
+        }
+        return self._arrays
+
+    def _segments(self, dimension):
+        """Segment labels, the segment code per transaction and the (segment, user) members.
+
+        Users belong to a location or age group through the users table, and
+        to a feature by having used it.
+        """
+        arrays = self._prepare()
+        size = arrays['size']
+        if dimension == 'feature':
+            labels = arrays['features']
+            tx_segment = arrays['feature'].astype(np.int64)
+            used = tx_segment >= 0
+            members = np.unique(tx_segment[used] * size + arrays['tx_user'][used])
+            member_segment, member_user = members // size, members % size
+            keep = arrays['in_users'][member_user]
+            return labels, tx_segment, member_segment[keep], member_user[keep]
+        if dimension == 'location':
+            codes, labels = pd.factorize(arrays['users']['location'], sort=True)
+            labels = list(labels)
+        elif dimension == 'age_group':
+            groups = age_groups(arrays['users']['age'])
+            codes, labels = groups.codes.astype(np.int64), list(groups.categories)
+        else:
+            raise ValueError(f"Unknown segment dimension: {dimension!r} (expected one of {', '.join(DIMENSIONS)})")
+        user_segment = np.full(size, -1, dtype=np.int64)
+        user_segment[arrays['user_ids']] = codes
+        grouped = codes >= 0
+        return labels, user_segment[arrays['tx_user']], codes[grouped].astype(np.int64), arrays['user_ids'][grouped]
+
+    def metrics(self, dimension):
+        """One row per segment with the key metrics and the inputs of every insight."""
+        arrays = self._prepare()
+        labels, segment, member_segment, member_user = self._segments(dimension)
+        n, size, n_features = len(labels), arrays['size'], len(arrays['features'])
+        present = segment >= 0
+        succeeded = present & arrays['success']
+        seg, user, feature = segment[present], arrays['tx_user'][present], arrays['feature'][present]
+        seg_ok, user_ok, amount_ok = segment[succeeded], arrays['tx_user'][succeeded], arrays['amount'][succeeded]
+
+        tx_count = np.bincount(seg, minlength=n)
+        success_count = np.bincount(seg_ok, minlength=n)
+        revenue = np.bincount(seg_ok, weights=amount_ok, minlength=n)
+        recent = arrays['recent'][present]
+        active = np.unique(seg[recent] * size + user[recent]) // size
+        activity_rows = np.bincount(member_segment, weights=arrays['activity_rows'][member_user], minlength=n)
+        churned_rows = np.bincount(member_segment, weights=arrays['churned_rows'][member_user], minlength=n)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame = pd.DataFrame({
+                'total_users': np.bincount(member_segment, minlength=n),
+                'mau_last_3_months': np.bincount(active, minlength=n),
+                'churn_rate': churned_rows / activity_rows * 100,
+                'transaction_count': tx_count,
+                'success_rate': success_count / tx_count * 100,
+                'avg_transaction_value': revenue / success_count,
+                'total_revenue': revenue,
+                'at_risk_users': np.bincount(member_segment, weights=arrays['at_risk_rows'][member_user],
+                                             minlength=n).astype(np.int64),
+            }, index=pd.Index(labels, name=dimension))
+
+        # Busiest hour and weekdays; weekdays without transactions are not candidates.
+        hourly = np.bincount(seg * 24 + arrays['hour'][present], minlength=n * 24).reshape(n, 24)
+        frame['peak_hour'] = hourly.argmax(axis=1)
+        frame['peak_count'] = hourly.max(axis=1)
+        daily = np.bincount(seg * 7 + arrays['day'][present], minlength=n * 7).reshape(n, 7)[:, _ALPHABETICAL_DAYS]
+        day_names = np.array([DAY_NAMES[day] for day in _ALPHABETICAL_DAYS], dtype=object)
+        frame['busiest_day'] = day_names[daily.argmax(axis=1)]
+        frame['slowest_day'] = day_names[np.where(daily > 0, daily, np.iinfo(np.int64).max).argmin(axis=1)]
+
+        # Per-feature revenue and success rate, over the features each segment used.
+        # Rows without a feature count toward the segment totals above but not here.
+        has_feature = feature >= 0
+        feature_tx = np.bincount(seg[has_feature] * n_features + feature[has_feature],
+                                 minlength=n * n_features).reshape(n, n_features)
+        feature_ok_code = arrays['feature'][succeeded]
+        ok_has_feature = feature_ok_code >= 0
+        feature_ok_key = seg_ok[ok_has_feature] * n_features + feature_ok_code[ok_has_feature]
+        feature_ok = np.bincount(feature_ok_key, minlength=n * n_features).reshape(n, n_features)
+        feature_revenue = np.bincount(feature_ok_key, weights=amount_ok[ok_has_feature],
+                                      minlength=n * n_features).reshape(n, n_features)
+        used = feature_tx > 0
+        features = np.array(arrays['features'] or [None], dtype=object)
+        top = np.where(used, feature_revenue, -np.inf).argmax(axis=1) if n_features else np.zeros(n, dtype=int)
+        frame['top_feature'] = features[top]
+        frame['top_feature_revenue'] = feature_revenue[np.arange(n), top] if n_features else 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            feature_rate = np.where(used, feature_ok / feature_tx * 100, np.inf)
+        lowest = feature_rate.argmin(axis=1) if n_features else np.zeros(n, dtype=int)
+        frame['lowest_success_feature'] = features[lowest]
+        frame['lowest_success_rate'] = feature_rate[np.arange(n), lowest] if n_features else np.nan
+
+        # High-value users: revenue per (segment, user), thresholded at each segment's percentile.
+        percentile = config.INSIGHT_THRESHOLDS['high_value_user_percentile']
+        keys, inverse = np.unique(seg_ok * size + user_ok, return_inverse=True)
+        user_revenue = np.bincount(inverse, weights=amount_ok, minlength=len(keys))
+        revenue_segment = keys // size
+        threshold = pd.Series(user_revenue).groupby(revenue_segment).quantile(percentile)
+        threshold = threshold.reindex(range(n)).to_numpy()
+        high = user_revenue >= threshold[revenue_segment]
+        frame['high_value_users'] = np.bincount(revenue_segment[high], minlength=n)
+        frame['high_value_revenue'] = np.bincount(revenue_segment[high], weights=user_revenue[high], minlength=n)
+        return frame
+
+    def summaries(self, dimension):
+        """``ExecutiveSummary`` per segment of ``dimension``, keyed by segment label."""
+        percentile = config.INSIGHT_THRESHOLDS['high_value_user_percentile']
+        summaries = {}
+        for label, row in self.metrics(dimension).iterrows():
+            behavior, revenue, churn, feature = [], [], churn_insights(row['at_risk_users']), []
+            if row['transaction_count'] > 0:
+                behavior = behavior_insights(row['peak_hour'], row['peak_count'],
+                                             row['busiest_day'], row['slowest_day'])
+                revenue = revenue_insights(row['high_value_users'], percentile, row['high_value_revenue'],
+                                           row['top_feature'], row['top_feature_revenue'])
+                feature = feature_insights(row['lowest_success_feature'], row['lowest_success_rate'])
+            summaries[label] = executive_summary(
+                row, row, behavior, revenue, strategic_recommendations(behavior + revenue + churn + feature),
+                generated_at=self.now.to_pydatetime(),
+            )
+        return summaries
+
+    @instrumented(rows=lambda reports, result: len(reports.processor.transactions_df))
+    def reports(self, dimensions=DIMENSIONS):
+        """Summaries for every segment of each dimension, as ``{dimension: {segment: summary}}``."""
+        return {dimension: self.summaries(dimension) for dimension in dimensions}
@@ -0,0 +1,245 @@
+"""
+SmartPay Analytics - Approximate Distinct Counts and Quantiles
+==============================================================
+
+HyperLogLog sketches for distinct-user counts. A sketch is a small array of
+registers; sketches built over different chunks, days or shards merge by an
+element-wise maximum, so counts can be served from persisted sketches without
+keeping the exact sets of user IDs.
+
+KLL sketches for quantiles: a bounded number of retained values whose rank
+error shrinks with ``k``, mergeable across chunks and shards.
+"""
+
+import math
+
+import numpy as np
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def precision_for_error(relative_error):
+    """Smallest precision whose standard error (1.04 / sqrt(2**p)) is within ``relative_error``."""
+    if not 0 < relative_error < 1:
+        raise ValueError(f"relative_error must be in (0, 1), got {relative_error}")
+    precision = math.ceil(math.log2((1.04 / relative_error) ** 2))
+    return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+
+def _hash64(values):
+    """SplitMix64 finaliser over integer IDs (wrapping uint64 arithmetic)."""
+    x = np.asarray(values).astype(np.uint64)
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _bit_length(values):
+    lengths = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        lengths[high] += shift
+        values = np.where(high, values >> np.uint64(shift), values)
+    return lengths + (values > 0)
+
+
+def _registers(values, precision):
+    """Register index and rank (position of the first set bit) per value."""
+    hashed = _hash64(values)
+    tail_bits = 64 - precision
+    index = (hashed >> np.uint64(tail_bits)).astype(np.int64)
+    tail = hashed & np.uint64((1 << tail_bits) - 1)
+    rank = (tail_bits + 1 - _bit_length(tail)).astype(np.uint8)
+    return index, rank
+
+
+def _estimate(registers):
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        # Linear counting is more accurate while many registers are still empty.
+        return m * math.log(m / zeros)
+    return estimate
+
+
+class HyperLogLog:
+    """Mergeable distinct counter with relative standard error 1.04 / sqrt(2**precision)."""
+
+    def __init__(self, precision=12, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    def add(self, values):
+        index, rank = _registers(values, self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        return int(round(_estimate(self.registers)))
+
+
+class DailyHyperLogLog:
+    """One HyperLogLog per calendar day, stored as a ``(days, 2**precision)`` array.
+
+    Counts over a date range merge the days in it, so windows such as "the last
+    30 days" are answered at day granularity.
+    """
+
+    def __init__(self, precision=12):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        # Day number (days since the epoch) of the first row.
+        self.origin = 0
+        self.registers = np.zeros((0, 1 << precision), dtype=np.uint8)
+
+    @property
+    def days(self):
+        return self.registers.shape[0]
+
+    def _cover(self, first, last):
+        """Extend the day range to include days ``first`` through ``last``."""
+        if self.days == 0:
+            self.origin = first
+            self.registers = np.zeros((last - first + 1, 1 << self.precision), dtype=np.uint8)
+            return
+        before = max(0, self.origin - first)
+        after = max(0, last - (self.origin + self.days - 1))
+        if before or after:
+            self.registers = np.pad(self.registers, [(before, after), (0, 0)])
+            self.origin -= before
+
+    def add(self, values, timestamps_ns):
+        """Add IDs ``values`` seen at ``timestamps_ns`` (int64 ns since the epoch)."""
+        values = np.asarray(values)
+        if len(values) == 0:
+            return self
+        day = np.asarray(timestamps_ns, dtype=np.int64) // _NS_PER_DAY
+        self._cover(int(day.min()), int(day.max()))
+        index, rank = _registers(values, self.precision)
+        np.maximum.at(self.registers, (day - self.origin, index), rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        if other.days == 0:
+            return self
+        self._cover(other.origin, other.origin + other.days - 1)
+        start = other.origin - self.origin
+        window = self.registers[start:start + other.days]
+        np.maximum(window, other.registers, out=window)
+        return self
+
+    def sketch(self, since_ns=None):
+        """A single ``HyperLogLog`` over the days from ``since_ns`` onwards."""
+        start = 0
+        if since_ns is not None:
+            start = min(max(0, int(since_ns) // _NS_PER_DAY - self.origin), self.days)
+        registers = self.registers[start:].max(axis=0, initial=0)
+        return HyperLogLog(self.precision, registers.astype(np.uint8))
+
+    def count(self, since_ns=None):
+        if self.days == 0:
+            return 0
+        return self.sketch(since_ns).count()
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (KLL) retaining O(k) values.
+
+    Level ``h`` holds values that each stand for ``2**h`` inputs. A level that
+    outgrows its capacity is sorted and every other value is promoted to the
+    next level, so the normalized rank error is roughly ``1.7 / k``.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.zeros(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0))
+        for level, values in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            values = self.levels[level]
+            if len(values) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                values = np.sort(values)
+                # An odd leftover stays at this level; the rest is halved upwards.
+                keep = values[:len(values) % 2]
+                pairs = values[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def retained(self):
+        return sum(len(values) for values in self.levels)
+
+    def _weighted(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2 ** level, dtype=np.int64)
+                                  for level, v in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, quantiles):
+        """Approximate values at each of ``quantiles`` (fractions in [0, 1])."""
+        quantiles = np.atleast_1d(np.asarray(quantiles, dtype=np.float64))
+        if self.n == 0:
+            return np.full(len(quantiles), np.nan)
+        values, cumulative = self._weighted()
+        targets = quantiles * cumulative[-1]
+        positions = np.searchsorted(cumulative, targets, side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value):
+        """Approximate fraction of inputs at or below ``value``."""
+        if self.n == 0:
+            return np.nan
+        values, cumulative = self._weighted()
+        position = np.searchsorted(values, value, side='right')
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
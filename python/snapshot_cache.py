@@ -0,0 +1,90 @@
+"""
+SmartPay Analytics - On-Disk Snapshot Cache
+===========================================
+
+Stores parsed, typed DataFrames as Arrow IPC files keyed on the source file's
+path, size, modification time and how it was parsed (schema version), and
+memory-maps them on later runs so startup skips CSV parsing entirely.
+"""
+
+import hashlib
+import json
+import os
+
+SNAPSHOT_SUFFIX = '.arrow'
+
+
+class SnapshotCache:
+    """Content-keyed cache of parsed frames with a least-recently-used size cap.
+
+    Entries are looked up by a hash of the source file's identity, so editing
+    or replacing a CSV simply misses the cache; stale entries age out under the
+    size cap. Recency is tracked through each snapshot's modification time.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+
+    def key(self, source_path, parse_spec):
+        """Hash of the source file identity and the JSON-able ``parse_spec``."""
+        stat = os.stat(source_path)
+        identity = {
+            'path': os.path.abspath(source_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'parse_spec': parse_spec,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + SNAPSHOT_SUFFIX)
+
+    def get(self, source_path, parse_spec):
+        """Return the cached frame for ``source_path``, or None on a miss."""
+        import pyarrow as pa
+
+        path = self._path(self.key(source_path, parse_spec))
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+    def put(self, source_path, parse_spec, df):
+        import pyarrow as pa
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(self.key(source_path, parse_spec))
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = path + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        """Snapshot files as ``(path, size, last_used)``, oldest first."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(SNAPSHOT_SUFFIX):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((os.path.join(self.cache_dir, name), stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        """Delete least recently used snapshots until under ``max_bytes``."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
@@ -0,0 +1,108 @@
+"""
+SmartPay Analytics - Per-User Index
+===================================
+
+Point lookups of a single user's profile. Transactions are ordered by user
+once, with CSR-style offsets so each user's rows are a contiguous slice, and
+the per-user totals, per-feature counts, joined user/activity attributes and
+value segment are held in arrays indexed by ``user_id``. A lookup is then a
+handful of array reads rather than a scan of every frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from aggregates import NEVER_SEEN
+
+
+class UserIndex:
+    """Dense per-user index over the transactions and the joined user summary.
+
+    ``user_summary`` is the users table left-joined with activity (one row per
+    user); ``value_segments`` maps ``user_id`` to its value segment label.
+    User IDs are non-negative integers, as in ``TransactionAggregates``.
+    """
+
+    def __init__(self, transactions_df, user_summary, value_segments=None):
+        user = transactions_df['user_id'].to_numpy(dtype=np.int64)
+        summary_ids = user_summary['user_id'].to_numpy(dtype=np.int64)
+        size = int(max(user.max(initial=-1), summary_ids.max(initial=-1))) + 1
+
+        order = np.argsort(user, kind='stable')
+        self.transactions = transactions_df.take(order)
+        # offsets[u]:offsets[u + 1] are user u's rows in self.transactions.
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user, minlength=size), out=self.offsets[1:])
+
+        feature_codes, features = pd.factorize(transactions_df['feature'], sort=True)
+        self.features = list(features)
+        success = (transactions_df['status'] == 'Success').to_numpy(dtype=bool)
+        amount = transactions_df['amount'].to_numpy(dtype=np.float64)
+        seen_ns = transactions_df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        self.success_count = np.bincount(user[success], minlength=size)
+        self.revenue = np.bincount(user[success], weights=amount[success], minlength=size)
+        # Rows without a feature stay in the user's transactions but have no feature count.
+        has_feature = feature_codes >= 0
+        self.feature_counts = np.bincount(
+            user[has_feature] * len(self.features) + feature_codes[has_feature],
+            minlength=size * len(self.features)
+        ).reshape(size, len(self.features))
+        self.last_seen = np.full(size, NEVER_SEEN, dtype=np.int64)
+        np.maximum.at(self.last_seen, user, seen_ns)
+
+        # Attribute columns as arrays, so a lookup does not build a row Series.
+        self.attributes = {column: user_summary[column].to_numpy()
+                           for column in user_summary.columns if column != 'user_id'}
+        self.summary_row = np.full(size, -1, dtype=np.int64)
+        self.summary_row[summary_ids] = np.arange(len(summary_ids))
+
+        self.segment_labels = []
+        self.segment_codes = np.full(size, -1, dtype=np.int64)
+        if value_segments is not None:
+            segments = pd.Categorical(value_segments)
+            self.segment_labels = [str(label) for label in segments.categories]
+            self.segment_codes[value_segments.index.to_numpy(dtype=np.int64)] = segments.codes
+
+    @property
+    def size(self):
+        return len(self.offsets) - 1
+
+    def __contains__(self, user_id):
+        return 0 <= user_id < self.size and (
+            self.summary_row[user_id] >= 0 or self.offsets[user_id + 1] > self.offsets[user_id]
+        )
+
+    def user_transactions(self, user_id):
+        """The user's transactions as a contiguous slice of the user-ordered frame."""
+        if user_id not in self:
+            raise KeyError(user_id)
+        return self.transactions.iloc[self.offsets[user_id]:self.offsets[user_id + 1]]
+
+    def profile(self, user_id):
+        """Attributes, revenue, transaction counts, last activity and segment for one user."""
+        if user_id not in self:
+            raise KeyError(user_id)
+        profile = {'user_id': int(user_id)}
+        row = self.summary_row[user_id]
+        for column, values in self.attributes.items():
+            value = values[row] if row >= 0 else None
+            if pd.isna(value):
+                value = None
+            elif isinstance(value, np.datetime64):
+                value = pd.Timestamp(value)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            profile[column] = value
+        counts = self.feature_counts[user_id]
+        profile['transaction_count'] = int(self.offsets[user_id + 1] - self.offsets[user_id])
+        profile['successful_transactions'] = int(self.success_count[user_id])
+        profile['total_revenue'] = float(self.revenue[user_id])
+        profile['transactions_by_feature'] = {
+            feature: int(count) for feature, count in zip(self.features, counts) if count
+        }
+        last_seen = self.last_seen[user_id]
+        profile['last_transaction'] = None if last_seen == NEVER_SEEN else pd.Timestamp(last_seen)
+        code = self.segment_codes[user_id]
+        profile['value_segment'] = self.segment_labels[code] if code >= 0 else None
+        return profile
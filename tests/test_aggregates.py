@@ -0,0 +1,211 @@
+"""
+Test suite for SmartPay Analytics mergeable transaction aggregates.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from aggregates import TransactionAggregates, feature_stats, frame_aggregates, invalidate_frame_aggregates
+
+@pytest.fixture
+def transactions():
+    """Create a small transactions frame with the production schema."""
+    return pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4, 5, 6, 7, 8],
+        'user_id': [1, 1, 2, 2, 3, 7, 7, 3],
+        'feature': ['Top-up', 'QR Scan', 'Top-up', 'Bill Payment', 'QR Scan', 'Top-up', 'QR Scan', 'Top-up'],
+        'amount': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0],
+        'timestamp': pd.to_datetime([
+            '2024-12-01 10:00:00', '2024-12-02 14:30:00', '2024-12-01 16:45:00',
+            '2024-12-03 09:15:00', '2024-12-02 11:20:00', '2024-12-07 13:40:00',
+            '2024-12-08 08:30:00', '2024-12-09 17:15:00'
+        ]),
+        'status': ['Success', 'Failed', 'Success', 'Success', 'Abandoned', 'Success', 'Success', 'Failed']
+    })
+
+class TestFeatureStats:
+    """Test cases for the vectorized per-feature stats kernel."""
+
+    @pytest.mark.parametrize('categorical', [False, True])
+    def test_matches_groupby(self, transactions, categorical):
+        """Kernel output equals a straightforward pandas groupby."""
+        if categorical:
+            transactions = transactions.astype({'feature': 'category', 'status': 'category'})
+        stats = feature_stats(transactions)
+        successful = transactions[transactions['status'] == 'Success']
+        revenue = successful.groupby('feature', observed=True)['amount'].sum()
+
+        assert list(stats.index) == ['Bill Payment', 'QR Scan', 'Top-up']
+        assert stats.loc['Top-up', 'transaction_count'] == 4
+        assert stats.loc['Top-up', 'success_count'] == 3
+        assert stats.loc['Top-up', 'success_rate'] == pytest.approx(75.0)
+        assert stats.loc['QR Scan', 'avg_transaction_value'] == pytest.approx(70.0)
+        assert list(revenue.index) == list(stats.index)
+        np.testing.assert_allclose(stats['total_revenue'].to_numpy(), revenue.to_numpy())
+
+    def test_unused_categories_and_float32(self, transactions):
+        """Unused categories are dropped and float32 amounts sum in float64."""
+        transactions = transactions.astype({'amount': 'float32'})
+        transactions['feature'] = pd.Categorical(
+            transactions['feature'], categories=['Bill Payment', 'Investments', 'QR Scan', 'Top-up']
+        )
+        stats = feature_stats(transactions)
+
+        assert 'Investments' not in stats.index
+        assert stats['total_revenue'].dtype == np.float64
+
+class TestTransactionAggregates:
+    """Test cases for TransactionAggregates."""
+
+    def test_totals(self, transactions):
+        """Counts, success revenue and distinct users match pandas."""
+        aggregates = TransactionAggregates.from_frame(transactions)
+        metrics = aggregates.transaction_metrics()
+        successful = transactions[transactions['status'] == 'Success']
+
+        assert aggregates.rows == len(transactions)
+        assert metrics['success_rate'] == pytest.approx(len(successful) / len(transactions) * 100)
+        assert metrics['total_revenue'] == pytest.approx(successful['amount'].sum())
+        assert aggregates.distinct_users() == transactions['user_id'].nunique()
+        assert aggregates.distinct_users(since='2024-12-07') == 2
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 5])
+    def test_chunked_equals_whole(self, transactions, chunk_size):
+        """Folding chunks gives the same result as one pass over the frame."""
+        whole = TransactionAggregates.from_frame(transactions)
+        chunks = [transactions.iloc[i:i + chunk_size] for i in range(0, len(transactions), chunk_size)]
+        chunked = TransactionAggregates.from_chunks(chunks)
+
+        pd.testing.assert_frame_equal(
+            whole.transaction_metrics()['feature_metrics'],
+            chunked.transaction_metrics()['feature_metrics']
+        )
+        np.testing.assert_array_equal(whole.last_seen(), chunked.last_seen())
+        assert whole.funnel_metrics(10) == chunked.funnel_metrics(10)
+
+    def test_missing_feature(self, transactions):
+        """Rows without a feature are left out of every feature but kept in the overall totals."""
+        transactions.loc[[1, 4], 'feature'] = np.nan
+        aggregates = TransactionAggregates.from_chunks([transactions.iloc[:3], transactions.iloc[3:]])
+        metrics = aggregates.transaction_metrics()
+        expected = feature_stats(transactions)
+
+        np.testing.assert_array_equal(metrics['feature_metrics']['transaction_count'].to_numpy(),
+                                      expected['transaction_count'].to_numpy())
+        assert aggregates.hourly.sum() == aggregates.daily.sum() == len(transactions) - 2
+        assert metrics['success_rate'] == pytest.approx(5 / 8 * 100)
+        assert metrics['total_revenue'] == pytest.approx(
+            transactions.loc[transactions['status'] == 'Success', 'amount'].sum())
+
+    def test_merge(self, transactions):
+        """Merging partials with different features and user ranges is exact."""
+        first = TransactionAggregates.from_frame(transactions.iloc[:3])
+        second = TransactionAggregates.from_frame(transactions.iloc[3:])
+        merged = first.merge(second)
+        whole = TransactionAggregates.from_frame(transactions)
+
+        pd.testing.assert_series_equal(merged.user_revenue_series(), whole.user_revenue_series())
+        np.testing.assert_array_equal(merged.hourly, whole.hourly[[whole.features.index(f) for f in merged.features]])
+
+    def test_save_load_roundtrip(self, transactions, tmp_path):
+        """Persisted aggregates load back identically and stay mergeable."""
+        aggregates = TransactionAggregates.from_frame(transactions.iloc[:5])
+        path = tmp_path / 'aggregates.npz'
+        aggregates.save(str(path))
+        loaded = TransactionAggregates.load(str(path))
+
+        assert loaded.features == aggregates.features
+        np.testing.assert_array_equal(loaded.user_last_seen, aggregates.user_last_seen)
+        loaded.update(transactions.iloc[5:])
+        assert loaded.transaction_metrics()['total_revenue'] == pytest.approx(
+            TransactionAggregates.from_frame(transactions).transaction_metrics()['total_revenue']
+        )
+
+    def test_sketches_merge_and_persist(self, transactions, tmp_path):
+        """Distinct-user sketches merge across chunks and survive save/load."""
+        merged = TransactionAggregates.from_frame(transactions.iloc[:4], sketch_precision=10)
+        merged.merge(TransactionAggregates.from_frame(transactions.iloc[4:], sketch_precision=10))
+        path = tmp_path / 'aggregates.npz'
+        merged.save(str(path))
+        loaded = TransactionAggregates.load(str(path))
+
+        assert loaded.sketch_precision == 10
+        assert loaded.distinct_users(approximate=True) == merged.distinct_users() == 4
+        assert loaded.distinct_users('2024-12-07', approximate=True) == merged.distinct_users('2024-12-07') == 2
+        assert loaded.funnel_metrics(10, approximate=True) == merged.funnel_metrics(10)
+        with pytest.raises(ValueError):
+            merged.merge(TransactionAggregates.from_frame(transactions))
+
+    def test_revenue_sketch(self, transactions):
+        """The per-user revenue sketch covers users with a successful transaction."""
+        aggregates = TransactionAggregates.from_frame(transactions)
+        sketch = aggregates.revenue_sketch(50, block_size=2)
+
+        assert sketch.n == len(aggregates.user_revenue_series())
+        assert sketch.quantile(1.0) == aggregates.user_revenue_series().max()
+
+    def test_feature_engagement(self, transactions):
+        """Hourly usage and retention are derived from the tallies."""
+        engagement = TransactionAggregates.from_frame(transactions).feature_engagement('2024-12-07')
+        expected_hourly = transactions.groupby(['feature', transactions['timestamp'].dt.hour]).size().unstack(fill_value=0)
+
+        assert engagement['hourly_usage'].to_numpy().tolist() == expected_hourly.to_numpy().tolist()
+        assert engagement['feature_retention']['Top-up'] == pytest.approx(2 / 4 * 100)
+        assert engagement['feature_retention']['Bill Payment'] == 0
+
+class TestFrameAggregates:
+    """Test cases for the shared lazily computed aggregate cache."""
+
+    def test_shared_per_frame(self, transactions):
+        """The same frame always maps to the same cache instance."""
+        aggregates = frame_aggregates(transactions)
+
+        assert frame_aggregates(transactions) is aggregates
+        assert frame_aggregates(transactions.copy()) is not aggregates
+
+    def test_computed_once(self, transactions):
+        """Cached aggregates are not recomputed on later access."""
+        aggregates = frame_aggregates(transactions)
+
+        assert aggregates.user_revenue is aggregates.user_revenue
+        assert aggregates.success_count == 5
+        assert aggregates.user_revenue.loc[7] == pytest.approx(130.0)
+        assert aggregates.feature_revenue.loc['Top-up'] == pytest.approx(100.0)
+
+    @pytest.mark.parametrize('start,end', [
+        ('2024-12-02', '2024-12-08'), (None, '2024-12-02 14:30:00'), ('2024-12-07', None),
+        ('2025-01-01', None), ('2024-12-05', '2024-12-01')
+    ])
+    def test_window_matches_mask(self, transactions, start, end):
+        """Binary-search windows select the same rows as boolean masks."""
+        mask = np.ones(len(transactions), dtype=bool)
+        if start is not None:
+            mask &= transactions['timestamp'] >= start
+        if end is not None:
+            mask &= transactions['timestamp'] < end
+        window = frame_aggregates(transactions).window(start, end)
+
+        assert window['timestamp'].is_monotonic_increasing
+        assert sorted(window['transaction_id']) == sorted(transactions.loc[mask, 'transaction_id'])
+
+    def test_window_on_sorted_frame_is_zero_copy(self, transactions):
+        """An already sorted frame is sliced without copying rows."""
+        ordered = transactions.sort_values('timestamp', ignore_index=True)
+        aggregates = frame_aggregates(ordered)
+
+        assert aggregates.time_sorted[0] is ordered
+        window = aggregates.window('2024-12-02', '2024-12-08')
+        assert np.shares_memory(window['amount'].to_numpy(), ordered['amount'].to_numpy())
+
+    def test_invalidate(self, transactions):
+        """Invalidation drops the cache so the next access recomputes."""
+        aggregates = frame_aggregates(transactions)
+        invalidate_frame_aggregates(transactions)
+
+        assert frame_aggregates(transactions) is not aggregates
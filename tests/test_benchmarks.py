@@ -0,0 +1,116 @@
+"""
+Test suite for the SmartPay Analytics benchmark harness.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import json
+import sys
+import os
+
+# Add the python and benchmarks directories to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from data_processing import SmartPayDataProcessor
+from synthetic_data import ensure_dataset, feature_probabilities, generate
+from bench_suite import measure, run_suite, scale_rows
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+class TestSyntheticData:
+    """Test cases for the synthetic data generator."""
+
+    def test_matches_source_schemas(self, tmp_path):
+        """Generated files have the columns of the shipped CSVs and load in the processor."""
+        paths = generate(str(tmp_path), users=50, transactions=600, chunk_size=250)
+
+        for key, source in [('users_file', 'smartpay_users.csv'),
+                            ('transactions_file', 'smartpay_transactions.csv'),
+                            ('activity_file', 'smartpay_app_activity.csv')]:
+            expected = pd.read_csv(os.path.join(ROOT, source), nrows=1).columns.tolist()
+            assert pd.read_csv(paths[key], nrows=1).columns.tolist() == expected
+
+        processor = SmartPayDataProcessor(**paths, lazy=False, cache=False)
+        assert len(processor.transactions_df) == 600
+        assert processor.transactions_df['transaction_id'].is_unique
+        assert processor.transactions_df['user_id'].between(1, 50).all()
+        assert processor.get_transaction_metrics()['feature_metrics']['transaction_count'].sum() == 600
+
+    def test_skew_and_failure_rates(self, tmp_path):
+        """Feature skew and failure rates shape the generated mix."""
+        paths = generate(str(tmp_path), users=100, transactions=20000, feature_skew=1.5,
+                         failure_rate={'QR Scan': 0.5}, abandon_rate=0.0)
+        tx = pd.read_csv(paths['transactions_file'])
+
+        shares = tx['feature'].value_counts(normalize=True)
+        assert shares.idxmax() == 'Investments'
+        assert shares['Investments'] == pytest.approx(feature_probabilities(1.5)[0], abs=0.02)
+        failed = tx[tx['status'] == 'Failed'].groupby('feature').size() / tx.groupby('feature').size()
+        assert failed['QR Scan'] == pytest.approx(0.5, abs=0.05)
+        assert failed['Top-up'] == pytest.approx(0.15, abs=0.03)
+        assert (tx['status'] != 'Abandoned').all()
+
+    def test_deterministic_and_reused(self, tmp_path):
+        """The same seed gives the same files, and a matching manifest is reused."""
+        first = generate(str(tmp_path / 'a'), users=20, transactions=100)
+        second = generate(str(tmp_path / 'b'), users=20, transactions=100)
+        with open(first['transactions_file']) as a, open(second['transactions_file']) as b:
+            assert a.read() == b.read()
+
+        mtime = os.path.getmtime(first['transactions_file'])
+        ensure_dataset(str(tmp_path / 'a'), users=20, transactions=100)
+        assert os.path.getmtime(first['transactions_file']) == mtime
+
+    def test_invalid_parameters(self, tmp_path):
+        """Unknown parameters and impossible rates are rejected."""
+        with pytest.raises(TypeError):
+            generate(str(tmp_path), rows=10)
+        with pytest.raises(ValueError):
+            generate(str(tmp_path), failure_rate=0.8, abandon_rate=0.5)
+
+class TestBenchmarkSuite:
+    """Test cases for the benchmark runner."""
+
+    def test_scale_rows(self):
+        """Named scales and plain row counts are accepted."""
+        assert scale_rows('1m') == 1_000_000
+        assert scale_rows('2500') == 2500
+        with pytest.raises(ValueError):
+            scale_rows('huge')
+
+    def test_measure(self):
+        """Each measurement reports timing and memory figures."""
+        calls = []
+        result = measure(lambda: np.ones(100_000), setup=lambda: calls.append(1), repeat=2)
+
+        assert len(calls) == 3
+        assert result['repeat'] == 2
+        assert 0 <= result['wall_s'] <= result['wall_s_mean']
+        assert result['peak_alloc_bytes'] >= 800_000
+
+    def test_measure_without_rss(self, monkeypatch):
+        """Without /proc or the resource module, RSS figures are reported as missing."""
+        import bench_suite
+        monkeypatch.setattr(bench_suite, 'resource', None)
+        monkeypatch.setattr(bench_suite, 'current_rss', lambda: None)
+        result = measure(lambda: np.ones(10), repeat=1, trace_memory=False)
+
+        assert result['peak_rss_bytes'] is None
+        assert result['rss_growth_bytes'] is None
+
+    def test_run_suite(self, tmp_path):
+        """A small run benchmarks every method and serialises to JSON."""
+        document = run_suite(['2000'], str(tmp_path), repeat=1, trace_memory=False, log=lambda *_: None)
+
+        results = document['scales']['2000']['results']
+        assert document['scales']['2000']['rows']['transactions'] == 2000
+        assert 'processor.get_user_segmentation' in results
+        assert 'insights.generate_executive_summary' in results
+        assert all(result['wall_s'] >= 0 for result in results.values())
+        json.dumps(document)
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
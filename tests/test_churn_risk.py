@@ -0,0 +1,96 @@
+"""
+Test suite for SmartPay Analytics churn-risk scores.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from churn_risk import COMPONENTS, ChurnRiskScores
+
+NOW = pd.Timestamp('2025-01-01')
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'user_id': [1, 1, 1, 1, 2, 3, 3],
+        'timestamp': pd.to_datetime([
+            '2024-12-31', '2024-12-30', '2024-12-29', '2024-12-28',
+            '2024-11-01', '2024-12-20', '2024-12-21'
+        ]),
+        'status': ['Success', 'Success', 'Success', 'Failed', 'Failed', 'Success', 'Abandoned']
+    })
+
+@pytest.fixture
+def activity():
+    return pd.DataFrame({
+        'user_id': [1, 2, 3, 3],
+        'app_open_count': [200, 2, 5, 40],
+        'days_active_per_month': [30, 1, 3, 12],
+        'last_transaction_date': pd.to_datetime(['2024-12-31', '2024-11-01', '2024-12-01', '2024-12-21']),
+    })
+
+@pytest.fixture
+def scores(transactions, activity):
+    return ChurnRiskScores(transactions, activity, user_ids=[1, 2, 3, 5], now=NOW)
+
+class TestChurnRiskScores:
+    """Test cases for vectorized per-user churn-risk scoring."""
+
+    def test_components(self, scores):
+        """Components follow recency, frequency, engagement and failures."""
+        assert scores.components['recency'][1] == pytest.approx(1 / 30)
+        assert scores.components['recency'][2] == 1.0
+        assert scores.components['frequency'][1] == pytest.approx(0.0)
+        assert scores.components['failure_ratio'][1] == pytest.approx(0.25)
+        assert scores.components['failure_ratio'][2] == 1.0
+        # User 3's latest activity row wins.
+        assert scores.components['days_active'][3] == pytest.approx(1 - 12 / 30)
+        assert scores.days_inactive[3] == pytest.approx(11)
+
+    def test_score_is_weighted_mean(self, transactions, activity):
+        weights = {'recency': 3.0, 'failure_ratio': 1.0}
+        scores = ChurnRiskScores(transactions, activity, now=NOW, weights=weights)
+        for user_id in [1, 2, 3]:
+            expected = (3 * scores.components['recency'][user_id]
+                        + scores.components['failure_ratio'][user_id]) / 4
+            assert scores.score(user_id) == pytest.approx(expected, rel=1e-6)
+
+    def test_compact_arrays_keyed_by_user_id(self, scores):
+        """Users without transactions or activity are scored; other IDs are not."""
+        assert scores.scores.dtype == np.float32 and scores.size == 6
+        assert scores.population == 4
+        assert scores.score(5) == pytest.approx(0.85)  # every component maximal except failures
+        for user_id in [0, 4, 99, -1]:
+            assert user_id not in scores
+        with pytest.raises(KeyError):
+            scores.score(4)
+        assert scores.to_series().index.tolist() == [1, 2, 3, 5]
+
+    @pytest.mark.parametrize('k', [1, 2, 3, 4, 10])
+    def test_top_matches_full_sort(self, scores, k):
+        top = scores.top(k)
+        expected = scores.to_series().sort_values(ascending=False, kind='stable')
+        assert top['user_id'].tolist() == expected.index[:k].tolist()
+        assert list(top.columns) == ['user_id', 'churn_risk_score', 'days_inactive', *COMPONENTS]
+
+    def test_top_ties_prefer_lower_user_id(self):
+        """Users tied at the cut-off are taken in user_id order."""
+        rng = np.random.default_rng(3)
+        transactions = pd.DataFrame({
+            'user_id': rng.integers(0, 500, 5000),
+            'timestamp': NOW - pd.to_timedelta(rng.integers(0, 5, 5000), unit='D'),
+            'status': rng.choice(['Success', 'Failed'], 5000),
+        })
+        activity = pd.DataFrame(columns=['user_id', 'app_open_count', 'days_active_per_month',
+                                         'last_transaction_date'])
+        scores = ChurnRiskScores(transactions, activity, user_ids=np.arange(500, 520), now=NOW)
+        expected = scores.to_series().sort_values(ascending=False, kind='stable')
+        for k in [5, 25, 100]:
+            assert scores.top(k)['user_id'].tolist() == expected.index[:k].tolist()
+        assert scores.top(0).empty
@@ -0,0 +1,100 @@
+"""
+Test suite for SmartPay Analytics cohort retention.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from cohorts import CohortRetention
+
+@pytest.fixture
+def users():
+    return pd.DataFrame({
+        'user_id': [1, 2, 3, 4],
+        'signup_date': pd.to_datetime(['2024-01-10', '2024-01-20', '2024-02-05', '2024-03-01']),
+    })
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'user_id': [1, 1, 2, 1, 3, 3, 2, 3, 9, 4],
+        'feature': ['Top-up', 'QR Scan', 'Top-up', 'Top-up', 'Top-up', 'Top-up', 'QR Scan', 'QR Scan',
+                    'Top-up', 'Top-up'],
+        'timestamp': pd.to_datetime([
+            '2024-01-11', '2024-01-12', '2024-01-25', '2024-02-01', '2024-02-06',
+            '2024-03-02', '2024-03-03', '2024-03-20', '2024-03-04', '2024-02-15'
+        ]),
+    })
+
+def brute_force(users, transactions):
+    """Distinct users per (feature, cohort, activity month) by filtering the frames."""
+    merged = transactions.merge(users, on='user_id')
+    merged = merged[merged['timestamp'].dt.to_period('M') >= merged['signup_date'].dt.to_period('M')]
+    merged = merged.assign(cohort=merged['signup_date'].dt.strftime('%Y-%m'),
+                           activity_month=merged['timestamp'].dt.strftime('%Y-%m'))
+    by_feature = merged.groupby(['feature', 'cohort', 'activity_month'])['user_id'].nunique()
+    overall = merged.groupby(['cohort', 'activity_month'])['user_id'].nunique()
+    overall.index = pd.MultiIndex.from_tuples([('All', *key) for key in overall.index],
+                                              names=by_feature.index.names)
+    return pd.concat([by_feature, overall]).sort_index()
+
+def active_users(cohorts):
+    return cohorts.to_frame().set_index(['feature', 'cohort', 'activity_month'])['active_users'].sort_index()
+
+class TestCohortRetention:
+    """Test cases for signup-month x activity-month retention cells."""
+
+    def test_cells_match_brute_force(self, users, transactions):
+        """Cells count distinct users, leaving out pre-signup rows and unknown users."""
+        cohorts = CohortRetention.from_frames(users, transactions)
+        pd.testing.assert_series_equal(active_users(cohorts), brute_force(users, transactions),
+                                       check_names=False, check_dtype=False)
+
+    def test_matrix(self, users, transactions):
+        """The matrix is a triangle of rates over the cohort sizes."""
+        cohorts = CohortRetention.from_frames(users, transactions)
+        matrix = cohorts.matrix()
+        assert list(matrix.index) == ['2024-01', '2024-02', '2024-03']
+        assert matrix.loc['2024-01'].tolist() == [100.0, 50.0, 50.0]
+        assert matrix.loc['2024-02'].tolist()[:2] == [100.0, 100.0]
+        assert np.isnan(matrix.loc['2024-02', 2]) and np.isnan(matrix.loc['2024-03', 1])
+        # User 4 transacted before signing up, so the March cohort has no activity.
+        assert matrix.loc['2024-03', 0] == 0.0
+
+        qr_scan = cohorts.matrix('QR Scan', rates=False)
+        assert qr_scan.loc['2024-01'].tolist() == [1.0, 0.0, 1.0]
+        assert qr_scan.loc['2024-02', 1] == 1.0
+
+    def test_extend_month_by_month(self, users, transactions):
+        """Extending in batches, splitting a month, matches one build."""
+        whole = CohortRetention.from_frames(users, transactions)
+        ordered = transactions.sort_values('timestamp')
+        cohorts = CohortRetention()
+        for start, end in [('2024-01-01', '2024-01-20'), ('2024-01-20', '2024-03-03'), ('2024-03-03', '2024-04-01')]:
+            batch = ordered[(ordered['timestamp'] >= start) & (ordered['timestamp'] < end)]
+            cohorts.extend(users, batch)
+        pd.testing.assert_frame_equal(cohorts.to_frame(), whole.to_frame())
+
+        with pytest.raises(ValueError, match='already covered'):
+            cohorts.extend(users, transactions.head(1))
+
+    def test_save_and_load(self, users, transactions, tmp_path):
+        """A loaded state keeps its cells and can still be extended."""
+        path = str(tmp_path / 'cohorts.npz')
+        first = transactions[transactions['timestamp'] < '2024-03-03']
+        CohortRetention.from_frames(users, first).save(path)
+
+        cohorts = CohortRetention.load(path).extend(users, transactions[transactions['timestamp'] >= '2024-03-03'])
+        pd.testing.assert_frame_equal(cohorts.to_frame(), CohortRetention.from_frames(users, transactions).to_frame())
+
+    def test_empty(self, users, transactions):
+        cohorts = CohortRetention.from_frames(users, transactions.iloc[:0])
+        assert cohorts.cells == 0
+        assert cohorts.to_frame().empty
+        assert cohorts.matrix().shape == (3, 1)
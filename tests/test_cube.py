@@ -0,0 +1,112 @@
+"""
+Test suite for SmartPay Analytics transaction cube.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from cube import TransactionCube, cube_key
+
+@pytest.fixture
+def transactions():
+    """Create transactions spread over two months with mixed statuses."""
+    ids = np.arange(60)
+    return pd.DataFrame({
+        'transaction_id': ids,
+        'user_id': ids % 9,
+        'feature': np.array(['Top-up', 'QR Scan', 'Bill Payment'])[ids % 3],
+        'amount': (ids % 7 + 1) * 5.0,
+        'timestamp': pd.Timestamp('2024-11-20 06:00') + pd.to_timedelta(ids * 17, unit='h'),
+        'status': np.where(ids % 5 == 0, 'Failed', 'Success')
+    })
+
+class TestTransactionCube:
+    """Test cases for the pre-aggregated transaction cube."""
+
+    def test_usage_matches_groupby(self, transactions):
+        """Hourly and weekday usage equal grouping the raw rows."""
+        cube = TransactionCube.from_frame(transactions)
+        hour = transactions['timestamp'].dt.hour.rename('hour')
+        day = transactions['timestamp'].dt.day_name().rename('day_of_week')
+
+        assert cube.rows == len(transactions)
+        assert cube.cells <= len(transactions)
+        pd.testing.assert_frame_equal(
+            cube.hourly_usage(), transactions.groupby(['feature', hour]).size().unstack(fill_value=0),
+            check_dtype=False, check_index_type=False, check_column_type=False)
+        pd.testing.assert_frame_equal(
+            cube.daily_usage(), transactions.groupby(['feature', day]).size().unstack(fill_value=0),
+            check_dtype=False, check_index_type=False, check_column_type=False)
+
+    def test_missing_feature_and_status(self, transactions):
+        """Rows without a feature or status are left out, as in a groupby."""
+        transactions['feature'] = transactions['feature'].where(transactions.index != 1)
+        transactions['status'] = transactions['status'].where(transactions.index != 4)
+        cube = TransactionCube.from_frame(transactions)
+        complete = transactions.dropna(subset=['feature', 'status'])
+        hour = complete['timestamp'].dt.hour.rename('hour')
+        successful = complete[complete['status'] == 'Success']
+
+        assert cube.rows == len(transactions) - 2
+        pd.testing.assert_frame_equal(
+            cube.hourly_usage(), complete.groupby(['feature', hour]).size().unstack(fill_value=0),
+            check_dtype=False, check_index_type=False, check_column_type=False)
+        month = successful['timestamp'].dt.strftime('%Y-%m')
+        assert cube.monthly_trends()['total_revenue'].sort_index().tolist() == pytest.approx(
+            successful.groupby(month)['amount'].sum().tolist())
+
+    def test_chunks_and_merge_match_whole(self, transactions):
+        """Folding chunks or merging partial cubes gives the same cells."""
+        whole = TransactionCube.from_frame(transactions)
+        chunked = TransactionCube.from_chunks([transactions.iloc[:25], transactions.iloc[25:]])
+        merged = TransactionCube.from_frame(transactions.iloc[40:]).merge(TransactionCube.from_frame(transactions.iloc[:40]))
+
+        for cube in (chunked, merged):
+            pd.testing.assert_frame_equal(cube.monthly_trends(), whole.monthly_trends())
+            pd.testing.assert_frame_equal(cube.daily_volume(), whole.daily_volume())
+
+    def test_daily_volume_and_monthly_trends(self, transactions):
+        """Volume and trends follow the KPI SQL definitions."""
+        cube = TransactionCube.from_frame(transactions)
+        successful = transactions[transactions['status'] == 'Success']
+
+        daily = cube.daily_volume()
+        assert daily.index.is_monotonic_decreasing
+        expected = transactions.groupby(transactions['timestamp'].dt.normalize()).size()
+        assert daily['transaction_count'].sort_index().tolist() == expected.tolist()
+        assert cube.daily_volume(since='2024-12-20')['transaction_count'].sum() == (
+            transactions['timestamp'] >= '2024-12-20').sum()
+
+        monthly = cube.monthly_trends()
+        month = successful['timestamp'].dt.strftime('%Y-%m')
+        assert monthly['total_revenue'].sort_index().tolist() == pytest.approx(
+            successful.groupby(month)['amount'].sum().tolist())
+        assert monthly['avg_transaction_value'].sort_index().tolist() == pytest.approx(
+            successful.groupby(month)['amount'].mean().tolist())
+
+    def test_save_load_roundtrip(self, transactions, tmp_path):
+        """A persisted cube loads back with identical answers."""
+        cube = TransactionCube.from_frame(transactions)
+        cube.save(str(tmp_path / 'cube.npz'))
+        loaded = TransactionCube.load(str(tmp_path / 'cube.npz'))
+
+        pd.testing.assert_frame_equal(loaded.hourly_usage(), cube.hourly_usage())
+        pd.testing.assert_frame_equal(loaded.monthly_trends(), cube.monthly_trends())
+
+    def test_cube_key_tracks_file_identity(self, tmp_path):
+        """Rewriting the source changes the cube key."""
+        path = tmp_path / 'transactions.csv'
+        path.write_text('a\n1\n')
+        before = cube_key([str(path)])
+        path.write_text('a\n1\n2\n')
+        assert cube_key([str(path)]) != before
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
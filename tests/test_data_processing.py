@@ -12,7 +12,50 @@ import os
 # Add the python directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
 
-from data_processing import SmartPayDataProcessor
+from data_processing import SmartPayDataProcessor, segment_by_quantiles, segment_by_tiers
+
+
+@pytest.fixture
+def smartpay_files(tmp_path):
+    """Write small CSV files matching the production SmartPay schemas."""
+    users = pd.DataFrame({
+        'user_id': [1, 2, 3, 4, 5],
+        'name': ['Ana Ruiz', 'Ben Cole', 'Cara Diaz', 'Dan Park', 'Eve Stone'],
+        'age': [25, 30, 35, 28, 42],
+        'location': ['Springfield', 'Riverton', 'Springfield', 'Lakeside', 'Riverton'],
+        'signup_date': ['2024-01-15', '2024-02-01', '2024-02-20', '2024-03-10', '2024-03-05']
+    })
+    transactions = pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+        'user_id': [1, 1, 2, 2, 3, 3, 4, 4, 5, 5],
+        'feature': ['Top-up', 'QR Scan', 'Top-up', 'Bill Payment', 'QR Scan',
+                    'Top-up', 'Bill Payment', 'QR Scan', 'Top-up', 'QR Scan'],
+        'amount': [100.0, 150.0, 200.0, 75.0, 300.0, 125.0, 80.0, 250.0, 180.0, 90.0],
+        'timestamp': [
+            '2024-12-01 10:00:00', '2024-12-02 14:30:00', '2024-12-01 16:45:00',
+            '2024-12-03 09:15:00', '2024-12-02 11:20:00', '2024-12-03 13:40:00',
+            '2024-12-01 08:30:00', '2024-12-02 17:15:00', '2024-12-03 12:00:00',
+            '2024-12-01 15:30:00'
+        ],
+        'status': ['Success', 'Success', 'Success', 'Failed', 'Success',
+                   'Abandoned', 'Success', 'Success', 'Success', 'Success']
+    })
+    activity = pd.DataFrame({
+        'user_id': [1, 2, 3, 4, 5],
+        'app_open_count': [40, 12, 0, 25, 8],
+        'days_active_per_month': [22, 9, 0, 15, 4],
+        'last_transaction_date': ['2024-12-02', '2024-12-03', '2024-12-03', '2024-12-02', '2024-12-03']
+    })
+    paths = {
+        'users_file': tmp_path / 'smartpay_users.csv',
+        'transactions_file': tmp_path / 'smartpay_transactions.csv',
+        'activity_file': tmp_path / 'smartpay_app_activity.csv'
+    }
+    users.to_csv(paths['users_file'], index=False)
+    transactions.to_csv(paths['transactions_file'], index=False)
+    activity.to_csv(paths['activity_file'], index=False)
+    return {name: str(path) for name, path in paths.items()}
+
 
 class TestSmartPayDataProcessor:
     """Test cases for SmartPayDataProcessor class."""
@@ -371,6 +414,518 @@ class TestIntegration:
         processing_time = (end_time - start_time).total_seconds()
         assert processing_time < 5.0
 
+class TestTypedIngest:
+    """Test cases for the schema-driven typed ingest mode."""
+
+    @pytest.mark.parametrize('engine', ['c', 'auto'])
+    def test_typed_dtypes(self, smartpay_files, engine):
+        """Typed mode applies the declared schema during the read."""
+        processor = SmartPayDataProcessor(**smartpay_files, typed=True, engine=engine)
+        tx = processor.transactions_df
+
+        assert isinstance(tx['feature'].dtype, pd.CategoricalDtype)
+        assert isinstance(tx['status'].dtype, pd.CategoricalDtype)
+        assert isinstance(processor.users_df['location'].dtype, pd.CategoricalDtype)
+        assert tx['user_id'].dtype == np.int32
+        assert tx['amount'].dtype == np.float32
+        assert pd.api.types.is_datetime64_any_dtype(tx['timestamp'])
+        assert pd.api.types.is_datetime64_any_dtype(processor.users_df['signup_date'])
+
+    def test_typed_matches_untyped_metrics(self, smartpay_files):
+        """Typed and untyped ingest produce the same metrics."""
+        typed = SmartPayDataProcessor(**smartpay_files, typed=True, engine='c')
+        untyped = SmartPayDataProcessor(**smartpay_files)
+
+        typed_metrics = typed.get_transaction_metrics()
+        untyped_metrics = untyped.get_transaction_metrics()
+        assert typed_metrics['success_rate'] == pytest.approx(untyped_metrics['success_rate'])
+        assert typed_metrics['total_revenue'] == pytest.approx(untyped_metrics['total_revenue'])
+
+    def test_ingest_report(self, smartpay_files):
+        """Typed mode reports bytes per row before and after."""
+        processor = SmartPayDataProcessor(**smartpay_files, typed=True, engine='c', lazy=False)
+
+        report = processor.ingest_report['transactions']
+        assert report['rows'] == 10
+        assert 0 < report['bytes_per_row_after'] < report['bytes_per_row_before']
+
+class TestLazyLoading:
+    """Test cases for lazy, column-projected table loading."""
+
+    def test_construction_reads_nothing(self, smartpay_files):
+        """A lazy processor defers every CSV read until a table is used."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        assert processor._frames == {}
+
+    def test_missing_file_fails_fast(self, smartpay_files, tmp_path):
+        """Missing sources are still reported from the constructor."""
+        files = dict(smartpay_files, activity_file=str(tmp_path / 'missing.csv'))
+        with pytest.raises(FileNotFoundError):
+            SmartPayDataProcessor(**files)
+
+    def test_funnel_loads_only_projected_columns(self, smartpay_files):
+        """The funnel only parses the columns it aggregates."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        processor.get_funnel_metrics()
+
+        assert set(processor._frames) == {'activity', 'transactions'}
+        assert list(processor._frames['activity'].columns) == ['app_open_count']
+        assert set(processor._frames['transactions'].columns) == {'user_id', 'status'}
+
+    def test_full_access_matches_eager_load(self, smartpay_files):
+        """Completing a partially loaded table restores the file's column order."""
+        lazy = SmartPayDataProcessor(**smartpay_files)
+        eager = SmartPayDataProcessor(**smartpay_files, lazy=False)
+        lazy.get_transaction_metrics()
+
+        pd.testing.assert_frame_equal(lazy.transactions_df, eager.transactions_df)
+        assert lazy.get_transaction_metrics()['total_revenue'] == pytest.approx(
+            eager.get_transaction_metrics()['total_revenue'])
+
+    def test_added_columns_keep_typed_dtypes(self, smartpay_files):
+        """Columns added to a partially loaded typed table keep their declared dtypes."""
+        lazy = SmartPayDataProcessor(**smartpay_files, typed=True, engine='c')
+        eager = SmartPayDataProcessor(**smartpay_files, typed=True, engine='c', lazy=False)
+        lazy.get_funnel_metrics()
+        lazy.get_transaction_metrics()
+
+        frame = lazy._frames['transactions']
+        assert set(frame.columns) > {'user_id', 'status'}
+        assert isinstance(frame['feature'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(frame.dtypes, eager.transactions_df.dtypes[frame.columns])
+
+class TestParallelMetrics:
+    """Test cases for concurrent metric computation."""
+
+    @pytest.mark.parametrize('streaming', [False, True])
+    def test_parallel_matches_sequential(self, smartpay_files, streaming):
+        """Metric groups computed on the thread pool match sequential results."""
+        sequential = SmartPayDataProcessor(**smartpay_files, streaming=streaming).compute_metrics(parallel=False)
+        parallel = SmartPayDataProcessor(**smartpay_files, streaming=streaming).compute_metrics(
+            parallel=True, max_workers=4)
+
+        assert parallel['transaction_metrics']['total_revenue'] == pytest.approx(
+            sequential['transaction_metrics']['total_revenue'])
+        assert parallel['funnel'] == sequential['funnel']
+        assert parallel['user_metrics']['churn_rate'] == sequential['user_metrics']['churn_rate']
+        pd.testing.assert_series_equal(parallel['segmentation']['value_segments'],
+                                       sequential['segmentation']['value_segments'])
+
+    def test_subset_of_metrics(self, smartpay_files):
+        """Only the requested groups are returned."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        assert list(processor.compute_metrics(['funnel'])) == ['funnel']
+
+class TestStreamingAggregation:
+    """Test cases for the chunked streaming mode."""
+
+    def test_streaming_skips_transactions_frame(self, smartpay_files):
+        """Streaming mode never materialises the transactions frame."""
+        processor = SmartPayDataProcessor(**smartpay_files, streaming=True, chunk_size=3)
+        assert processor.transactions_df is None
+
+    @pytest.mark.parametrize('typed', [False, True])
+    def test_streaming_matches_in_memory(self, smartpay_files, typed):
+        """Streaming metrics equal the in-memory metrics."""
+        in_memory = SmartPayDataProcessor(**smartpay_files)
+        streaming = SmartPayDataProcessor(**smartpay_files, streaming=True, chunk_size=3, typed=typed)
+
+        expected = in_memory.get_transaction_metrics()
+        actual = streaming.get_transaction_metrics()
+        assert actual['success_rate'] == pytest.approx(expected['success_rate'])
+        assert actual['total_revenue'] == pytest.approx(expected['total_revenue'])
+        assert actual['arpu'] == pytest.approx(expected['arpu'])
+        pd.testing.assert_frame_equal(actual['feature_metrics'], expected['feature_metrics'],
+                                      check_dtype=False, check_index_type=False)
+        assert streaming.get_funnel_metrics() == in_memory.get_funnel_metrics()
+        pd.testing.assert_frame_equal(
+            streaming.get_feature_engagement()['daily_usage'],
+            in_memory.get_feature_engagement()['daily_usage'],
+            check_dtype=False, check_index_type=False
+        )
+
+class TestShardedProcessing:
+    """Test cases for sharded multi-process transaction metrics."""
+
+    def test_sharded_matches_in_memory(self, smartpay_files):
+        """Byte-range shards folded in worker processes give the in-memory metrics."""
+        in_memory = SmartPayDataProcessor(**smartpay_files)
+        sharded = SmartPayDataProcessor(**smartpay_files, shards=3, chunk_size=2)
+
+        assert sharded.transactions_df is None
+        assert sharded.get_funnel_metrics() == in_memory.get_funnel_metrics()
+        assert sharded.get_user_metrics()['mau_last_3_months'] == in_memory.get_user_metrics()['mau_last_3_months']
+        assert sharded.get_transaction_metrics()['total_revenue'] == pytest.approx(
+            in_memory.get_transaction_metrics()['total_revenue'])
+
+    def test_shard_directory(self, smartpay_files, tmp_path):
+        """A directory of shard CSVs can stand in for the transactions file."""
+        from sharding import split_transactions
+        shard_dir = tmp_path / 'shards'
+        chunks = pd.read_csv(smartpay_files['transactions_file'], parse_dates=['timestamp'], chunksize=4)
+        split_transactions(chunks, str(shard_dir), shards=2)
+
+        in_memory = SmartPayDataProcessor(**smartpay_files)
+        sharded = SmartPayDataProcessor(**dict(smartpay_files, transactions_file=str(shard_dir)))
+        assert sharded.get_funnel_metrics() == in_memory.get_funnel_metrics()
+
+    def test_sharded_incremental_rejected(self, smartpay_files, tmp_path):
+        """Sharding and incremental state are mutually exclusive."""
+        with pytest.raises(ValueError):
+            SmartPayDataProcessor(**smartpay_files, shards=2, state_dir=str(tmp_path / 'state'))
+
+class TestApproximateDistinctCounts:
+    """Test cases for sketch-based MAU/DAU and funnel counts."""
+
+    @pytest.mark.parametrize('streaming', [False, True])
+    def test_approx_matches_exact_on_small_data(self, smartpay_files, streaming):
+        """Sketches are exact at tiny cardinalities, in memory and streaming."""
+        exact = SmartPayDataProcessor(**smartpay_files)
+        approx = SmartPayDataProcessor(**smartpay_files, streaming=streaming, distinct='approx')
+
+        assert approx.sketch_precision is not None
+        assert approx.get_funnel_metrics() == exact.get_funnel_metrics()
+        assert approx.get_user_metrics()['mau_last_3_months'] == exact.get_user_metrics()['mau_last_3_months']
+
+    def test_unknown_mode(self, smartpay_files):
+        """Only exact and approx distinct counting are accepted."""
+        with pytest.raises(ValueError):
+            SmartPayDataProcessor(**smartpay_files, distinct='fuzzy')
+
+class TestApproximateQuantiles:
+    """Test cases for sketch-based revenue percentiles."""
+
+    @pytest.mark.parametrize('streaming', [False, True])
+    def test_approx_segmentation_on_small_data(self, smartpay_files, streaming):
+        """With few users the sketch keeps every value and edges match exact quantiles' bins."""
+        exact = SmartPayDataProcessor(**smartpay_files)
+        approx = SmartPayDataProcessor(**smartpay_files, streaming=streaming, quantiles='approx')
+
+        revenue = exact.aggregates().user_revenue.to_numpy()
+        edges = approx.revenue_quantiles([0.0, 1.0])
+        assert edges.tolist() == [revenue.min(), revenue.max()]
+        assert approx.get_user_segmentation()['value_segments'].sum() == len(revenue)
+
+    def test_unknown_mode(self, smartpay_files):
+        """Only exact and approx quantiles are accepted."""
+        with pytest.raises(ValueError):
+            SmartPayDataProcessor(**smartpay_files, quantiles='fuzzy')
+
+class TestTransactionCube:
+    """Test cases for the processor's persisted transaction cube."""
+
+    def test_cube_is_persisted_and_reused(self, smartpay_files, tmp_path, monkeypatch):
+        """A second processor loads the cube instead of rebuilding it."""
+        import data_processing
+        monkeypatch.setattr(data_processing.config, 'CACHE_DIR', tmp_path / 'cache')
+        first = SmartPayDataProcessor(**smartpay_files, cache=True)
+        expected = first.get_monthly_trends()
+        assert list((tmp_path / 'cache').glob('cube-*.npz'))
+
+        monkeypatch.setattr(data_processing.TransactionCube, 'from_frame', None)
+        second = SmartPayDataProcessor(**smartpay_files, cache=True)
+        pd.testing.assert_frame_equal(second.get_monthly_trends(), expected)
+
+    def test_daily_volume(self, smartpay_files):
+        """Daily volume counts every transaction once."""
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        assert processor.get_daily_volume()['transaction_count'].sum() == 10
+
+    def test_incremental_cube_folds_in_appended_rows(self, smartpay_files, tmp_path, monkeypatch):
+        """An incremental processor extends the cube kept with its state instead of rebuilding it."""
+        import data_processing
+        state_dir = str(tmp_path / 'state')
+        SmartPayDataProcessor(**smartpay_files, state_dir=state_dir, cache=False).get_daily_volume()
+        with open(smartpay_files['transactions_file'], 'a') as f:
+            f.write('11,1,Top-up,60.0,2024-12-05 09:00:00,Success\n')
+            f.write('12,2,QR Scan,40.0,2024-12-05 10:00:00,Failed\n')
+
+        monkeypatch.setattr(data_processing.TransactionCube, 'from_chunks', None)
+        processor = SmartPayDataProcessor(**smartpay_files, state_dir=state_dir, cache=False)
+        daily_volume = processor.get_daily_volume()
+
+        assert processor.incremental_report['mode'] == 'incremental'
+        expected = SmartPayDataProcessor(**smartpay_files, cache=False).get_daily_volume()
+        pd.testing.assert_frame_equal(daily_volume, expected)
+
+class TestCohortRetention:
+    """Test cases for the processor's cohort retention matrices."""
+
+    def test_matrix(self, smartpay_files):
+        """Every cohort transacted in December 2024 and nowhere else."""
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        matrix = processor.get_cohort_retention()
+        assert list(matrix.index) == ['2024-01', '2024-02', '2024-03']
+        assert matrix.loc['2024-01', 11] == 100.0
+        assert matrix.loc['2024-03', 9] == 100.0 and matrix.loc['2024-03', 8] == 0.0
+        assert np.isnan(matrix.loc['2024-03', 10])
+        assert processor.get_cohort_retention('Bill Payment', rates=False).loc['2024-02', 10] == 1
+
+    def test_cohorts_are_persisted_and_reused(self, smartpay_files, tmp_path, monkeypatch):
+        """A second processor loads the cohorts instead of rebuilding them."""
+        import data_processing
+        monkeypatch.setattr(data_processing.config, 'CACHE_DIR', tmp_path / 'cache')
+        expected = SmartPayDataProcessor(**smartpay_files, cache=True).cohort_retention().to_frame()
+        assert list((tmp_path / 'cache').glob('cohorts-*.npz'))
+
+        monkeypatch.setattr(data_processing.CohortRetention, 'from_frames', None)
+        second = SmartPayDataProcessor(**smartpay_files, cache=True)
+        pd.testing.assert_frame_equal(second.cohort_retention().to_frame(), expected)
+
+    def test_exported(self, smartpay_files, tmp_path):
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        processor.export_processed_data(str(tmp_path / 'out'), include_transactions=False, include_rollups=True)
+        exported = pd.read_csv(tmp_path / 'out' / 'cohort_retention.csv')
+        assert exported.loc[exported['feature'] == 'All', 'active_users'].sum() == 5
+
+    def test_feature_retention(self, smartpay_files):
+        """Feature retention is the share of each feature's users active in the last 30 days."""
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        # December 2nd starts the 30-day window, so December 1st falls outside it.
+        shift = pd.Timestamp.now() - pd.Timedelta(days=30) - pd.Timestamp('2024-12-02')
+        processor.transactions_df = processor.transactions_df.assign(
+            timestamp=processor.transactions_df['timestamp'] + shift)
+        retention = processor.get_feature_engagement()['feature_retention']
+        assert list(retention) == ['Top-up', 'QR Scan', 'Bill Payment']
+        assert retention['Top-up'] == pytest.approx(2 / 4 * 100)
+        assert retention['QR Scan'] == pytest.approx(3 / 4 * 100)
+        assert retention['Bill Payment'] == pytest.approx(1 / 2 * 100)
+
+class TestTimeWindows:
+    """Test cases for the processor's window() API."""
+
+    def test_window_matches_filter(self, smartpay_files):
+        """window() returns the rows in [start, end)."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        window = processor.window('2024-12-02', '2024-12-04')
+        tx = processor.transactions_df
+        expected = tx[(tx['timestamp'] >= '2024-12-02') & (tx['timestamp'] < '2024-12-04')]
+
+        assert sorted(window['transaction_id']) == sorted(expected['transaction_id'])
+
+    def test_window_loads_only_requested_columns(self, smartpay_files):
+        """A column-limited window only loads those columns and timestamps."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        window = processor.window(columns=['user_id'])
+
+        assert set(window.columns) == {'user_id', 'timestamp'}
+        assert len(window) == 10
+
+    def test_streaming_has_no_window(self, smartpay_files):
+        """Streaming mode keeps no rows to slice."""
+        processor = SmartPayDataProcessor(**smartpay_files, streaming=True)
+        with pytest.raises(ValueError):
+            processor.window()
+
+class TestUserProfiles:
+    """Test cases for per-user point lookups."""
+
+    def test_profile_matches_frames(self, smartpay_files):
+        """A profile agrees with filtering the full frames."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        profile = processor.get_user_profile(1)
+        tx = processor.transactions_df[processor.transactions_df['user_id'] == 1]
+
+        assert profile['name'] == 'Ana Ruiz'
+        assert profile['transaction_count'] == len(tx)
+        assert profile['total_revenue'] == pytest.approx(tx.loc[tx['status'] == 'Success', 'amount'].sum())
+        assert profile['value_segment'] == processor.get_user_segmentation()['user_value_segments'].loc[1]
+
+    def test_unknown_user(self, smartpay_files):
+        """Unknown users raise KeyError."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        with pytest.raises(KeyError):
+            processor.get_user_profile(999)
+
+class TestChurnRisk:
+    """Test cases for the processor's churn-risk scores."""
+
+    def test_scores_cached_per_load(self, smartpay_files):
+        """Scores are built once and rebuilt after a table is reassigned."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        scores = processor.churn_risk()
+        assert processor.churn_risk() is scores
+        assert scores.population == len(set(processor.users_df['user_id']) | set(processor.transactions_df['user_id'])
+                                         | set(processor.activity_df['user_id']))
+
+        riskiest = processor.get_riskiest_users(3)
+        assert riskiest['churn_risk_score'].is_monotonic_decreasing
+        processor.activity_df = processor.activity_df.copy()
+        assert processor.churn_risk() is not scores
+
+    def test_streaming_has_no_scores(self, smartpay_files):
+        processor = SmartPayDataProcessor(**smartpay_files, streaming=True)
+        with pytest.raises(ValueError):
+            processor.churn_risk()
+
+class TestDerivedColumns:
+    """Test cases for keeping derived columns out of the loaded frames."""
+
+    def test_metrics_leave_frames_unchanged(self, smartpay_files, tmp_path):
+        """Metric calls add no columns, so exports keep the source schema."""
+        processor = SmartPayDataProcessor(**smartpay_files, lazy=False, cache=False)
+        columns = {name: list(getattr(processor, name).columns)
+                   for name in ('users_df', 'transactions_df', 'activity_df')}
+        for _ in range(2):
+            processor.get_user_metrics()
+            processor.get_feature_engagement()
+            processor.get_user_segmentation()
+
+        for name, expected in columns.items():
+            assert list(getattr(processor, name).columns) == expected
+        processor.export_processed_data(str(tmp_path))
+        exported = pd.read_csv(tmp_path / 'user_summary.csv')
+        assert 'signup_month' not in exported.columns and 'activity_level' not in exported.columns
+
+class TestSharedAggregates:
+    """Test cases for the shared aggregate layer."""
+
+    def test_metrics_reuse_aggregates(self, smartpay_files):
+        """Metric methods read from one cache per dataset version."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        aggregates = processor.aggregates()
+
+        processor.get_transaction_metrics()
+        processor.get_funnel_metrics()
+        processor.get_user_segmentation()
+        assert processor.aggregates() is aggregates
+        assert 'user_revenue' in vars(aggregates)
+        assert 'feature_metrics' in vars(aggregates)
+
+    def test_reload_invalidates(self, smartpay_files):
+        """Reloading data bumps the version and drops cached aggregates."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        aggregates = processor.aggregates()
+        version = processor.data_version
+
+        processor.load_data()
+        assert processor.data_version == version + 1
+        assert processor.aggregates() is not aggregates
+
+    def test_invalidate_bumps_version(self, smartpay_files):
+        """Dropping cached aggregates also moves the data version on."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        version = processor.data_version
+
+        processor.invalidate_aggregates()
+        assert processor.data_version == version + 1
+
+class TestValueSegmentation:
+    """Test cases for vectorized value segmentation."""
+
+    def test_quantile_bins_match_threshold_rules(self):
+        """Vectorized binning agrees with the per-user threshold rules."""
+        revenue = pd.Series(np.random.default_rng(7).integers(1, 50, 500).astype(float))
+        edges = revenue.quantile([0.5, 0.8, 0.95])
+
+        def categorize(value):
+            if value >= edges[0.95]:
+                return 'High Value'
+            elif value >= edges[0.8]:
+                return 'Medium Value'
+            elif value >= edges[0.5]:
+                return 'Low Value'
+            return 'Minimal Value'
+
+        segments = segment_by_quantiles(revenue)
+        assert isinstance(segments.dtype, pd.CategoricalDtype)
+        assert segments.astype(str).tolist() == revenue.apply(categorize).tolist()
+
+    def test_tiers(self):
+        """Tier mode applies both revenue and transaction thresholds."""
+        revenue = pd.Series([1500.0, 1500.0, 150.0, 20.0], index=[1, 2, 3, 4])
+        transactions = pd.Series([12, 5, 3, 1], index=[1, 2, 3, 4])
+        tiers = {
+            'premium': {'min_revenue': 1000, 'min_transactions': 10},
+            'regular': {'min_revenue': 100, 'min_transactions': 3},
+            'casual': {'min_revenue': 0, 'min_transactions': 1}
+        }
+
+        segments = segment_by_tiers(revenue, transactions, tiers)
+        assert segments.astype(str).tolist() == ['Premium', 'Regular', 'Regular', 'Casual']
+
+    def test_processor_value_modes(self, smartpay_files):
+        """The processor returns counts and per-user labels for both modes."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+
+        quantile = processor.get_user_segmentation()
+        tiers = processor.get_user_segmentation(value_mode='tiers')
+        assert quantile['value_segments'].sum() == len(quantile['user_value_segments']) == 5
+        assert tiers['value_segments'].sum() == 5
+        with pytest.raises(ValueError):
+            processor.get_user_segmentation(value_mode='bogus')
+
+class TestParquetExport:
+    """Test cases for the partitioned Parquet export."""
+
+    @pytest.mark.parametrize('streaming', [False, True])
+    def test_partitioned_export(self, smartpay_files, tmp_path, streaming):
+        """Transactions are written partitioned by month and feature."""
+        ds = pytest.importorskip('pyarrow.dataset')
+        processor = SmartPayDataProcessor(**smartpay_files, typed=True, streaming=streaming, chunk_size=4)
+        output_dir = tmp_path / 'parquet'
+
+        processor.export_processed_data(str(output_dir), file_format='parquet')
+
+        for name in ['user_summary', 'feature_metrics', 'funnel_data']:
+            assert (output_dir / f'{name}.parquet').exists()
+        dataset = ds.dataset(str(output_dir / 'transaction_summary'), partitioning='hive')
+        assert dataset.count_rows() == 10
+        assert dataset.count_rows(filter=ds.field('feature') == 'Top-up') == 4
+        assert (output_dir / 'transaction_summary' / 'month=2024-12').is_dir()
+
+    def test_streaming_export_writes_one_file_per_partition(self, smartpay_files, tmp_path):
+        """Streamed chunks are appended to their partition rather than written as separate files."""
+        pytest.importorskip('pyarrow.dataset')
+        processor = SmartPayDataProcessor(**smartpay_files, typed=True, streaming=True, chunk_size=2)
+        output_dir = tmp_path / 'parquet'
+
+        processor.export_processed_data(str(output_dir), file_format='parquet')
+
+        partitions = [path for path in (output_dir / 'transaction_summary').glob('month=*/feature=*')]
+        assert partitions
+        for partition in partitions:
+            assert len(list(partition.iterdir())) == 1
+
+    @pytest.mark.parametrize('include_rollups', [False, True])
+    def test_rollups_are_opt_in(self, smartpay_files, tmp_path, include_rollups):
+        """The default CSV export writes the original file set; rollup tables are opt-in."""
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        output_dir = tmp_path / 'out'
+        processor.export_processed_data(str(output_dir), include_rollups=include_rollups)
+
+        expected = {'user_summary.csv', 'transaction_summary.csv', 'feature_metrics.csv', 'funnel_data.csv'}
+        if include_rollups:
+            expected |= {'daily_volume.csv', 'monthly_trends.csv', 'cohort_retention.csv'}
+        assert {path.name for path in output_dir.iterdir()} == expected
+
+    def test_unknown_format(self, smartpay_files, tmp_path):
+        """Unsupported formats are rejected."""
+        processor = SmartPayDataProcessor(**smartpay_files)
+        with pytest.raises(ValueError):
+            processor.export_processed_data(str(tmp_path), file_format='xml')
+
+class TestSnapshotCaching:
+    """Test cases for the processor's on-disk snapshot cache."""
+
+    @pytest.mark.parametrize('typed', [False, True])
+    def test_second_load_uses_snapshots(self, smartpay_files, tmp_path, monkeypatch, typed):
+        """A second processor reads identical frames from the snapshot cache."""
+        pytest.importorskip('pyarrow')
+        import data_processing
+        monkeypatch.setattr(data_processing.config, 'CACHE_DIR', tmp_path / 'cache')
+        first = SmartPayDataProcessor(**smartpay_files, typed=typed, cache=True, lazy=False)
+
+        monkeypatch.setattr(data_processing.pd, 'read_csv', None)
+        second = SmartPayDataProcessor(**smartpay_files, typed=typed, cache=True, lazy=False)
+        pd.testing.assert_frame_equal(second.transactions_df, first.transactions_df, check_index_type=False)
+        pd.testing.assert_frame_equal(second.users_df, first.users_df, check_index_type=False)
+
+    def test_cache_disabled(self, smartpay_files):
+        """cache=False never creates a snapshot cache."""
+        processor = SmartPayDataProcessor(**smartpay_files, cache=False)
+        assert processor.snapshot_cache is None
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Test suite for SmartPay Analytics derived features store.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from derived import derived_features, invalidate_derived_features
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'user_id': [1, 2, 3],
+        'timestamp': pd.to_datetime(['2024-12-02 08:15', '2024-12-07 23:59', '2024-12-08 00:01']),
+    })
+
+class TestDerivedFeatures:
+    """Test cases for per-frame derived columns."""
+
+    def test_compact_time_features(self, transactions):
+        """Hour and weekday are small integers; weekday names are categorical."""
+        derived = derived_features(transactions)
+
+        assert derived.hour.dtype == np.int8
+        assert derived.hour.tolist() == [8, 23, 0]
+        assert derived.day_of_week.tolist() == [0, 5, 6]
+        assert isinstance(derived.day_name.dtype, pd.CategoricalDtype)
+        assert derived.day_name.tolist() == ['Monday', 'Saturday', 'Sunday']
+
+    def test_reused_and_not_written_to_frame(self, transactions):
+        """Derived columns are computed once and never added to the frame."""
+        columns = list(transactions.columns)
+        derived = derived_features(transactions)
+
+        assert derived_features(transactions) is derived
+        assert derived.hour is derived.hour
+        assert list(transactions.columns) == columns
+
+    def test_user_and_activity_features(self):
+        """Signup month and activity level come from their source columns."""
+        users = pd.DataFrame({'signup_date': pd.to_datetime(['2024-01-31', '2024-02-01'])})
+        activity = pd.DataFrame({'days_active_per_month': [0, 5, 15, 25]})
+
+        assert derived_features(users).signup_month.astype(str).tolist() == ['2024-01', '2024-02']
+        assert derived_features(activity).activity_level.tolist()[1:] == [
+            'Low Activity', 'Medium Activity', 'High Activity']
+
+    def test_invalidate(self, transactions):
+        """Invalidation drops the store for that frame."""
+        derived = derived_features(transactions)
+        invalidate_derived_features(transactions)
+        assert derived_features(transactions) is not derived
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
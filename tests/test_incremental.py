@@ -0,0 +1,117 @@
+"""
+Test suite for SmartPay Analytics incremental transaction processing.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from aggregates import TransactionAggregates
+from incremental import incremental_transaction_aggregates
+
+def make_transactions(start_id, count, start_time):
+    """Create ``count`` consecutive transactions starting at ``start_id``."""
+    ids = np.arange(start_id, start_id + count)
+    return pd.DataFrame({
+        'transaction_id': ids,
+        'user_id': ids % 7 + 1,
+        'feature': np.where(ids % 2 == 0, 'Top-up', 'QR Scan'),
+        'amount': (ids % 5 + 1) * 10.0,
+        'timestamp': pd.Timestamp(start_time) + pd.to_timedelta(ids - start_id, unit='h'),
+        'status': np.where(ids % 4 == 0, 'Failed', 'Success')
+    })
+
+def read_chunks(handle, names):
+    return pd.read_csv(handle, header=None, names=names, parse_dates=['timestamp'], chunksize=4)
+
+class TestIncrementalTransactionAggregates:
+    """Test cases for watermark-based incremental aggregation."""
+
+    @pytest.fixture
+    def transactions_file(self, tmp_path):
+        path = tmp_path / 'transactions.csv'
+        make_transactions(1, 10, '2024-12-01').to_csv(path, index=False)
+        return str(path)
+
+    def run(self, transactions_file, tmp_path):
+        aggregates, cube, report = incremental_transaction_aggregates(
+            transactions_file, str(tmp_path / 'state'), read_chunks)
+        return aggregates, report
+
+    def test_first_run_is_full(self, transactions_file, tmp_path):
+        """Without state the whole file is read and the state is persisted."""
+        aggregates, report = self.run(transactions_file, tmp_path)
+
+        assert report['mode'] == 'full'
+        assert aggregates.rows == 10
+        assert (tmp_path / 'state' / 'transaction_state.json').exists()
+
+    def test_unchanged_file(self, transactions_file, tmp_path):
+        """A second run over an unchanged file reads no rows."""
+        self.run(transactions_file, tmp_path)
+        aggregates, report = self.run(transactions_file, tmp_path)
+
+        assert report['mode'] == 'unchanged'
+        assert aggregates.rows == 10
+
+    def test_appended_rows_are_merged(self, transactions_file, tmp_path):
+        """Only appended rows are read and the result equals a full rebuild."""
+        self.run(transactions_file, tmp_path)
+        make_transactions(11, 6, '2024-12-05').to_csv(transactions_file, mode='a', header=False, index=False)
+
+        aggregates, report = self.run(transactions_file, tmp_path)
+        full = TransactionAggregates.from_frame(pd.read_csv(transactions_file, parse_dates=['timestamp']))
+
+        assert report == {'mode': 'incremental', 'new_rows': 6, 'reason': None}
+        pd.testing.assert_frame_equal(aggregates.transaction_metrics()['feature_metrics'],
+                                      full.transaction_metrics()['feature_metrics'])
+        pd.testing.assert_series_equal(aggregates.user_revenue_series(), full.user_revenue_series())
+        assert aggregates.distinct_users(since='2024-12-05') == full.distinct_users(since='2024-12-05')
+
+    def test_late_rows_trigger_rebuild(self, transactions_file, tmp_path):
+        """Rows older than the watermark force a full rebuild."""
+        self.run(transactions_file, tmp_path)
+        make_transactions(11, 2, '2024-11-01').to_csv(transactions_file, mode='a', header=False, index=False)
+
+        aggregates, report = self.run(transactions_file, tmp_path)
+        assert report['mode'] == 'full'
+        assert report['reason'] == 'late or corrected rows'
+        assert aggregates.rows == 12
+
+    def test_rewritten_file_triggers_rebuild(self, transactions_file, tmp_path):
+        """Changes to already processed rows are detected."""
+        self.run(transactions_file, tmp_path)
+        rewritten = make_transactions(1, 10, '2024-12-01')
+        rewritten.loc[9, 'amount'] = 999.0
+        rewritten.to_csv(transactions_file, index=False)
+
+        aggregates, report = self.run(transactions_file, tmp_path)
+        assert report['mode'] == 'full'
+        assert aggregates.transaction_metrics()['total_revenue'] == pytest.approx(
+            rewritten.loc[rewritten['status'] == 'Success', 'amount'].sum()
+        )
+
+    def test_edit_before_the_tail_triggers_rebuild(self, tmp_path):
+        """A same-length edit near the start of a large file is detected on the next append."""
+        path = tmp_path / 'transactions.csv'
+        state_dir = str(tmp_path / 'state')
+
+        def read_large_chunks(handle, names):
+            return pd.read_csv(handle, header=None, names=names, parse_dates=['timestamp'], chunksize=4096)
+
+        make_transactions(1, 8000, '2024-01-01').to_csv(path, index=False)
+        incremental_transaction_aggregates(str(path), state_dir, read_large_chunks)
+        lines = path.read_text().splitlines(keepends=True)
+        lines[1] = lines[1].replace(',20.0,', ',30.0,')
+        path.write_text(''.join(lines))
+        make_transactions(8001, 3, '2024-12-01').to_csv(path, mode='a', header=False, index=False)
+
+        aggregates, cube, report = incremental_transaction_aggregates(str(path), state_dir, read_large_chunks)
+        assert report['mode'] == 'full'
+        assert report['reason'] == 'previously processed rows changed'
+        assert aggregates.rows == 8003
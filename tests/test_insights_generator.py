@@ -15,6 +15,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
 
 from insights_generator import SmartPayInsightsGenerator
 from data_processing import SmartPayDataProcessor
+from config import config
 
 class TestSmartPayInsightsGenerator:
     """Test cases for SmartPayInsightsGenerator class."""
@@ -420,6 +421,102 @@ class TestInsightsErrorHandling:
             # Should not crash
             assert "invalid" in str(e).lower() or "error" in str(e).lower()
 
+class TestMemoizedInsights:
+    """Test cases for memoizing insights per processor data version."""
+
+    @pytest.fixture
+    def processor(self):
+        root = os.path.join(os.path.dirname(__file__), '..')
+        return SmartPayDataProcessor(
+            users_file=os.path.join(root, 'smartpay_users.csv'),
+            transactions_file=os.path.join(root, 'smartpay_transactions.csv'),
+            activity_file=os.path.join(root, 'smartpay_app_activity.csv'),
+            cache=False
+        )
+
+    @pytest.fixture
+    def computed(self):
+        """Counts analyzer runs through the instrumentation records."""
+        import instrumentation
+        instrumentation.clear()
+        instrumentation.enable()
+        yield lambda name: instrumentation.summary().get(f'SmartPayInsightsGenerator.{name}', {}).get('calls', 0)
+        instrumentation.disable()
+        instrumentation.clear()
+
+    def test_report_computes_each_analyzer_once(self, processor, computed, tmp_path):
+        """One summary runs every analyzer once; repeated exports reuse the report."""
+        generator = SmartPayInsightsGenerator(processor)
+        with patch.object(processor, 'get_user_metrics', wraps=processor.get_user_metrics) as user_metrics:
+            first = generator.export_insights_report(str(tmp_path / 'a.txt'))
+            second = generator.export_insights_report(str(tmp_path / 'b.txt'))
+
+        assert first == second
+        assert user_metrics.call_count == 1
+        for name in ['analyze_user_behavior_patterns', 'analyze_revenue_optimization',
+                     'analyze_churn_risk', 'analyze_feature_performance',
+                     'generate_strategic_recommendations', 'build_executive_summary']:
+            assert computed(name) == 1, name
+
+    def test_all_formats_from_one_summary(self, processor, computed, tmp_path):
+        """Exporting text, JSON, Markdown and HTML builds the summary once."""
+        import json
+        generator = SmartPayInsightsGenerator(processor)
+        text = generator.export_insights_report(str(tmp_path / 'report.txt'))
+        document = json.loads(generator.export_insights_report(str(tmp_path / 'report.json')))
+        markdown = generator.export_insights_report(str(tmp_path / 'report.md'))
+        page = generator.export_insights_report(str(tmp_path / 'report.html'))
+
+        assert computed('build_executive_summary') == 1
+        assert document['metrics']['total_users'] == 1000
+        assert 'KEY METRICS' in text and '## Key Metrics' in markdown and '<h2>Key Metrics</h2>' in page
+        assert document['insights'][0]['insight'] in text
+
+    def test_new_data_version_recomputes(self, processor, computed):
+        """Reassigning a table, or invalidating explicitly, recomputes the insights."""
+        generator = SmartPayInsightsGenerator(processor)
+        first = generator.analyze_feature_performance()
+        assert generator.analyze_feature_performance() is first
+
+        processor.transactions_df = processor.transactions_df[processor.transactions_df['feature'] != 'Top-up']
+        assert generator.analyze_feature_performance() is not first
+        assert computed('analyze_feature_performance') == 2
+
+        generator.invalidate()
+        generator.analyze_feature_performance()
+        assert computed('analyze_feature_performance') == 3
+
+class TestProcessorModes:
+    """Test cases for insights over streaming and approximate-quantile processors."""
+
+    def make_processor(self, **kwargs):
+        root = os.path.join(os.path.dirname(__file__), '..')
+        return SmartPayDataProcessor(
+            users_file=os.path.join(root, 'smartpay_users.csv'),
+            transactions_file=os.path.join(root, 'smartpay_transactions.csv'),
+            activity_file=os.path.join(root, 'smartpay_app_activity.csv'),
+            cache=False, **kwargs
+        )
+
+    def test_streaming_matches_in_memory(self):
+        """A streaming processor yields the same insights without a transactions frame."""
+        in_memory = SmartPayInsightsGenerator(self.make_processor())
+        streaming = SmartPayInsightsGenerator(self.make_processor(streaming=True))
+
+        for name in ['analyze_user_behavior_patterns', 'analyze_revenue_optimization',
+                     'analyze_feature_performance']:
+            assert getattr(streaming, name)() == getattr(in_memory, name)(), name
+
+    def test_uses_processor_quantile_mode(self):
+        """The high-value threshold comes from the processor's own quantile mode."""
+        processor = self.make_processor(quantiles='approx')
+        generator = SmartPayInsightsGenerator(processor)
+        percentile = config.INSIGHT_THRESHOLDS['high_value_user_percentile']
+
+        with patch.object(processor, 'revenue_quantiles', wraps=processor.revenue_quantiles) as quantiles:
+            generator.analyze_revenue_optimization()
+        quantiles.assert_called_once_with([percentile])
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
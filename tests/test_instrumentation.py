@@ -0,0 +1,119 @@
+"""
+Test suite for SmartPay Analytics stage instrumentation.
+"""
+
+import pytest
+import numpy as np
+import logging
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+import instrumentation
+from instrumentation import instrumented
+from data_processing import SmartPayDataProcessor
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+class Worker:
+    @instrumented(rows=lambda worker, result: len(result))
+    def allocate(self, n):
+        return np.ones(n)
+
+    @instrumented(name='outer')
+    def outer(self):
+        self.allocate(1_000_000)
+        return 'done'
+
+    @instrumented()
+    def fail(self):
+        raise ValueError("boom")
+
+@pytest.fixture
+def enabled():
+    instrumentation.clear()
+    instrumentation.enable(memory=True)
+    yield
+    instrumentation.disable()
+    instrumentation.clear()
+
+class TestInstrumentation:
+    """Test cases for per-stage timing records."""
+
+    def test_disabled_records_nothing(self):
+        """With instrumentation off, calls pass straight through."""
+        instrumentation.clear()
+        assert not instrumentation.is_enabled()
+        assert Worker().outer() == 'done'
+        assert instrumentation.records() == []
+
+    def test_records_stages(self, enabled):
+        """Each call records wall/CPU time, rows, peak RSS and allocations."""
+        Worker().outer()
+
+        inner, outer = instrumentation.records()
+        assert inner['stage'] == 'Worker.allocate' and inner['depth'] == 1
+        assert inner['rows'] == 1_000_000
+        assert outer['stage'] == 'outer' and outer['depth'] == 0
+        assert outer['wall_s'] >= inner['wall_s'] >= 0
+        assert outer['peak_rss_bytes'] > 0
+        # The nested allocation counts towards the caller's peak too.
+        assert inner['alloc_bytes'] >= 8_000_000
+        assert outer['alloc_bytes'] >= 8_000_000
+
+    def test_structured_log_and_errors(self, enabled, caplog):
+        """Records are logged as key=value lines; failing stages are marked."""
+        with caplog.at_level(logging.INFO, logger='smartpay.instrumentation'):
+            with pytest.raises(ValueError):
+                Worker().fail()
+
+        assert 'stage=Worker.fail' in caplog.text
+        assert 'error=ValueError' in caplog.text
+        assert caplog.records[-1].stage_metrics['error'] == 'ValueError'
+
+    def test_summary_table(self, enabled):
+        """The summary aggregates calls per stage."""
+        worker = Worker()
+        worker.allocate(10)
+        worker.allocate(20)
+
+        totals = instrumentation.summary()
+        assert totals['Worker.allocate']['calls'] == 2
+        assert totals['Worker.allocate']['rows'] == 30
+        assert 'Worker.allocate' in instrumentation.summary_table()
+
+    def test_without_resource_module(self, enabled, monkeypatch, caplog):
+        """Where ``resource`` is unavailable, peak RSS is reported as missing."""
+        monkeypatch.setattr(instrumentation, 'resource', None)
+        with caplog.at_level(logging.INFO, logger='smartpay.instrumentation'):
+            Worker().allocate(10)
+
+        assert instrumentation.records()[0]['peak_rss_bytes'] is None
+        assert 'peak_rss_mb' not in caplog.text
+        assert instrumentation.summary()['Worker.allocate']['peak_rss_bytes'] is None
+        assert 'Worker.allocate' in instrumentation.summary_table()
+
+    def test_insights_report_summary(self, enabled, capsys):
+        """The insights report ends with the stages it timed."""
+        processor = SmartPayDataProcessor(
+            users_file=os.path.join(ROOT, 'smartpay_users.csv'),
+            transactions_file=os.path.join(ROOT, 'smartpay_transactions.csv'),
+            activity_file=os.path.join(ROOT, 'smartpay_app_activity.csv'),
+            cache=False
+        )
+        processor.generate_insights_report(timing_summary=True)
+        output = capsys.readouterr().out
+
+        assert 'STAGE TIMINGS' in output
+        assert 'SmartPayDataProcessor.get_user_metrics' in output
+        stages = instrumentation.summary()
+        assert stages['SmartPayDataProcessor._read_table']['rows'] > 0
+
+        processor.generate_insights_report(timing_summary=False)
+        assert 'STAGE TIMINGS' not in capsys.readouterr().out
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,96 @@
+"""
+Test suite for the SmartPay Analytics performance regression gate.
+
+Set BENCHMARK_BASELINE to a results file written by benchmarks/bench_suite.py
+to also run the suite and fail on regressions against it.
+"""
+
+import pytest
+import copy
+import sys
+import os
+
+# Add the benchmarks directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from regression_check import compare, environment_differences, format_report, load_results, run_current
+
+def results(**methods):
+    return {
+        'environment': {'python': '3.11.0', 'cpu_count': 4},
+        'settings': {'repeat': 1, 'trace_memory': True, 'generator': {}},
+        'scales': {'1m': {'results': {
+            name: {'wall_s': wall, 'peak_alloc_bytes': alloc} for name, (wall, alloc) in methods.items()
+        }}},
+    }
+
+@pytest.fixture
+def baseline():
+    return results(**{
+        'processor.get_transaction_metrics': (1.0, 1000),
+        'processor.get_user_segmentation': (2.0, 5000),
+        'insights.analyze_churn_risk': (0.001, 100),
+    })
+
+class TestRegressionCheck:
+    """Test cases for comparing benchmark runs."""
+
+    def test_within_tolerance(self, baseline):
+        """Changes within tolerance pass."""
+        current = copy.deepcopy(baseline)
+        current['scales']['1m']['results']['processor.get_transaction_metrics']['wall_s'] = 1.15
+
+        regressions, skipped = compare(baseline, current, time_tolerance=0.2, memory_tolerance=0.1)
+        assert regressions == [] and skipped == []
+        assert 'No performance regressions' in format_report(regressions, skipped)
+
+    def test_time_and_memory_regressions(self, baseline):
+        """Slowdowns and allocation growth beyond tolerance are reported."""
+        current = copy.deepcopy(baseline)
+        current['scales']['1m']['results']['processor.get_transaction_metrics']['wall_s'] = 1.5
+        current['scales']['1m']['results']['processor.get_user_segmentation']['peak_alloc_bytes'] = 6000
+
+        regressions, _ = compare(baseline, current, time_tolerance=0.2, memory_tolerance=0.1)
+        found = {(r['method'], r['metric']) for r in regressions}
+        assert found == {('processor.get_transaction_metrics', 'wall_s'),
+                         ('processor.get_user_segmentation', 'peak_alloc_bytes')}
+        assert '+50%' in format_report(regressions, [])
+
+    def test_min_delta_ignores_timer_noise(self, baseline):
+        """Tiny absolute slowdowns do not fail the gate."""
+        current = copy.deepcopy(baseline)
+        current['scales']['1m']['results']['insights.analyze_churn_risk']['wall_s'] = 0.003
+
+        regressions, _ = compare(baseline, current, time_tolerance=0.2, min_delta=0.01)
+        assert regressions == []
+        regressions, _ = compare(baseline, current, time_tolerance=0.2, min_delta=0.0)
+        assert len(regressions) == 1
+
+    def test_missing_methods_and_filters(self, baseline):
+        """Methods absent from the current run are skipped; filters limit the check."""
+        current = copy.deepcopy(baseline)
+        del current['scales']['1m']['results']['insights.analyze_churn_risk']
+        current['scales']['1m']['results']['processor.get_user_segmentation']['wall_s'] = 9.0
+
+        regressions, skipped = compare(baseline, current, methods=['processor.get_transaction*'])
+        assert regressions == [] and skipped == []
+        regressions, skipped = compare(baseline, current)
+        assert skipped == [('1m', 'insights.analyze_churn_risk')]
+        assert len(regressions) == 1
+
+    def test_environment_differences(self, baseline):
+        current = copy.deepcopy(baseline)
+        current['environment']['cpu_count'] = 8
+        assert environment_differences(baseline, current) == {'cpu_count': (4, 8)}
+
+@pytest.mark.skipif(not os.getenv('BENCHMARK_BASELINE'), reason='BENCHMARK_BASELINE not set')
+def test_no_performance_regressions(tmp_path_factory):
+    """Run the benchmark suite and compare with the stored baseline."""
+    baseline = load_results(os.environ['BENCHMARK_BASELINE'])
+    data_dir = os.getenv('BENCHMARK_DATA_DIR') or str(tmp_path_factory.mktemp('benchmark-data'))
+    regressions, skipped = compare(baseline, run_current(baseline, data_dir))
+    assert not regressions, format_report(regressions, skipped)
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
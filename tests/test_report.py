@@ -0,0 +1,101 @@
+"""
+Test suite for the SmartPay Analytics executive summary report model.
+"""
+
+import pytest
+import numpy as np
+import json
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from report import ExecutiveSummary, format_for_path, render
+
+@pytest.fixture
+def summary():
+    return ExecutiveSummary(
+        metrics={
+            'total_users': np.int64(1000),
+            'monthly_active_users': 750,
+            'success_rate': np.float64(94.5),
+            'avg_transaction_value': 127.5,
+            'total_revenue': 4200000.0,
+            'churn_rate': 8.0,
+        },
+        insights=[
+            {'type': 'Peak Usage Time', 'insight': 'Peak at 18:00 with 120 transactions',
+             'impact': 'High', 'action': 'Scale up'},
+            {'type': 'Revenue by Feature', 'insight': 'Top-up <leads> & grows',
+             'impact': 'Medium', 'action': 'Invest'},
+        ],
+        recommendations=[
+            {'category': 'Immediate Actions (High Impact)', 'recommendations': ['Scale up', 'Invest']},
+        ],
+        generated_at=datetime(2025, 7, 5, 9, 30),
+    )
+
+class TestExecutiveSummary:
+    """Test cases for rendering one summary to several formats."""
+
+    def test_text(self, summary):
+        """The text rendering keeps the console report layout."""
+        text = render(summary, 'text')
+        assert text.startswith('🎯 SmartPay Executive Summary Report\n' + '=' * 50 + '\nGenerated on: 2025-07-05 09:30:00\n')
+        assert '• Total Users: 1,000\n' in text
+        assert '• Total Revenue: $4,200,000.00\n' in text
+        assert '\nImmediate Actions (High Impact):\n  1. Scale up\n  2. Invest\n' in text
+        assert text.endswith('4. Schedule follow-up review in 30 days\n')
+
+    def test_json(self, summary):
+        """The JSON rendering is the structured summary with plain numbers."""
+        document = json.loads(render(summary, 'json'))
+        assert document['generated_at'] == '2025-07-05T09:30:00'
+        assert document['metrics']['total_users'] == 1000
+        assert document['insights'][0]['type'] == 'Peak Usage Time'
+        assert document['recommendations'][0]['recommendations'] == ['Scale up', 'Invest']
+        assert len(document['next_steps']) == 4
+
+    def test_json_missing_metric(self, summary):
+        """A NaN metric is written as null, keeping the document valid JSON."""
+        summary.metrics['avg_transaction_value'] = np.float64(np.nan)
+        output = render(summary, 'json')
+        assert 'NaN' not in output
+        assert json.loads(output)['metrics']['avg_transaction_value'] is None
+        assert '• Average Transaction Value: $nan\n' in render(summary, 'text')
+
+    def test_markdown_and_html(self, summary):
+        """Markdown and HTML carry the same content; HTML is escaped."""
+        markdown = render(summary, 'markdown')
+        assert '| Transaction Success Rate | 94.5% |' in markdown
+        assert '### Immediate Actions (High Impact)' in markdown
+
+        page = render(summary, 'html')
+        assert '<th>Churn Rate</th><td>8.0%</td>' in page
+        assert 'Top-up &lt;leads&gt; &amp; grows' in page
+        assert '<leads>' not in page
+
+    def test_concurrent_rendering(self, summary):
+        """Rendering does not mutate the summary, so formats can render in parallel."""
+        formats = ['text', 'json', 'markdown', 'html'] * 8
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            rendered = list(pool.map(lambda fmt: render(summary, fmt), formats))
+        for fmt, output in zip(formats, rendered):
+            assert output == render(summary, fmt)
+
+    def test_formats(self, summary):
+        """Formats follow file extensions; unknown formats are rejected."""
+        assert format_for_path('report.JSON') == 'json'
+        assert format_for_path('report.md') == 'markdown'
+        assert format_for_path('report.html') == 'html'
+        assert format_for_path('report.txt') == 'text'
+        assert format_for_path('report') == 'text'
+        with pytest.raises(ValueError):
+            render(summary, 'pdf')
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
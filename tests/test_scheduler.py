@@ -0,0 +1,79 @@
+"""
+Test suite for SmartPay Analytics metric scheduler.
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from scheduler import MetricScheduler
+
+class TestMetricScheduler:
+    """Test cases for the dependency-ordered task runner."""
+
+    @pytest.mark.parametrize('parallel', [False, True])
+    def test_dependencies_run_first_and_once(self, parallel):
+        """Each task runs once, after everything it depends on."""
+        calls = []
+        lock = threading.Lock()
+
+        def task(name):
+            def run():
+                with lock:
+                    calls.append(name)
+                return name.upper()
+            return run
+
+        scheduler = MetricScheduler(max_workers=4, parallel=parallel)
+        scheduler.add('load', task('load'))
+        scheduler.add('a', task('a'), ['load'])
+        scheduler.add('b', task('b'), ['load'])
+        scheduler.add('report', task('report'), ['a', 'b'])
+
+        results = scheduler.run()
+        assert results == {'load': 'LOAD', 'a': 'A', 'b': 'B', 'report': 'REPORT'}
+        assert sorted(calls) == ['a', 'b', 'load', 'report']
+        assert calls[0] == 'load' and calls[-1] == 'report'
+
+    def test_independent_tasks_overlap(self):
+        """Tasks without dependencies between them run concurrently."""
+        barrier = threading.Barrier(2, timeout=5)
+        scheduler = MetricScheduler(max_workers=2)
+        scheduler.add('a', barrier.wait)
+        scheduler.add('b', barrier.wait)
+        assert set(scheduler.run()) == {'a', 'b'}
+
+    def test_targets_only_run_their_dependencies(self):
+        """Running a subset skips unrelated tasks."""
+        scheduler = MetricScheduler(max_workers=2)
+        scheduler.add('load', lambda: 1)
+        scheduler.add('a', lambda: 2, ['load'])
+        scheduler.add('b', lambda: 3)
+        assert scheduler.run(['a']) == {'load': 1, 'a': 2}
+
+    def test_cycle_is_rejected(self):
+        """Dependency cycles raise ValueError before anything runs."""
+        scheduler = MetricScheduler(max_workers=2)
+        scheduler.add('a', lambda: 1, ['b'])
+        scheduler.add('b', lambda: 2, ['a'])
+        with pytest.raises(ValueError):
+            scheduler.run()
+
+    def test_task_error_propagates(self):
+        """The first failing task's exception is re-raised."""
+        def fail():
+            raise RuntimeError('boom')
+
+        scheduler = MetricScheduler(max_workers=2)
+        scheduler.add('a', fail)
+        scheduler.add('b', lambda: 1, ['a'])
+        with pytest.raises(RuntimeError, match='boom'):
+            scheduler.run()
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
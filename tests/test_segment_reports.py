@@ -0,0 +1,165 @@
+"""
+Test suite for the SmartPay Analytics batch segment reports.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from data_processing import SmartPayDataProcessor
+from insights_generator import SmartPayInsightsGenerator
+from segment_reports import SegmentReports, age_groups
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+FEATURES = ['Bill Payment', 'Money Transfer', 'QR Scan', 'Top-up']
+LOCATIONS = ['Lagos', 'Nairobi', 'Accra']
+
+
+def new_processor():
+    return SmartPayDataProcessor(
+        users_file=os.path.join(ROOT, 'smartpay_users.csv'),
+        transactions_file=os.path.join(ROOT, 'smartpay_transactions.csv'),
+        activity_file=os.path.join(ROOT, 'smartpay_app_activity.csv'),
+        cache=False
+    )
+
+
+def frames(now):
+    """Users, transactions and activity with recent, at-risk and churned users.
+
+    Times sit off whole-day boundaries, so the reference generator's slightly
+    later ``now`` classifies them the same way.
+    """
+    rng = np.random.default_rng(7)
+    n_users, n_tx = 60, 1500
+    users = pd.DataFrame({
+        'user_id': np.arange(1, n_users + 1),
+        'age': rng.integers(18, 80, n_users),
+        'location': rng.choice(LOCATIONS, n_users),
+        'signup_date': [now - timedelta(days=int(days)) for days in rng.integers(100, 400, n_users)],
+    })
+    transactions = pd.DataFrame({
+        'transaction_id': np.arange(n_tx),
+        'user_id': rng.integers(1, n_users + 1, n_tx),
+        'feature': rng.choice(FEATURES, n_tx, p=[0.4, 0.3, 0.2, 0.1]),
+        'amount': rng.uniform(1, 200, n_tx).round(2),
+        'status': rng.choice(['Success', 'Failed'], n_tx, p=[0.8, 0.2]),
+        'timestamp': [now - timedelta(minutes=int(minutes), seconds=30)
+                      for minutes in rng.integers(0, 200 * 24 * 60, n_tx)],
+    })
+    activity = pd.DataFrame({
+        'user_id': np.concatenate([np.arange(1, n_users + 1), [3, 5]]),
+        'last_transaction_date': [now - timedelta(days=int(days), hours=12)
+                                  for days in rng.integers(0, 60, n_users + 2)],
+    })
+    return users, transactions, activity
+
+
+@pytest.fixture
+def now():
+    return datetime.now()
+
+
+@pytest.fixture
+def processor(now):
+    processor = new_processor()
+    processor.users_df, processor.transactions_df, processor.activity_df = frames(now)
+    return processor
+
+
+def reference(users, transactions, activity):
+    """The generator's summary for a processor holding only the given frames."""
+    processor = new_processor()
+    processor.users_df = users.reset_index(drop=True)
+    processor.transactions_df = transactions.reset_index(drop=True)
+    processor.activity_df = activity.reset_index(drop=True)
+    return SmartPayInsightsGenerator(processor).build_executive_summary()
+
+
+def assert_same_summary(batch, single):
+    assert batch.metrics.keys() == single.metrics.keys()
+    for key, value in single.metrics.items():
+        assert batch.metrics[key] == pytest.approx(value), key
+    assert batch.insights == single.insights
+    assert batch.recommendations == single.recommendations
+
+
+class TestSegmentReports:
+    """Test cases for per-segment executive summaries computed in one pass."""
+
+    def test_location_matches_filtered_generator(self, processor, now):
+        """Each location's summary equals the generator run on that location's data alone."""
+        users, transactions, activity = processor.users_df, processor.transactions_df, processor.activity_df
+        summaries = SegmentReports(processor, now=now).summaries('location')
+        assert sorted(summaries) == sorted(LOCATIONS)
+        for location, summary in summaries.items():
+            members = users[users['location'] == location]
+            assert_same_summary(summary, reference(
+                members,
+                transactions[transactions['user_id'].isin(members['user_id'])],
+                activity[activity['user_id'].isin(members['user_id'])],
+            ))
+
+    def test_feature_matches_filtered_generator(self, processor, now):
+        """A feature segment holds that feature's transactions and the users who made them."""
+        users, transactions, activity = processor.users_df, processor.transactions_df, processor.activity_df
+        summaries = SegmentReports(processor, now=now).summaries('feature')
+        assert list(summaries) == FEATURES
+        for feature, summary in summaries.items():
+            used = transactions[transactions['feature'] == feature]
+            members = users[users['user_id'].isin(used['user_id'])]
+            assert_same_summary(summary, reference(
+                members, used, activity[activity['user_id'].isin(members['user_id'])]))
+
+    def test_age_groups(self, processor, now):
+        """Age groups use the configured inclusive bounds."""
+        labels = age_groups([18, 25, 26, 65, 66, 100, 17])
+        assert list(labels.astype(object)[:6]) == ['young', 'young', 'adult', 'senior', 'elderly', 'elderly']
+        assert pd.isna(labels[6])
+
+        metrics = SegmentReports(processor, now=now).metrics('age_group')
+        assert list(metrics.index) == ['young', 'adult', 'middle', 'senior', 'elderly']
+        assert metrics['total_users'].sum() == len(processor.users_df)
+        assert metrics['transaction_count'].sum() == len(processor.transactions_df)
+
+    def test_missing_feature(self, processor, now):
+        """Rows without a feature count toward segment totals but no feature's figures."""
+        transactions = processor.transactions_df.copy()
+        transactions.loc[transactions.index[:50], 'feature'] = None
+        processor.transactions_df = transactions
+        metrics = SegmentReports(processor, now=now).metrics('location')
+
+        rows = transactions.merge(processor.users_df[['user_id', 'location']], on='user_id')
+        successful = rows[rows['status'] == 'Success']
+        assert metrics['transaction_count'].sum() == len(transactions)
+        assert metrics['total_revenue'].sum() == pytest.approx(successful['amount'].sum())
+        feature_revenue = successful.groupby(['location', 'feature'])['amount'].sum()
+        success_rate = rows.groupby(['location', 'feature'])['status'].apply(lambda s: (s == 'Success').mean() * 100)
+        for location, row in metrics.iterrows():
+            assert row['top_feature'] == feature_revenue[location].idxmax()
+            assert row['top_feature_revenue'] == pytest.approx(feature_revenue[location].max())
+            assert row['lowest_success_rate'] == pytest.approx(success_rate[location].min())
+
+    def test_empty_segment(self, processor, now):
+        """A segment without transactions still gets metrics and a summary."""
+        processor.users_df = processor.users_df.assign(age=processor.users_df['age'].clip(upper=60))
+        reports = SegmentReports(processor, now=now)
+        assert reports.metrics('age_group').loc['elderly', 'total_users'] == 0
+        summary = reports.summaries('age_group')['elderly']
+        assert summary.metrics['total_users'] == 0
+        assert summary.insights == []
+
+    def test_reports_covers_dimensions(self, processor, now):
+        reports = SegmentReports(processor, now=now).reports()
+        assert set(reports) == {'location', 'age_group', 'feature'}
+        assert all(summary.generated_at == now for summary in reports['location'].values())
+
+    def test_unknown_dimension(self, processor):
+        with pytest.raises(ValueError, match='Unknown segment dimension'):
+            SegmentReports(processor).metrics('device')
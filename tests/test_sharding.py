@@ -0,0 +1,88 @@
+"""
+Test suite for SmartPay Analytics sharded transaction aggregation.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from aggregates import TransactionAggregates
+from sharding import byte_ranges, shard_files, sharded_transaction_aggregates, split_transactions
+
+def make_transactions(count):
+    ids = np.arange(1, count + 1)
+    return pd.DataFrame({
+        'transaction_id': ids,
+        'user_id': ids % 11 + 1,
+        'feature': np.where(ids % 3 == 0, 'Top-up', 'QR Scan'),
+        'amount': (ids % 5 + 1) * 10.0,
+        'timestamp': pd.Timestamp('2024-10-01') + pd.to_timedelta(ids * 7, unit='h'),
+        'status': np.where(ids % 4 == 0, 'Failed', 'Success')
+    })
+
+def read_chunks(source, names=None):
+    header = {} if names is None else {'header': None, 'names': names}
+    return pd.read_csv(source, parse_dates=['timestamp'], chunksize=16, **header)
+
+@pytest.fixture
+def transactions_file(tmp_path):
+    path = tmp_path / 'transactions.csv'
+    make_transactions(200).to_csv(path, index=False)
+    return str(path)
+
+def assert_same(actual, expected):
+    assert actual.rows == expected.rows
+    assert actual.distinct_users() == expected.distinct_users()
+    assert actual.distinct_users(since='2024-11-01') == expected.distinct_users(since='2024-11-01')
+    pd.testing.assert_series_equal(actual.user_revenue_series(), expected.user_revenue_series())
+    assert actual.funnel_metrics(50) == expected.funnel_metrics(50)
+
+class TestByteRanges:
+    """Test cases for line-aligned byte-range shards."""
+
+    @pytest.mark.parametrize('shards', [1, 3, 7, 500])
+    def test_ranges_cover_every_row_once(self, transactions_file, shards):
+        """Ranges start on line boundaries and together hold every data row."""
+        ranges = byte_ranges(transactions_file, shards)
+        assert len(ranges) <= shards
+        with open(transactions_file, 'rb') as handle:
+            content = handle.read()
+        lines = b''.join(content[start:end] for _, start, end in ranges).splitlines()
+        assert lines == content.splitlines()[1:]
+        assert all(content[start - 1:start] == b'\n' for _, start, _ in ranges)
+
+class TestShardedAggregates:
+    """Test cases for merging per-shard partial aggregates."""
+
+    @pytest.mark.parametrize('max_workers', [1, 2])
+    def test_byte_range_shards_match_single_pass(self, transactions_file, max_workers):
+        """Merged byte-range shards give the same exact metrics as one pass."""
+        expected = TransactionAggregates.from_chunks(read_chunks(transactions_file))
+        shards = byte_ranges(transactions_file, 4)
+        assert_same(sharded_transaction_aggregates(shards, read_chunks, max_workers), expected)
+
+    @pytest.mark.parametrize('by', ['user_id', 'month'])
+    def test_split_files_match_single_pass(self, transactions_file, tmp_path, by):
+        """Shard files split by user hash or month merge to the same result."""
+        expected = TransactionAggregates.from_chunks(read_chunks(transactions_file))
+        paths = split_transactions(read_chunks(transactions_file), str(tmp_path / 'shards'), shards=3, by=by)
+
+        assert paths == shard_files(str(tmp_path / 'shards'))
+        if by == 'user_id':
+            assert len(paths) == 3
+        assert sum(len(pd.read_csv(path)) for path in paths) == 200
+        assert_same(sharded_transaction_aggregates(paths, read_chunks, 2), expected)
+
+    def test_unknown_shard_key(self, transactions_file, tmp_path):
+        """Only user_id and month partitioning are supported."""
+        with pytest.raises(ValueError):
+            split_transactions(read_chunks(transactions_file), str(tmp_path / 'shards'), by='feature')
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+Test suite for SmartPay Analytics approximate distinct counting.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from sketches import DailyHyperLogLog, HyperLogLog, KLLSketch, precision_for_error
+
+DAY_NS = 86_400 * 10**9
+
+class TestHyperLogLog:
+    """Test cases for the single HyperLogLog sketch."""
+
+    def test_precision_for_error(self):
+        """Precision is the smallest one meeting the requested error."""
+        assert precision_for_error(0.02) == 12
+        assert precision_for_error(0.01) == 14
+        with pytest.raises(ValueError):
+            precision_for_error(0)
+
+    @pytest.mark.parametrize('cardinality', [10, 1_000, 200_000])
+    def test_estimate_within_error(self, cardinality):
+        """Estimates stay within three standard errors of the true count."""
+        sketch = HyperLogLog(12).add(np.arange(cardinality))
+        assert abs(sketch.count() - cardinality) <= 3 * 1.04 / 64 * cardinality + 1
+
+    def test_duplicates_are_ignored(self):
+        """Adding the same IDs again does not change the estimate."""
+        sketch = HyperLogLog(10).add(np.arange(5_000))
+        before = sketch.count()
+        assert sketch.add(np.arange(5_000)).count() == before
+
+    def test_merge_is_union(self):
+        """Merging sketches equals sketching the union."""
+        left = HyperLogLog(12).add(np.arange(0, 60_000))
+        right = HyperLogLog(12).add(np.arange(40_000, 100_000))
+        union = HyperLogLog(12).add(np.arange(100_000))
+        assert left.merge(right).count() == union.count()
+        with pytest.raises(ValueError):
+            left.merge(HyperLogLog(10))
+
+class TestDailyHyperLogLog:
+    """Test cases for per-day sketches."""
+
+    def test_since_window(self):
+        """Counts from a day onward only include users seen on those days."""
+        sketch = DailyHyperLogLog(12)
+        sketch.add(np.arange(100), np.full(100, 10 * DAY_NS))
+        sketch.add(np.arange(50, 80), np.full(30, 20 * DAY_NS))
+
+        assert sketch.count() == pytest.approx(100, rel=0.05)
+        assert sketch.count(since_ns=15 * DAY_NS) == pytest.approx(30, rel=0.05)
+        assert sketch.count(since_ns=30 * DAY_NS) == 0
+
+    def test_merge_extends_day_range(self):
+        """Sketches over different day ranges merge into one covering both."""
+        early = DailyHyperLogLog(10).add(np.arange(20), np.full(20, 5 * DAY_NS))
+        late = DailyHyperLogLog(10).add(np.arange(10, 40), np.full(30, 9 * DAY_NS))
+        merged = DailyHyperLogLog(10).merge(late).merge(early)
+
+        assert merged.origin == 5 and merged.days == 5
+        assert merged.count() == pytest.approx(40, rel=0.05)
+        assert merged.count(since_ns=6 * DAY_NS) == pytest.approx(30, rel=0.05)
+
+    def test_empty_sketch(self):
+        """An empty sketch counts zero."""
+        assert DailyHyperLogLog(10).count() == 0
+
+class TestKLLSketch:
+    """Test cases for the KLL quantile sketch."""
+
+    @pytest.fixture
+    def values(self):
+        return np.random.default_rng(7).lognormal(3, 1, 200_000)
+
+    def test_rank_error_is_bounded(self, values):
+        """Chunked updates answer percentiles within a small rank error."""
+        sketch = KLLSketch(200)
+        for chunk in np.array_split(values, 50):
+            sketch.update(chunk)
+
+        assert sketch.n == len(values)
+        assert sketch.retained < 2_000
+        for q in [0.5, 0.8, 0.9, 0.95]:
+            assert (values <= sketch.quantile(q)).mean() == pytest.approx(q, abs=0.02)
+
+    def test_merge_matches_single_sketch(self, values):
+        """Sketches over disjoint shards merge into one with the same accuracy."""
+        merged = KLLSketch(200, seed=1).update(values[:80_000])
+        merged.merge(KLLSketch(200, seed=2).update(values[80_000:]))
+
+        assert merged.n == len(values)
+        assert merged.rank(np.quantile(values, 0.9)) == pytest.approx(0.9, abs=0.02)
+
+    def test_small_inputs_are_exact(self):
+        """Below capacity every value is kept and quantiles are exact order statistics."""
+        sketch = KLLSketch(200).update([5.0, 1.0, 3.0, np.nan, 2.0, 4.0])
+        assert sketch.n == 5
+        assert sketch.quantiles([0.2, 0.6, 1.0]).tolist() == [1.0, 3.0, 5.0]
+        assert np.isnan(KLLSketch().quantile(0.5))
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+"""
+Test suite for SmartPay Analytics on-disk snapshot cache.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+import time
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+pytest.importorskip('pyarrow')
+
+from snapshot_cache import SnapshotCache
+
+SPEC = {'version': 1, 'table': 'transactions', 'schema': None}
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'user_id': np.array([1, 2, 3], dtype=np.int32),
+        'feature': pd.Categorical(['Top-up', 'QR Scan', 'Top-up']),
+        'amount': np.array([10.5, 20.0, 30.25], dtype=np.float32),
+        'timestamp': pd.to_datetime(['2024-12-01 10:00:00', '2024-12-02 11:00:00', '2024-12-03 12:00:00'])
+    })
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.csv'
+    path.write_text('user_id\n1\n')
+    return str(path)
+
+class TestSnapshotCache:
+    """Test cases for SnapshotCache."""
+
+    def test_roundtrip_preserves_dtypes(self, tmp_path, source, frame):
+        """A stored frame comes back with the same values and dtypes."""
+        cache = SnapshotCache(tmp_path / 'cache', max_bytes=10 ** 8)
+        assert cache.get(source, SPEC) is None
+
+        cache.put(source, SPEC, frame)
+        pd.testing.assert_frame_equal(cache.get(source, SPEC), frame, check_index_type=False)
+
+    def test_key_changes_with_source_and_spec(self, tmp_path, source, frame):
+        """Editing the source or changing the parse spec misses the cache."""
+        cache = SnapshotCache(tmp_path / 'cache', max_bytes=10 ** 8)
+        cache.put(source, SPEC, frame)
+
+        assert cache.get(source, {**SPEC, 'version': 2}) is None
+        with open(source, 'a') as f:
+            f.write('2\n')
+        assert cache.get(source, SPEC) is None
+
+    def test_lru_eviction(self, tmp_path, frame):
+        """The least recently used snapshot is evicted past the size cap."""
+        cache = SnapshotCache(tmp_path / 'cache', max_bytes=10 ** 8)
+        sources = []
+        for i in range(3):
+            path = tmp_path / f'source_{i}.csv'
+            path.write_text(f'user_id\n{i}\n')
+            sources.append(str(path))
+            cache.put(str(path), SPEC, frame)
+            time.sleep(0.01)
+        entry_size = cache.entries()[0][1]
+
+        cache.get(sources[0], SPEC)
+        cache.max_bytes = entry_size * 2
+        cache.evict()
+
+        assert cache.get(sources[1], SPEC) is None
+        assert cache.get(sources[0], SPEC) is not None
+        assert cache.get(sources[2], SPEC) is not None
@@ -0,0 +1,101 @@
+"""
+Test suite for SmartPay Analytics per-user index.
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the python directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from user_index import UserIndex
+
+@pytest.fixture
+def transactions():
+    return pd.DataFrame({
+        'transaction_id': [1, 2, 3, 4, 5, 6],
+        'user_id': [3, 1, 3, 1, 3, 6],
+        'feature': ['Top-up', 'QR Scan', 'QR Scan', 'Top-up', 'Top-up', 'Bill Payment'],
+        'amount': [10.0, 20.0, 30.0, 40.0, 50.0, 60.0],
+        'timestamp': pd.to_datetime([
+            '2024-12-01 10:00', '2024-12-02 11:00', '2024-12-05 12:00',
+            '2024-12-01 13:00', '2024-12-03 14:00', '2024-12-04 15:00'
+        ]),
+        'status': ['Success', 'Success', 'Failed', 'Success', 'Success', 'Abandoned']
+    })
+
+@pytest.fixture
+def user_summary():
+    return pd.DataFrame({
+        'user_id': [1, 2, 3],
+        'age': [25, 31, 40],
+        'location': ['Lagos', 'Pune', 'Lima'],
+        'app_open_count': [10, np.nan, 4],
+    })
+
+@pytest.fixture
+def index(transactions, user_summary):
+    segments = pd.Series(pd.Categorical(['High Value', 'Low Value'], categories=['Low Value', 'High Value']),
+                         index=pd.Index([1, 3], name='user_id'))
+    return UserIndex(transactions, user_summary, segments)
+
+class TestUserIndex:
+    """Test cases for CSR offsets and profile lookups."""
+
+    def test_offsets_slice_each_users_rows(self, index, transactions):
+        """Each user's transactions are one contiguous slice."""
+        for user_id in [1, 3, 6]:
+            rows = index.user_transactions(user_id)
+            expected = transactions[transactions['user_id'] == user_id]
+            assert rows['transaction_id'].tolist() == expected['transaction_id'].tolist()
+        assert index.user_transactions(2).empty
+
+    def test_profile(self, index):
+        """Profiles join attributes, totals, feature counts, last activity and segment."""
+        profile = index.profile(3)
+
+        assert profile['age'] == 40 and profile['location'] == 'Lima'
+        assert profile['transaction_count'] == 3
+        assert profile['successful_transactions'] == 2
+        assert profile['total_revenue'] == pytest.approx(60.0)
+        assert profile['transactions_by_feature'] == {'QR Scan': 1, 'Top-up': 2}
+        assert profile['last_transaction'] == pd.Timestamp('2024-12-05 12:00')
+        assert profile['value_segment'] == 'Low Value'
+
+    def test_partial_users(self, index):
+        """Users without transactions, attributes or a segment still resolve."""
+        no_transactions = index.profile(2)
+        assert no_transactions['transaction_count'] == 0
+        assert no_transactions['last_transaction'] is None
+        assert no_transactions['app_open_count'] is None
+
+        no_summary = index.profile(6)
+        assert no_summary['age'] is None
+        assert no_summary['value_segment'] is None
+        assert no_summary['transactions_by_feature'] == {'Bill Payment': 1}
+
+    @pytest.mark.parametrize('missing_user', [3, 0])
+    def test_missing_feature(self, transactions, user_summary, missing_user):
+        """A row without a feature counts as the user's transaction only, never another user's feature."""
+        transactions.loc[4, ['user_id', 'feature']] = [missing_user, np.nan]
+        index = UserIndex(transactions, user_summary)
+
+        profile = index.profile(missing_user)
+        assert profile['transaction_count'] == (3 if missing_user == 3 else 1)
+        assert sum(profile['transactions_by_feature'].values()) == profile['transaction_count'] - 1
+        assert index.profile(1)['transactions_by_feature'] == {'QR Scan': 1, 'Top-up': 1}
+        assert index.feature_counts.sum() == len(transactions) - 1
+
+    @pytest.mark.parametrize('user_id', [0, 4, 99, -1])
+    def test_unknown_user(self, index, user_id):
+        """Unknown users raise KeyError."""
+        assert user_id not in index
+        with pytest.raises(KeyError):
+            index.profile(user_id)
+
+if __name__ == "__main__":
+    # Run tests
+    pytest.main([__file__, "-v"])